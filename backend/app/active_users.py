@@ -0,0 +1,86 @@
+"""
+EcoleHub Stage 4 - Active user tracking
+Last-seen timestamps in one Redis sorted set, counted per time window
+"""
+
+import logging
+import os
+import time
+from typing import Dict, Optional
+
+from prometheus_client import Gauge
+
+from .analytics_pipeline import analytics_pipeline
+from .caching import LRUTTLCache
+
+ACTIVE_USERS_KEY = "analytics:active_users"
+ACTIVE_USER_WINDOWS = {"5m": 300, "1h": 3600, "24h": 86400}
+# A user's last-seen score is refreshed at most this often per process
+ACTIVE_USERS_TOUCH_INTERVAL = float(os.getenv("ACTIVE_USERS_TOUCH_INTERVAL", "60"))
+
+ecolehub_active_users_window = Gauge(
+    "ecolehub_active_users_window",
+    "Distinct authenticated users seen within the window",
+    ["window"],
+)
+
+
+class ActiveUserTracker:
+    """
+    Records when each user was last authenticated (ZADD user -> timestamp) and
+    counts users per window with ZCOUNT, so the cost of a scrape does not
+    depend on the size of the Redis keyspace.
+    """
+
+    def __init__(
+        self,
+        redis_client=None,
+        touch_interval: float = ACTIVE_USERS_TOUCH_INTERVAL,
+        max_tracked: int = 50000,
+    ):
+        self.redis = redis_client
+        self._recent = LRUTTLCache(max_entries=max_tracked, ttl_seconds=touch_interval)
+
+    def touch(self, user_id: str, now: Optional[float] = None) -> None:
+        """Mark a user as seen; cheap enough to call on every authentication."""
+        if self._recent.get(user_id):
+            return
+        self._recent.set(user_id, True)
+
+        now = time.time() if now is None else now
+        ttl = max(ACTIVE_USER_WINDOWS.values()) * 2
+        if analytics_pipeline.running:
+            analytics_pipeline.enqueue(
+                "zadd", ACTIVE_USERS_KEY, {user_id: now}, ttl=ttl
+            )
+            return
+        if self.redis is None:
+            return
+        try:
+            self.redis.zadd(ACTIVE_USERS_KEY, {user_id: now})
+            self.redis.expire(ACTIVE_USERS_KEY, ttl)
+        except Exception as e:
+            logging.error(f"❌ Active user tracking error: {e}")
+
+    def counts(self, redis_client=None, now: Optional[float] = None) -> Dict[str, int]:
+        """Active users per window; also trims entries older than the widest one."""
+        redis_client = redis_client or self.redis
+        now = time.time() if now is None else now
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.zremrangebyscore(
+            ACTIVE_USERS_KEY, "-inf", now - max(ACTIVE_USER_WINDOWS.values())
+        )
+        for seconds in ACTIVE_USER_WINDOWS.values():
+            pipe.zcount(ACTIVE_USERS_KEY, now - seconds, "+inf")
+        _, *window_counts = pipe.execute()
+        return dict(zip(ACTIVE_USER_WINDOWS, (int(c) for c in window_counts)))
+
+    def publish(self, redis_client=None) -> Dict[str, int]:
+        """Refresh the window gauges and return the counts."""
+        counts = self.counts(redis_client)
+        for window, count in counts.items():
+            ecolehub_active_users_window.labels(window=window).set(count)
+        return counts
+
+
+active_user_tracker = ActiveUserTracker()
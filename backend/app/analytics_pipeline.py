@@ -0,0 +1,135 @@
+"""
+EcoleHub Stage 4 - Analytics event pipeline
+Write-behind queue that batches analytics writes to Redis off the request path
+"""
+
+import asyncio
+import logging
+import os
+import queue
+import time
+from typing import Any, Optional, Tuple
+
+from prometheus_client import Counter, Gauge, Histogram
+
+ANALYTICS_QUEUE_MAX = int(os.getenv("ANALYTICS_QUEUE_MAX", "10000"))
+ANALYTICS_BATCH_SIZE = int(os.getenv("ANALYTICS_BATCH_SIZE", "500"))
+ANALYTICS_FLUSH_INTERVAL = float(os.getenv("ANALYTICS_FLUSH_INTERVAL", "1.0"))
+
+ecolehub_analytics_events_dropped = Counter(
+    "ecolehub_analytics_events_dropped_total",
+    "Analytics events dropped before reaching Redis",
+    ["reason"],
+)
+ecolehub_analytics_events_flushed = Counter(
+    "ecolehub_analytics_events_flushed_total", "Analytics events written to Redis"
+)
+ecolehub_analytics_queue_depth = Gauge(
+    "ecolehub_analytics_queue_depth", "Analytics events waiting to be flushed"
+)
+ecolehub_analytics_flush_duration = Histogram(
+    "ecolehub_analytics_flush_duration_seconds",
+    "Time to write one batch of analytics events to Redis",
+)
+
+# (redis command, key, args, ttl for the key or None)
+Command = Tuple[str, str, Tuple[Any, ...], Optional[int]]
+
+
+class AnalyticsPipeline:
+    """
+    Bounded in-process queue of Redis write commands.
+    Producers (sync handlers, middleware) never block: when the queue is full
+    the event is dropped and counted. A background task drains the queue and
+    sends each batch in one Redis pipeline round trip.
+    """
+
+    def __init__(
+        self,
+        redis_client=None,
+        max_queue: int = ANALYTICS_QUEUE_MAX,
+        batch_size: int = ANALYTICS_BATCH_SIZE,
+        flush_interval: float = ANALYTICS_FLUSH_INTERVAL,
+    ):
+        self.redis = redis_client
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Command]" = queue.Queue(maxsize=max_queue)
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def enqueue(self, command: str, key: str, *args, ttl: Optional[int] = None):
+        """Queue a Redis write; returns False if it had to be dropped."""
+        try:
+            self._queue.put_nowait((command, key, args, ttl))
+            return True
+        except queue.Full:
+            ecolehub_analytics_events_dropped.labels(reason="queue_full").inc()
+            return False
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def start(self) -> None:
+        """Start the flusher on the running event loop (app startup)."""
+        if not self.running:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flusher and write whatever is still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self.pending():
+            await asyncio.to_thread(self.flush_once)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            # Keep draining while full batches are waiting
+            while await asyncio.to_thread(self.flush_once) == self.batch_size:
+                pass
+
+    def flush_once(self) -> int:
+        """Write one batch to Redis; returns the number of events taken."""
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if not batch:
+            return 0
+
+        start = time.perf_counter()
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            ttls = {}
+            for command, key, args, ttl in batch:
+                getattr(pipe, command)(key, *args)
+                if ttl:
+                    ttls[key] = ttl
+            # One EXPIRE per key instead of one per event
+            for key, ttl in ttls.items():
+                pipe.expire(key, ttl)
+            pipe.execute()
+            ecolehub_analytics_events_flushed.inc(len(batch))
+        except Exception as e:
+            ecolehub_analytics_events_dropped.labels(reason="redis_error").inc(
+                len(batch)
+            )
+            logging.error(f"❌ Analytics flush error: {e}")
+        finally:
+            ecolehub_analytics_flush_duration.observe(time.perf_counter() - start)
+        return len(batch)
+
+
+analytics_pipeline = AnalyticsPipeline()
+ecolehub_analytics_queue_depth.set_function(analytics_pipeline.pending)
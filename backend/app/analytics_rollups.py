@@ -0,0 +1,272 @@
+"""
+EcoleHub Stage 4 - Analytics rollups
+Incrementally maintained daily fact tables behind the analytics endpoints
+"""
+
+import logging
+import os
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Callable, Dict, List, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from .db_types import utc_date
+from .models_stage1 import SELService, SELTransaction
+from .models_stage2 import Message
+from .models_stage3 import ShopInterest, ShopOrder, ShopProduct
+from .models_stage4 import (
+    AnalyticsRollupState,
+    MessageDailyStats,
+    SELDailyStats,
+    ShopInterestDailyStats,
+    ShopRevenueDailyStats,
+)
+
+# Rows committed slightly before the previous run started may only become
+# visible after it; re-scanning this margin keeps them from being missed.
+ROLLUP_LAG = timedelta(seconds=int(os.getenv("ANALYTICS_ROLLUP_LAG_SECONDS", "300")))
+
+REVENUE_STATUSES = ("paid", "delivered")
+NO_CATEGORY = "none"
+
+
+def _day(column):
+    # Same UTC day as _day_bounds, whatever the database session time zone
+    return utc_date(column)
+
+
+def _utc_date(value: datetime) -> date:
+    # Day buckets are UTC; SQLite hands back naive UTC timestamps
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.date()
+
+
+def _day_bounds(first_day: date, last_day: date) -> Tuple[datetime, datetime]:
+    start = datetime.combine(first_day, time.min, tzinfo=timezone.utc)
+    end = datetime.combine(last_day + timedelta(days=1), time.min, tzinfo=timezone.utc)
+    return start, end
+
+
+def _day_runs(days: List[date]) -> List[Tuple[date, date]]:
+    """Collapse days into (first, last) runs of consecutive days."""
+    runs: List[List[date]] = []
+    for day in sorted(days):
+        if runs and day - runs[-1][1] <= timedelta(days=1):
+            runs[-1][1] = day
+        else:
+            runs.append([day, day])
+    return [(first, last) for first, last in runs]
+
+
+def _sel_rows(db: Session, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+    category = func.coalesce(SELService.category, NO_CATEGORY)
+    day = _day(SELTransaction.created_at)
+    rows = db.execute(
+        select(
+            day.label("day"),
+            SELTransaction.status,
+            category.label("category"),
+            func.count(SELTransaction.id),
+            func.coalesce(func.sum(SELTransaction.units), 0),
+        )
+        .outerjoin(SELService, SELService.id == SELTransaction.service_id)
+        .where(SELTransaction.created_at >= start, SELTransaction.created_at < end)
+        .group_by(day, SELTransaction.status, category)
+    )
+    return [
+        {
+            "day": d,
+            "status": status or "pending",
+            "category": cat,
+            "transactions_count": count,
+            "units_total": units,
+        }
+        for d, status, cat, count, units in rows
+    ]
+
+
+def _shop_interest_rows(
+    db: Session, start: datetime, end: datetime
+) -> List[Dict[str, Any]]:
+    day = _day(ShopInterest.created_at)
+    rows = db.execute(
+        select(
+            day.label("day"),
+            ShopInterest.product_id,
+            ShopProduct.category,
+            func.count(ShopInterest.id),
+            func.coalesce(func.sum(ShopInterest.quantity), 0),
+        )
+        .join(ShopProduct, ShopProduct.id == ShopInterest.product_id)
+        .where(ShopInterest.created_at >= start, ShopInterest.created_at < end)
+        .group_by(day, ShopInterest.product_id, ShopProduct.category)
+    )
+    return [
+        {
+            "day": d,
+            "product_id": product_id,
+            "category": category,
+            "interests_count": count,
+            "quantity_total": quantity,
+        }
+        for d, product_id, category, count, quantity in rows
+    ]
+
+
+def _shop_revenue_rows(
+    db: Session, start: datetime, end: datetime
+) -> List[Dict[str, Any]]:
+    day = _day(ShopOrder.created_at)
+    rows = db.execute(
+        select(
+            day.label("day"),
+            func.count(ShopOrder.id),
+            func.coalesce(func.sum(ShopOrder.total_price), 0),
+        )
+        .where(
+            ShopOrder.created_at >= start,
+            ShopOrder.created_at < end,
+            ShopOrder.status.in_(REVENUE_STATUSES),
+        )
+        .group_by(day)
+    )
+    return [
+        {"day": d, "orders_count": count, "revenue": revenue}
+        for d, count, revenue in rows
+    ]
+
+
+def _message_rows(db: Session, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+    day = _day(Message.created_at)
+    rows = db.execute(
+        select(day.label("day"), func.count(Message.id))
+        .where(Message.created_at >= start, Message.created_at < end)
+        .group_by(day)
+    )
+    return [{"day": d, "messages_count": count} for d, count in rows]
+
+
+@dataclass(frozen=True)
+class Rollup:
+    """A daily fact table and how to rebuild a range of its days."""
+
+    name: str
+    model: Any
+    # When a source row was created (its day bucket) / last changed
+    created_column: Any
+    changed_column: Any
+    aggregate: Callable[[Session, datetime, datetime], List[Dict[str, Any]]]
+
+
+ROLLUPS = (
+    Rollup(
+        "sel_daily",
+        SELDailyStats,
+        SELTransaction.created_at,
+        func.coalesce(SELTransaction.updated_at, SELTransaction.created_at),
+        _sel_rows,
+    ),
+    Rollup(
+        "shop_interest_daily",
+        ShopInterestDailyStats,
+        ShopInterest.created_at,
+        func.coalesce(ShopInterest.updated_at, ShopInterest.created_at),
+        _shop_interest_rows,
+    ),
+    Rollup(
+        "shop_revenue_daily",
+        ShopRevenueDailyStats,
+        ShopOrder.created_at,
+        func.coalesce(ShopOrder.updated_at, ShopOrder.created_at),
+        _shop_revenue_rows,
+    ),
+    Rollup(
+        "messages_daily",
+        MessageDailyStats,
+        Message.created_at,
+        Message.created_at,
+        _message_rows,
+    ),
+)
+
+
+class AnalyticsRollups:
+    """
+    Maintains the daily rollup tables from per-rollup high-water marks.
+    Each run recomputes whole days touched since the previous run, so it is
+    idempotent and safe to repeat. Deleted source rows (e.g. cancelled shop
+    interests) are only reflected by a full rebuild, scheduled nightly.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def refresh(self, full: bool = False) -> Dict[str, int]:
+        """Bring every rollup up to date; returns the rows written per rollup."""
+        return {rollup.name: self._refresh(rollup, full) for rollup in ROLLUPS}
+
+    def ensure_initialized(self) -> None:
+        """Build rollups that have never run (first request after deploy)."""
+        built = set(self.db.scalars(select(AnalyticsRollupState.name)))
+        for rollup in ROLLUPS:
+            if rollup.name not in built:
+                self._refresh(rollup, full=True)
+
+    def _refresh(self, rollup: Rollup, full: bool) -> int:
+        run_started = datetime.now(timezone.utc)
+        state = self.db.scalars(
+            select(AnalyticsRollupState)
+            .where(AnalyticsRollupState.name == rollup.name)
+            .with_for_update()
+        ).first()
+
+        written = 0
+        if full or state is None:
+            self.db.query(rollup.model).delete(synchronize_session=False)
+            first_created, last_created = self.db.execute(
+                select(func.min(rollup.created_column), func.max(rollup.created_column))
+            ).one()
+            if first_created is not None:
+                written = self._rebuild_days(
+                    rollup, _utc_date(first_created), _utc_date(last_created)
+                )
+        else:
+            watermark = state.watermark
+            if watermark.tzinfo is None:
+                watermark = watermark.replace(tzinfo=timezone.utc)
+            touched_days = self.db.scalars(
+                select(_day(rollup.created_column))
+                .where(rollup.changed_column >= watermark - ROLLUP_LAG)
+                .distinct()
+            ).all()
+            for first_day, last_day in _day_runs(touched_days):
+                written += self._rebuild_days(rollup, first_day, last_day)
+
+        if state is None:
+            state = AnalyticsRollupState(name=rollup.name, watermark=run_started)
+            self.db.add(state)
+        state.watermark = run_started
+        self.db.commit()
+        return written
+
+    def _rebuild_days(self, rollup: Rollup, first_day: date, last_day: date) -> int:
+        self.db.query(rollup.model).filter(
+            rollup.model.day >= first_day, rollup.model.day <= last_day
+        ).delete(synchronize_session=False)
+        start, end = _day_bounds(first_day, last_day)
+        rows = rollup.aggregate(self.db, start, end)
+        if rows:
+            self.db.execute(rollup.model.__table__.insert(), rows)
+        logging.info(
+            f"📊 Rollup {rollup.name}: {len(rows)} rows for {first_day}..{last_day}"
+        )
+        return len(rows)
+
+
+def months_back(today: date, count: int) -> date:
+    """First day of the month `count - 1` months before today's month."""
+    month_index = today.year * 12 + today.month - 1 - (count - 1)
+    return date(month_index // 12, month_index % 12 + 1, 1)
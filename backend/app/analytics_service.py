@@ -5,18 +5,26 @@ Analytics and monitoring for Belgian school collaborative platform
 
 import json
 import logging
-from datetime import datetime, timedelta, timezone
-from typing import Any, Dict
+import os
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional, Tuple
 
 import redis
-from prometheus_client import Counter, Gauge, Histogram, generate_latest
-from sqlalchemy import and_, func
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from .active_users import active_user_tracker
+from .analytics_pipeline import analytics_pipeline
+from .analytics_rollups import AnalyticsRollups, months_back
+from .caching import SnapshotCache
+
 # Import models
-from .models_stage1 import SELService, SELTransaction, User
+from .models_stage1 import SELBalance, SELService, SELTransaction, User
 from .models_stage2 import Event, EventParticipant, Message
 from .models_stage3 import ShopInterest, ShopOrder, ShopProduct
+from .models_stage4 import SELDailyStats, ShopInterestDailyStats, ShopRevenueDailyStats
 
 # Prometheus metrics for EcoleHub
 ecolehub_user_logins = Counter(
@@ -50,6 +58,69 @@ ecolehub_request_duration = Histogram(
     ["method", "endpoint", "status"],
 )
 
+USER_ACTIONS_TTL_SECONDS = 86400 * 30  # Keep for 30 days
+
+# Admin dashboard snapshot: fresh for TTL, then served stale while it is
+# recomputed in the background for up to STALE more seconds.
+ANALYTICS_OVERVIEW_TTL_SECONDS = float(
+    os.getenv("ANALYTICS_OVERVIEW_TTL_SECONDS", "60")
+)
+ANALYTICS_OVERVIEW_STALE_SECONDS = float(
+    os.getenv("ANALYTICS_OVERVIEW_STALE_SECONDS", "300")
+)
+PLATFORM_OVERVIEW_KEY = "platform_overview"
+
+platform_overview_cache = SnapshotCache(
+    ttl_seconds=ANALYTICS_OVERVIEW_TTL_SECONDS,
+    stale_seconds=ANALYTICS_OVERVIEW_STALE_SECONDS,
+    cacheable=lambda overview: "error" not in overview,
+)
+
+
+def _user_action_entry(
+    user_id: str, action: str, details: Dict[str, Any] = None
+) -> Tuple[str, str]:
+    """Return the Redis list key and JSON payload for a tracked user action."""
+    now = datetime.now(timezone.utc)
+    event = {
+        "user_id": user_id,
+        "action": action,
+        "details": details or {},
+        "timestamp": now.isoformat(),
+        "platform": "ecolehub",
+    }
+    return f"analytics:user_actions:{now.date()}", json.dumps(event)
+
+
+def _record_action_metrics(action: str, details: Dict[str, Any] = None):
+    """Update Prometheus metrics for a tracked user action."""
+    details = details or {}
+    if action == "login":
+        ecolehub_user_logins.labels(user_type="parent").inc()
+    elif action == "sel_transaction":
+        ecolehub_sel_transactions.labels(status=details.get("status", "unknown")).inc()
+    elif action == "shop_interest":
+        ecolehub_shop_interests.labels(
+            product_category=details.get("category", "unknown")
+        ).inc()
+    elif action == "message_sent":
+        ecolehub_messages_sent.labels(
+            conversation_type=details.get("type", "unknown")
+        ).inc()
+
+
+def enqueue_user_action(
+    user_id: str, action: str, details: Dict[str, Any] = None
+) -> bool:
+    """Queue a user action for the background Redis flusher (never blocks)."""
+    key, payload = _user_action_entry(user_id, action, details)
+    queued = analytics_pipeline.enqueue(
+        "lpush", key, payload, ttl=USER_ACTIONS_TTL_SECONDS
+    )
+    if queued:
+        _record_action_metrics(action, details)
+    return queued
+
 
 class EcoleHubAnalytics:
     """
@@ -64,50 +135,54 @@ class EcoleHubAnalytics:
     def get_platform_overview(self) -> Dict[str, Any]:
         """Get overall platform statistics for EcoleHub."""
         try:
-            # User metrics
-            total_users = self.db.query(func.count(User.id)).scalar()
-            active_users_week = (
-                self.db.query(func.count(User.id))
-                .filter(
-                    User.created_at >= datetime.now(timezone.utc) - timedelta(days=7)
-                )
-                .scalar()
-            )
-
-            # SEL system metrics
-            total_services = self.db.query(func.count(SELService.id)).scalar()
-            total_sel_transactions = self.db.query(
-                func.count(SELTransaction.id)
-            ).scalar()
-            avg_sel_balance = (
-                self.db.query(func.avg(SELTransaction.units)).scalar() or 0
-            )
-
-            # Shop metrics
-            total_products = self.db.query(func.count(ShopProduct.id)).scalar()
-            total_interests = self.db.query(func.count(ShopInterest.id)).scalar()
-            total_orders = self.db.query(func.count(ShopOrder.id)).scalar()
-
-            # Message metrics
-            total_messages = self.db.query(func.count(Message.id)).scalar()
-            messages_today = (
-                self.db.query(func.count(Message.id))
-                .filter(Message.created_at >= datetime.now(timezone.utc).date())
-                .scalar()
-            )
-
-            # Event metrics
-            total_events = self.db.query(func.count(Event.id)).scalar()
-            upcoming_events = (
-                self.db.query(func.count(Event.id))
-                .filter(
-                    and_(
-                        Event.start_date >= datetime.now(timezone.utc),
-                        Event.is_active is True,
-                    )
+            now = datetime.now(timezone.utc)
+
+            def count(column, *criteria):
+                return select(func.count(column)).where(*criteria).scalar_subquery()
+
+            # One round trip: every figure is a scalar subquery of one SELECT
+            overview = self.db.execute(
+                select(
+                    # User metrics
+                    count(User.id).label("total_users"),
+                    count(User.id, User.created_at >= now - timedelta(days=7)).label(
+                        "active_users_week"
+                    ),
+                    # SEL system metrics
+                    count(SELService.id).label("total_services"),
+                    count(SELTransaction.id).label("total_sel_transactions"),
+                    select(func.avg(SELTransaction.units))
+                    .scalar_subquery()
+                    .label("avg_sel_balance"),
+                    # Shop metrics
+                    count(ShopProduct.id).label("total_products"),
+                    count(ShopInterest.id).label("total_interests"),
+                    count(ShopOrder.id).label("total_orders"),
+                    # Message metrics
+                    count(Message.id).label("total_messages"),
+                    count(Message.id, Message.created_at >= now.date()).label(
+                        "messages_today"
+                    ),
+                    # Event metrics
+                    count(Event.id).label("total_events"),
+                    count(Event.id, Event.start_date >= now, Event.is_active).label(
+                        "upcoming_events"
+                    ),
                 )
-                .scalar()
-            )
+            ).one()
+
+            total_users = overview.total_users
+            active_users_week = overview.active_users_week
+            total_services = overview.total_services
+            total_sel_transactions = overview.total_sel_transactions
+            avg_sel_balance = overview.avg_sel_balance or 0
+            total_products = overview.total_products
+            total_interests = overview.total_interests
+            total_orders = overview.total_orders
+            total_messages = overview.total_messages
+            messages_today = overview.messages_today
+            total_events = overview.total_events
+            upcoming_events = overview.upcoming_events
 
             return {
                 "users": {
@@ -139,13 +214,24 @@ class EcoleHubAnalytics:
                     "total_events": total_events,
                     "upcoming_events": upcoming_events,
                 },
-                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "timestamp": now.isoformat(),
             }
 
         except Exception as e:
             logging.error(f"❌ Analytics error: {e}")
             return {"error": str(e)}
 
+    def get_platform_overview_snapshot(
+        self, refresh: Optional[Callable[[], Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Platform overview from the shared snapshot cache. `refresh` recomputes
+        it in the background with its own session once the snapshot is stale.
+        """
+        return platform_overview_cache.get(
+            PLATFORM_OVERVIEW_KEY, self.get_platform_overview, refresh
+        )
+
     def get_user_analytics(self, user_id: str) -> Dict[str, Any]:
         """Get analytics for specific user (parent)."""
         try:
@@ -228,37 +314,42 @@ class EcoleHubAnalytics:
     def get_shop_analytics(self) -> Dict[str, Any]:
         """Analytics specific to collaborative shopping system."""
         try:
+            # Served from the daily rollups: cost follows the number of
+            # products and days, not the number of interests ever expressed
+            AnalyticsRollups(self.db).ensure_initialized()
+            interests = func.sum(ShopInterestDailyStats.interests_count)
+
             # Product popularity
             popular_products = (
-                self.db.query(
-                    ShopProduct.name,
-                    func.count(ShopInterest.id).label("interest_count"),
-                )
-                .join(ShopInterest)
+                self.db.query(ShopProduct.name, interests.label("interest_count"))
+                .join(ShopProduct, ShopProduct.id == ShopInterestDailyStats.product_id)
                 .group_by(ShopProduct.id, ShopProduct.name)
-                .order_by(func.count(ShopInterest.id).desc())
+                .order_by(interests.desc())
                 .limit(5)
                 .all()
             )
 
-            # Category performance
+            # Category performance (average price weighted by interests)
             category_stats = (
                 self.db.query(
-                    ShopProduct.category,
-                    func.count(ShopInterest.id).label("interests"),
-                    func.avg(ShopProduct.base_price).label("avg_price"),
+                    ShopInterestDailyStats.category,
+                    interests.label("interests"),
+                    (
+                        func.sum(
+                            ShopInterestDailyStats.interests_count
+                            * ShopProduct.base_price
+                        )
+                        / interests
+                    ).label("avg_price"),
                 )
-                .join(ShopInterest)
-                .group_by(ShopProduct.category)
+                .join(ShopProduct, ShopProduct.id == ShopInterestDailyStats.product_id)
+                .group_by(ShopInterestDailyStats.category)
                 .all()
             )
 
             # Order success metrics
             total_revenue = (
-                self.db.query(func.sum(ShopOrder.total_price))
-                .filter(ShopOrder.status.in_(["paid", "delivered"]))
-                .scalar()
-                or 0
+                self.db.query(func.sum(ShopRevenueDailyStats.revenue)).scalar() or 0
             )
 
             return {
@@ -285,14 +376,17 @@ class EcoleHubAnalytics:
     def get_sel_analytics(self) -> Dict[str, Any]:
         """Analytics for SEL (Local Exchange System)."""
         try:
+            AnalyticsRollups(self.db).ensure_initialized()
+            transactions = func.sum(SELDailyStats.transactions_count)
+
             # Transaction volume by status
             transaction_stats = (
                 self.db.query(
-                    SELTransaction.status,
-                    func.count(SELTransaction.id).label("count"),
-                    func.avg(SELTransaction.units).label("avg_units"),
+                    SELDailyStats.status,
+                    transactions.label("count"),
+                    func.sum(SELDailyStats.units_total).label("units"),
                 )
-                .group_by(SELTransaction.status)
+                .group_by(SELDailyStats.status)
                 .all()
             )
 
@@ -307,24 +401,27 @@ class EcoleHubAnalytics:
                 .all()
             )
 
-            # Monthly trends
-            monthly_transactions = (
-                self.db.query(
-                    func.date_trunc("month", SELTransaction.created_at).label("month"),
-                    func.count(SELTransaction.id).label("count"),
+            # Monthly trends over the last 12 months
+            daily_transactions = (
+                self.db.query(SELDailyStats.day, transactions.label("count"))
+                .filter(
+                    SELDailyStats.day
+                    >= months_back(datetime.now(timezone.utc).date(), 12)
                 )
-                .group_by(func.date_trunc("month", SELTransaction.created_at))
-                .order_by("month")
-                .limit(12)
+                .group_by(SELDailyStats.day)
                 .all()
             )
+            monthly_transactions: Dict[date, int] = {}
+            for day, count in daily_transactions:
+                month = day.replace(day=1)
+                monthly_transactions[month] = monthly_transactions.get(month, 0) + count
 
             return {
                 "transaction_status": [
                     {
                         "status": stat.status,
                         "count": stat.count,
-                        "average_units": round(float(stat.avg_units), 1),
+                        "average_units": round(stat.units / stat.count, 1),
                     }
                     for stat in transaction_stats
                 ],
@@ -333,8 +430,8 @@ class EcoleHubAnalytics:
                     for cat in service_categories
                 ],
                 "monthly_trends": [
-                    {"month": trend.month.isoformat(), "transactions": trend.count}
-                    for trend in monthly_transactions
+                    {"month": month.isoformat(), "transactions": count}
+                    for month, count in sorted(monthly_transactions.items())
                 ],
                 "timestamp": datetime.now(timezone.utc).isoformat(),
             }
@@ -348,56 +445,108 @@ class EcoleHubAnalytics:
     ):
         """Track user action for analytics (stored in Redis)."""
         try:
-            event = {
-                "user_id": user_id,
-                "action": action,
-                "details": details or {},
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-                "platform": "ecolehub",
-            }
+            if analytics_pipeline.running:
+                enqueue_user_action(user_id, action, details)
+                return
+
+            key, payload = _user_action_entry(user_id, action, details)
 
             # Store in Redis for real-time analytics
-            key = f"analytics:user_actions:{datetime.now(timezone.utc).date()}"
-            self.redis.lpush(key, json.dumps(event))
-            self.redis.expire(key, 86400 * 30)  # Keep for 30 days
-
-            # Update Prometheus metrics
-            if action == "login":
-                ecolehub_user_logins.labels(user_type="parent").inc()
-            elif action == "sel_transaction":
-                ecolehub_sel_transactions.labels(
-                    status=details.get("status", "unknown")
-                ).inc()
-            elif action == "shop_interest":
-                ecolehub_shop_interests.labels(
-                    product_category=details.get("category", "unknown")
-                ).inc()
-            elif action == "message_sent":
-                ecolehub_messages_sent.labels(
-                    conversation_type=details.get("type", "unknown")
-                ).inc()
+            self.redis.lpush(key, payload)
+            self.redis.expire(key, USER_ACTIONS_TTL_SECONDS)
+
+            _record_action_metrics(action, details)
 
         except Exception as e:
             logging.error(f"❌ Action tracking error: {e}")
 
-    def get_prometheus_metrics(self) -> str:
-        """Get Prometheus metrics for EcoleHub."""
+    def refresh_business_metrics(self) -> bool:
+        """
+        Recompute the business gauges (run by the background collector).
+        Returns False when any of them could not be refreshed.
+        """
+        # Database and Redis figures are refreshed independently so one
+        # backend being down does not freeze the other's gauges
+        refreshed = True
         try:
-            # Update gauges with current values
-            total_users = self.db.query(func.count(User.id)).scalar()
+            total_users, avg_balance = self.db.execute(
+                select(
+                    select(func.count(User.id)).scalar_subquery(),
+                    select(func.avg(SELBalance.balance)).scalar_subquery(),
+                )
+            ).one()
             ecolehub_total_families.set(total_users)
             users_total_gauge.set(total_users)
+            ecolehub_sel_balance_avg.set(avg_balance or 0)
+        except Exception as e:
+            logging.error(f"❌ Business metrics error: {e}")
+            refreshed = False
+
+        try:
+            # Active users (seen in the last hour)
+            active_counts = active_user_tracker.publish(self.redis)
+            ecolehub_active_users.set(active_counts["1h"])
+        except Exception as e:
+            logging.error(f"❌ Active users metrics error: {e}")
+            refreshed = False
+
+        return refreshed
 
-            # Active users (logged in last hour)
-            active_count = len(self.redis.keys("session:*"))
-            ecolehub_active_users.set(active_count)
 
-            # Generate Prometheus metrics
-            return generate_latest()
+class AsyncEcoleHubAnalytics:
+    """
+    Async variant of EcoleHubAnalytics for the opt-in async stack.
+    Reports run through AsyncSession.run_sync; Redis goes through redis.asyncio.
+    """
+
+    def __init__(self, db: AsyncSession, redis_client):
+        self.db = db
+        self.redis = redis_client
+
+    async def _run(self, method: str, *args):
+        # Report methods only touch the database, never self.redis
+        return await self.db.run_sync(
+            lambda session: getattr(EcoleHubAnalytics(session, None), method)(*args)
+        )
+
+    async def get_platform_overview(self) -> Dict[str, Any]:
+        return await self._run("get_platform_overview")
+
+    async def get_platform_overview_snapshot(
+        self, refresh: Callable[[], Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        overview = platform_overview_cache.lookup(PLATFORM_OVERVIEW_KEY, refresh)
+        if overview is None:
+            generation = platform_overview_cache.generation
+            overview = platform_overview_cache.put(
+                PLATFORM_OVERVIEW_KEY, await self.get_platform_overview(), generation
+            )
+        return overview
+
+    async def get_user_analytics(self, user_id: str) -> Dict[str, Any]:
+        return await self._run("get_user_analytics", user_id)
+
+    async def get_shop_analytics(self) -> Dict[str, Any]:
+        return await self._run("get_shop_analytics")
+
+    async def get_sel_analytics(self) -> Dict[str, Any]:
+        return await self._run("get_sel_analytics")
+
+    async def track_user_action(
+        self, user_id: str, action: str, details: Dict[str, Any] = None
+    ):
+        """Track user action for analytics (stored in Redis)."""
+        try:
+            key, payload = _user_action_entry(user_id, action, details)
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.lpush(key, payload)
+                pipe.expire(key, USER_ACTIONS_TTL_SECONDS)
+                await pipe.execute()
+
+            _record_action_metrics(action, details)
 
         except Exception as e:
-            logging.error(f"❌ Prometheus metrics error: {e}")
-            return f"# Error generating metrics: {e}\n"
+            logging.error(f"❌ Action tracking error: {e}")
 
 
 def get_analytics_service(db: Session, redis_client: redis.Redis) -> EcoleHubAnalytics:
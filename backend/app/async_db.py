@@ -0,0 +1,48 @@
+"""
+EcoleHub Stage 4 - Async database and Redis access
+Opt-in asyncio stack (ECOLEHUB_ASYNC_MODE=1) so hot endpoints do not pin
+a threadpool worker while waiting on PostgreSQL or Redis
+"""
+
+import os
+
+import redis.asyncio as aioredis
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from .database import InstrumentedAsyncQueuePool, instrument_engine, pool_options
+
+ASYNC_MODE = os.getenv("ECOLEHUB_ASYNC_MODE", "0") == "1"
+
+_ASYNC_DRIVERS = {
+    "postgresql://": "postgresql+asyncpg://",
+    "postgresql+psycopg2://": "postgresql+asyncpg://",
+    "sqlite://": "sqlite+aiosqlite://",
+}
+
+
+def to_async_url(database_url: str) -> str:
+    """Map a sync DATABASE_URL onto its asyncio driver."""
+    for prefix, async_prefix in _ASYNC_DRIVERS.items():
+        if database_url.startswith(prefix):
+            return async_prefix + database_url[len(prefix) :]
+    return database_url
+
+
+def create_async_db_engine(database_url: str, pool_name: str = "async"):
+    async_url = to_async_url(database_url)
+    async_engine = create_async_engine(
+        async_url, **pool_options(async_url, InstrumentedAsyncQueuePool)
+    )
+    return instrument_engine(async_engine, pool_name)
+
+
+def create_async_session_factory(async_engine) -> async_sessionmaker:
+    # expire_on_commit=False: responses are serialized after the commit,
+    # and an expired attribute cannot be lazy-loaded outside the greenlet.
+    return async_sessionmaker(
+        async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+
+
+def create_async_redis(redis_url: str) -> aioredis.Redis:
+    return aioredis.Redis.from_url(redis_url, decode_responses=True)
@@ -0,0 +1,299 @@
+"""
+EcoleHub Stage 4 - Authentication principal cache
+Skips the users lookup for recently authenticated bearer tokens. With the
+Redis tier, invalidations are broadcast so every replica drops its local
+copy; if the broadcast is missed, a replica serves the old principal for at
+most AUTH_CACHE_TTL_SECONDS.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from prometheus_client import Counter, Gauge
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
+
+from .caching import LRUTTLCache
+from .models_stage1 import User
+
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "30"))
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "4096"))
+# Optional second tier shared by every backend replica
+AUTH_CACHE_REDIS = os.getenv("AUTH_CACHE_REDIS", "0") == "1"
+
+REDIS_KEY_PREFIX = "auth:principal:"
+REDIS_SUBJECT_PREFIX = "auth:subject:"
+REDIS_INVALIDATED_PREFIX = "auth:invalidated:"
+REDIS_INVALIDATION_CHANNEL = "auth:invalidations"
+
+ecolehub_auth_cache_lookups = Counter(
+    "ecolehub_auth_cache_lookups_total",
+    "Authentication principal cache lookups",
+    ["result"],
+)
+ecolehub_auth_cache_hit_ratio = Gauge(
+    "ecolehub_auth_cache_hit_ratio", "Authentication principal cache hit ratio"
+)
+
+# Only what authorization and the profile endpoints read: hashed_password and
+# the consent metadata are never cached. Other columns are left expired and
+# load on first access; async handlers cannot lazy-load, so every column they
+# read on current_user must be listed here.
+_USER_COLUMNS = [
+    "id",
+    "email",
+    "first_name",
+    "last_name",
+    "role",
+    "is_active",
+    "is_verified",
+    "created_at",
+    "deleted_at",
+]
+
+
+def _token_key(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    if isinstance(value, UUID):
+        return {"$uuid": str(value)}
+    return value
+
+
+def _decode(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "$dt" in value:
+            return datetime.fromisoformat(value["$dt"])
+        if "$uuid" in value:
+            return UUID(value["$uuid"])
+    return value
+
+
+class PrincipalCache:
+    """
+    Caches a column snapshot of the authenticated user per bearer token.
+    A hit is re-attached to the request session without querying, so handlers
+    can still modify and commit `current_user` as before.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = AUTH_CACHE_TTL_SECONDS,
+        max_entries: int = AUTH_CACHE_MAX_ENTRIES,
+        redis_client=None,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.redis = redis_client
+        self._local = LRUTTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        # Subjects invalidated within the last TTL, see put()
+        self._invalidated = LRUTTLCache(
+            max_entries=max_entries, ttl_seconds=ttl_seconds
+        )
+        self.hits = 0
+        self.misses = 0
+        self._listener = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def get_user(self, token: str, db: Session) -> Optional[User]:
+        """Return the cached user attached to `db`, or None on a miss."""
+        if not self.enabled:
+            return None
+
+        key = _token_key(token)
+        snapshot = self._local.get(key)
+        result = "hit_local"
+        if snapshot is None:
+            snapshot = self._get_from_redis(key)
+            result = "hit_redis"
+        if snapshot is None or snapshot["token_exp"] <= time.time():
+            self._record("miss")
+            return None
+
+        self._record(result)
+        user = User(**snapshot["columns"])
+        make_transient_to_detached(user)
+        return db.merge(user, load=False)
+
+    def put(self, token: str, user: User, token_exp: Optional[float]) -> None:
+        """
+        Cache the user for this token, never beyond the token expiry.
+        Subjects invalidated within the last TTL are not cached: the row may
+        have been read before the change was committed.
+        """
+        if not self.enabled or self._recently_invalidated(user.email):
+            return
+
+        token_exp = float(token_exp) if token_exp else time.time() + self.ttl_seconds
+        ttl = min(self.ttl_seconds, token_exp - time.time())
+        if ttl <= 0:
+            return
+
+        snapshot = {
+            "email": user.email,
+            "token_exp": token_exp,
+            "columns": {column: getattr(user, column) for column in _USER_COLUMNS},
+        }
+        key = _token_key(token)
+        self._local.set(key, snapshot, ttl)
+        self._put_in_redis(key, snapshot, ttl)
+
+    def invalidate_subject(self, email: str) -> None:
+        """Forget every cached token of a user (deactivation, deletion, consent)."""
+        self._drop_local(email)
+        if self.redis is None:
+            return
+        try:
+            # Other replicas drop their local entries too
+            self.redis.publish(REDIS_INVALIDATION_CHANNEL, email)
+            self.redis.setex(
+                f"{REDIS_INVALIDATED_PREFIX}{email}", max(int(self.ttl_seconds), 1), 1
+            )
+            subject_key = f"{REDIS_SUBJECT_PREFIX}{email}"
+            token_keys = self.redis.smembers(subject_key)
+            if token_keys:
+                self.redis.delete(*[f"{REDIS_KEY_PREFIX}{k}" for k in token_keys])
+            self.redis.delete(subject_key)
+        except Exception as e:
+            logging.error(f"❌ Auth cache invalidation error: {e}")
+
+    def start_listener(self) -> None:
+        """Apply invalidations broadcast by other replicas (app startup)."""
+        if self.redis is None or self._listener is not None:
+            return
+        pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{REDIS_INVALIDATION_CHANNEL: self._on_invalidation})
+        self._listener = pubsub.run_in_thread(
+            sleep_time=1.0, daemon=True, exception_handler=_log_listener_error
+        )
+
+    def stop_listener(self) -> None:
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+    def clear(self) -> None:
+        self._local.clear()
+        self._invalidated.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "entries": len(self._local),
+        }
+
+    def _record(self, result: str) -> None:
+        if result == "miss":
+            self.misses += 1
+        else:
+            self.hits += 1
+        ecolehub_auth_cache_lookups.labels(result=result).inc()
+
+    def _on_invalidation(self, message: Dict[str, Any]) -> None:
+        email = message["data"]
+        if isinstance(email, bytes):
+            email = email.decode("utf-8")
+        self._drop_local(email)
+
+    def _drop_local(self, email: str) -> None:
+        self._local.delete_where(lambda snapshot: snapshot["email"] == email)
+        self._invalidated.set(email, True)
+
+    def _recently_invalidated(self, email: str) -> bool:
+        if self._invalidated.get(email) is not None:
+            return True
+        if self.redis is None:
+            return False
+        try:
+            return bool(self.redis.exists(f"{REDIS_INVALIDATED_PREFIX}{email}"))
+        except Exception as e:
+            logging.error(f"❌ Auth cache Redis read error: {e}")
+            return True
+
+    def _get_from_redis(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.redis is None:
+            return None
+        try:
+            raw = self.redis.get(f"{REDIS_KEY_PREFIX}{key}")
+        except Exception as e:
+            logging.error(f"❌ Auth cache Redis read error: {e}")
+            return None
+        if not raw:
+            return None
+        snapshot = json.loads(raw)
+        snapshot["columns"] = {k: _decode(v) for k, v in snapshot["columns"].items()}
+        remaining = snapshot["token_exp"] - time.time()
+        self._local.set(key, snapshot, min(self.ttl_seconds, remaining))
+        return snapshot
+
+    def _put_in_redis(self, key: str, snapshot: Dict[str, Any], ttl: float) -> None:
+        if self.redis is None:
+            return
+        payload = {
+            **snapshot,
+            "columns": {k: _encode(v) for k, v in snapshot["columns"].items()},
+        }
+        try:
+            pipe = self.redis.pipeline()
+            pipe.setex(
+                f"{REDIS_KEY_PREFIX}{key}", max(int(ttl), 1), json.dumps(payload)
+            )
+            subject_key = f"{REDIS_SUBJECT_PREFIX}{snapshot['email']}"
+            pipe.sadd(subject_key, key)
+            pipe.expire(subject_key, max(int(self.ttl_seconds), 1))
+            pipe.execute()
+        except Exception as e:
+            logging.error(f"❌ Auth cache Redis write error: {e}")
+
+
+def _log_listener_error(error, pubsub, thread) -> None:
+    # redis-py resubscribes on the next read; entries still expire by TTL
+    logging.error(f"❌ Auth cache invalidation listener error: {error}")
+    time.sleep(1)
+
+
+principal_cache = PrincipalCache()
+ecolehub_auth_cache_hit_ratio.set_function(lambda: principal_cache.stats()["hit_ratio"])
+
+
+# Invalidate cached principals once user changes are committed. A concurrent
+# request that read the row before the commit may call put() afterwards; the
+# subject stays uncacheable for one TTL after the invalidation so that row is
+# not cached again (a put delayed by more than a TTL could still be).
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _mark_user_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is None:
+        return
+    emails = {target.email}
+    # Tokens carry the e-mail as subject, so an address change must also
+    # drop the entries cached under the previous one.
+    emails.update(inspect(target).attrs.email.history.deleted or ())
+    session.info.setdefault("auth_cache_invalidate", set()).update(emails)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session):
+    for email in session.info.pop("auth_cache_invalidate", ()):
+        principal_cache.invalidate_subject(email)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_users(session):
+    session.info.pop("auth_cache_invalidate", None)
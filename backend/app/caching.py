@@ -0,0 +1,163 @@
+"""
+EcoleHub - In-process caches
+Small thread-safe caches for hot read paths (auth, dashboards, analytics)
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Set, Tuple
+
+
+class LRUTTLCache:
+    """
+    Size-bounded LRU cache whose entries also expire after a TTL.
+    Safe to share between the threadpool workers serving sync endpoints.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        """Store a value, evicting the least recently used entry when full."""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_where(self, predicate: Callable[[Any], bool]) -> int:
+        """Delete every entry whose value matches the predicate."""
+        with self._lock:
+            keys = [
+                key for key, (_, value) in self._entries.items() if predicate(value)
+            ]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SnapshotCache:
+    """
+    Keyed snapshots with a freshness TTL and a stale-while-revalidate window.
+    Fresh snapshots are served as is; stale ones are served while a single
+    background thread recomputes them; anything older is loaded inline.
+    invalidate() bumps a generation: values computed before it are dropped
+    on put, so a load that raced the invalidation cannot store old data.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 60.0,
+        stale_seconds: float = 300.0,
+        cacheable: Optional[Callable[[Any], bool]] = None,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.cacheable = cacheable or (lambda value: True)
+        self._snapshots: Dict[Hashable, Tuple[float, Any]] = {}
+        self._refreshing: Set[Hashable] = set()
+        self._lock = threading.Lock()
+        self.generation = 0
+
+    def get(
+        self,
+        key: Hashable,
+        load: Callable[[], Any],
+        refresh: Optional[Callable[[], Any]] = None,
+    ) -> Any:
+        """
+        Return the snapshot for key. `load` runs inline on a miss; `refresh`
+        (default: `load`) runs in the background and must not depend on
+        request-scoped resources such as the request's DB session.
+        """
+        value = self.lookup(key, refresh or load)
+        if value is None:
+            generation = self.generation
+            value = self.put(key, load(), generation)
+        return value
+
+    def lookup(self, key: Hashable, refresh: Callable[[], Any]) -> Optional[Any]:
+        """Return a fresh or stale snapshot (revalidating the latter), else None."""
+        if self.ttl_seconds <= 0:
+            return None
+        with self._lock:
+            snapshot = self._snapshots.get(key)
+        if snapshot is None:
+            return None
+        loaded_at, value = snapshot
+        age = time.monotonic() - loaded_at
+        if age < self.ttl_seconds:
+            return value
+        if age < self.ttl_seconds + self.stale_seconds:
+            self._revalidate(key, refresh)
+            return value
+        return None
+
+    def put(self, key: Hashable, value: Any, generation: Optional[int] = None) -> Any:
+        """
+        Store value unless the cache was invalidated since `generation` (read
+        from self.generation before computing it). Returns value either way.
+        """
+        if self.ttl_seconds > 0 and self.cacheable(value):
+            with self._lock:
+                if generation is None or generation == self.generation:
+                    self._snapshots[key] = (time.monotonic(), value)
+        return value
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        with self._lock:
+            self.generation += 1
+            if key is None:
+                self._snapshots.clear()
+            else:
+                self._snapshots.pop(key, None)
+
+    def _revalidate(self, key: Hashable, refresh: Callable[[], Any]) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+            generation = self.generation
+
+        def run():
+            try:
+                self.put(key, refresh(), generation)
+            except Exception as e:
+                logging.error(f"❌ Snapshot refresh error for {key}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=run, name=f"snapshot-{key}", daemon=True).start()
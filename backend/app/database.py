@@ -0,0 +1,130 @@
+"""
+EcoleHub - Database engine factory
+Pool sizing from configuration plus Prometheus telemetry on every pool
+"""
+
+import os
+import time
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import create_engine
+from sqlalchemy import exc as sa_exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Recycle before PostgreSQL / PgBouncer idle timeouts close the socket
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+
+ecolehub_db_pool_capacity = Gauge(
+    "ecolehub_db_pool_capacity",
+    "Maximum connections a pool may open (pool_size + max_overflow)",
+    ["pool"],
+)
+ecolehub_db_pool_checked_out = Gauge(
+    "ecolehub_db_pool_checked_out", "Connections currently checked out", ["pool"]
+)
+ecolehub_db_pool_idle = Gauge(
+    "ecolehub_db_pool_idle", "Idle connections kept in the pool", ["pool"]
+)
+ecolehub_db_pool_overflow = Gauge(
+    "ecolehub_db_pool_overflow", "Connections open beyond pool_size", ["pool"]
+)
+ecolehub_db_pool_checkout_wait = Histogram(
+    "ecolehub_db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    ["pool"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+ecolehub_db_pool_checkout_timeouts = Counter(
+    "ecolehub_db_pool_checkout_timeouts_total",
+    "Checkouts that gave up after pool_timeout",
+    ["pool"],
+)
+
+
+class _PoolTelemetry:
+    """Times connection checkouts; mixed into the QueuePool variants."""
+
+    metrics_name = "default"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except sa_exc.TimeoutError:
+            ecolehub_db_pool_checkout_timeouts.labels(pool=self.metrics_name).inc()
+            raise
+        finally:
+            ecolehub_db_pool_checkout_wait.labels(pool=self.metrics_name).observe(
+                time.perf_counter() - start
+            )
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep reporting under the same name
+        pool = super().recreate()
+        pool.metrics_name = self.metrics_name
+        _register_pool_gauges(pool)
+        return pool
+
+
+class InstrumentedQueuePool(_PoolTelemetry, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_PoolTelemetry, AsyncAdaptedQueuePool):
+    pass
+
+
+def _register_pool_gauges(pool: QueuePool) -> None:
+    name = pool.metrics_name
+    ecolehub_db_pool_capacity.labels(pool=name).set(
+        pool.size() + max(pool._max_overflow, 0)
+    )
+    ecolehub_db_pool_checked_out.labels(pool=name).set_function(pool.checkedout)
+    ecolehub_db_pool_idle.labels(pool=name).set_function(pool.checkedin)
+    ecolehub_db_pool_overflow.labels(pool=name).set_function(
+        lambda: max(pool.overflow(), 0)
+    )
+
+
+def _is_memory_sqlite(database_url: str) -> bool:
+    return database_url.startswith("sqlite") and (
+        ":memory:" in database_url or database_url.split("://", 1)[1] in ("", "/")
+    )
+
+
+def pool_options(database_url: str, pool_class=InstrumentedQueuePool) -> dict:
+    """Engine keyword arguments for the configured, instrumented pool."""
+    options = {}
+    if database_url.startswith("sqlite"):
+        options["connect_args"] = {"check_same_thread": False}
+        if _is_memory_sqlite(database_url):
+            # One in-memory database per connection: keep SQLAlchemy's default pool
+            return options
+    options.update(
+        poolclass=pool_class,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+    return options
+
+
+def instrument_engine(engine, pool_name: str):
+    """Label the engine's pool and publish its gauges."""
+    pool = getattr(engine, "sync_engine", engine).pool
+    if isinstance(pool, _PoolTelemetry):
+        pool.metrics_name = pool_name
+        _register_pool_gauges(pool)
+    return engine
+
+
+def create_db_engine(database_url: str, pool_name: str = "default"):
+    """Create the sync engine used by the API stages and the workers."""
+    engine = create_engine(database_url, **pool_options(database_url))
+    return instrument_engine(engine, pool_name)
@@ -1,6 +1,8 @@
 import uuid
 
-from sqlalchemy.types import CHAR, TypeDecorator
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.types import CHAR, Date, TypeDecorator
 
 
 class UUIDType(TypeDecorator):
@@ -35,3 +37,37 @@ class UUIDType(TypeDecorator):
         if isinstance(value, uuid.UUID):
             return value
         return uuid.UUID(str(value))
+
+
+class utc_date(FunctionElement):
+    """
+    Calendar day of a timestamp in UTC.
+    PostgreSQL's date() of a timestamptz follows the session TimeZone, so the
+    value is converted to UTC first; SQLite stores naive UTC already.
+    """
+
+    type = Date()
+    name = "utc_date"
+    inherit_cache = True
+
+
+@compiles(utc_date)
+def _compile_utc_date(element, compiler, **kw):
+    return f"date({compiler.process(element.clauses, **kw)})"
+
+
+@compiles(utc_date, "postgresql")
+def _compile_utc_date_postgresql(element, compiler, **kw):
+    return f"date(timezone('UTC', {compiler.process(element.clauses, **kw)}))"
+
+
+def dialect_insert(session):
+    """
+    Return the dialect-specific INSERT construct for a session.
+    Both PostgreSQL and SQLite variants support ON CONFLICT clauses.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
@@ -0,0 +1,104 @@
+"""
+EcoleHub Stage 2 - School events listing
+Events, their registration counts and the caller's registration in one query
+"""
+
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import and_, func
+from sqlalchemy.orm import Query, Session
+
+from .models_stage2 import Event, EventParticipant
+
+logger = logging.getLogger(__name__)
+
+
+def list_events(
+    db: Session,
+    user_id: UUID,
+    upcoming_only: bool = False,
+    event_type: Optional[str] = None,
+    class_name: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Active events in start order. Registration counts come from one grouped
+    subquery and the caller's registration from an outer join, instead of
+    two lookups per event.
+    """
+    query = db.query(Event).filter(Event.is_active)
+    filters = []
+    if upcoming_only:
+        filters.append(("upcoming", Event.start_date >= datetime.now(timezone.utc)))
+    if event_type:
+        filters.append((f"type={event_type}", Event.event_type == event_type))
+    if class_name:
+        filters.append((f"class={class_name}", Event.class_name == class_name))
+    for _, condition in filters:
+        query = query.filter(condition)
+    if logger.isEnabledFor(logging.DEBUG):
+        _log_filter_counts(db, filters)
+
+    registered = (
+        db.query(
+            EventParticipant.event_id,
+            func.count().label("participants_count"),
+        )
+        .filter(EventParticipant.status == "registered")
+        .group_by(EventParticipant.event_id)
+        .subquery()
+    )
+    mine = EventParticipant.__table__.alias("mine")
+    rows = (
+        query.outerjoin(registered, registered.c.event_id == Event.id)
+        .outerjoin(mine, and_(mine.c.event_id == Event.id, mine.c.user_id == user_id))
+        .add_columns(
+            func.coalesce(registered.c.participants_count, 0),
+            mine.c.user_id.isnot(None),
+        )
+        .order_by(Event.start_date)
+        .limit(limit)
+        .all()
+    )
+    return [
+        _serialize_event(event, participants_count, bool(is_registered))
+        for event, participants_count, is_registered in rows
+    ]
+
+
+def _log_filter_counts(db: Session, filters: List) -> None:
+    # Diagnostics only: one COUNT per filter step
+    query: Query = db.query(Event).filter(Event.is_active)
+    logger.debug(f"🔍 Active events: {query.count()}")
+    for label, condition in filters:
+        query = query.filter(condition)
+        logger.debug(f"🔍 After {label}: {query.count()} events")
+
+
+def _serialize_event(
+    event: Event, participants_count: int, is_registered: bool
+) -> Dict[str, Any]:
+    return {
+        "id": str(event.id),
+        "title": event.title,
+        "description": event.description,
+        "start_date": event.start_date.isoformat(),
+        "end_date": event.end_date.isoformat() if event.end_date else None,
+        "location": event.location,
+        "event_type": event.event_type,
+        "class_name": event.class_name,
+        "max_participants": event.max_participants,
+        "participants_count": participants_count,
+        "registration_required": event.registration_required,
+        "registration_deadline": (
+            event.registration_deadline.isoformat()
+            if event.registration_deadline
+            else None
+        ),
+        "is_registered": is_registered,
+        "created_by": str(event.created_by) if event.created_by else None,
+        "created_at": event.created_at.isoformat(),
+    }
@@ -0,0 +1,86 @@
+"""
+EcoleHub - Event loop lag monitor
+Measures how late the event loop wakes up, i.e. how long something blocked it
+"""
+
+import asyncio
+import math
+import os
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from prometheus_client import Gauge, Histogram
+
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.25"))
+# Samples behind the max/p95 gauges (~1 minute at the default interval)
+LOOP_LAG_WINDOW = int(os.getenv("LOOP_LAG_WINDOW", "240"))
+
+ecolehub_event_loop_lag = Histogram(
+    "ecolehub_event_loop_lag_seconds",
+    "Delay between a scheduled event loop wake-up and when it ran",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+ecolehub_event_loop_lag_recent = Gauge(
+    "ecolehub_event_loop_lag_recent_seconds",
+    "Event loop lag over the recent sample window",
+    ["stat"],
+)
+
+
+class LoopLagMonitor:
+    """
+    Sleeps for a fixed interval and records how much longer than that the
+    wake-up took. Any lag is time during which the loop could not serve
+    sockets or requests because a callback was blocking it.
+    """
+
+    def __init__(
+        self, interval: float = LOOP_LAG_INTERVAL, window: int = LOOP_LAG_WINDOW
+    ):
+        self.interval = interval
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start sampling on the running event loop (app startup)."""
+        if not self.running:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            scheduled = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.record(max(loop.time() - scheduled, 0.0))
+
+    def record(self, lag: float) -> None:
+        self._samples.append(lag)
+        ecolehub_event_loop_lag.observe(lag)
+        for stat, value in self.stats().items():
+            ecolehub_event_loop_lag_recent.labels(stat=stat).set(value)
+
+    def stats(self) -> Dict[str, float]:
+        """Max and 95th percentile lag over the sample window."""
+        if not self._samples:
+            return {"max": 0.0, "p95": 0.0}
+        ordered = sorted(self._samples)
+        return {
+            "max": ordered[-1],
+            "p95": ordered[math.ceil(len(ordered) * 0.95) - 1],
+        }
+
+
+loop_lag_monitor = LoopLagMonitor()
@@ -8,11 +8,14 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from sqlalchemy.orm import Session, sessionmaker
 
+from .database import create_db_engine
+
 # Import Stage 1 models and schemas
 from .models_stage1 import Base, Child, SELService, SELTransaction, User
+from .schema_upgrades import backfill_sel_ledger
 from .schemas_stage1 import (
     ChildCreate,
     ChildResponse,
@@ -43,11 +46,12 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_DAYS = 7
 
 # Database
-engine = create_engine(DATABASE_URL)
+engine = create_db_engine(DATABASE_URL, pool_name="api")
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 # Create tables
 Base.metadata.create_all(bind=engine)
+backfill_sel_ledger(engine, SessionLocal)
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -184,6 +188,7 @@ def register(
 
     # Create initial SEL balance
     sel_service.get_or_create_balance(db_user.id)
+    db.commit()
 
     # Create token
     access_token = create_access_token(data={"sub": user.email})
@@ -286,8 +291,7 @@ def get_sel_balance(
     current_user: User = Depends(get_current_user),
     sel_service: SELBusinessLogic = Depends(get_sel_service),
 ):
-    balance = sel_service.get_or_create_balance(current_user.id)
-    return balance
+    return sel_service.get_balance(current_user.id)
 
 
 # SEL Services
@@ -8,6 +8,7 @@ from datetime import datetime, timedelta
 from typing import List, Optional
 from uuid import UUID
 
+import anyio.from_thread
 import redis
 from fastapi import Depends, FastAPI, Form, HTTPException, Query, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
@@ -17,9 +18,15 @@ from passlib.context import CryptContext
 
 # Additional schemas for Stage 2
 from pydantic import BaseModel
-from sqlalchemy import and_, create_engine, desc, func, text
+from sqlalchemy import and_, func, text
 from sqlalchemy.orm import Session, sessionmaker
 
+from .database import create_db_engine
+from .events_service import list_events
+from .loop_monitor import loop_lag_monitor
+from .message_sink import message_sink
+from .messaging_service import get_inbox, get_message_page, serialize_message
+
 # Import all models (Stage 1 + Stage 2)
 from .models_stage1 import Base, Child, SELService, SELTransaction, User
 from .models_stage2 import (
@@ -27,9 +34,9 @@ from .models_stage2 import (
     ConversationParticipant,
     Event,
     EventParticipant,
-    Message,
     UserStatus,
 )
+from .schema_upgrades import backfill_sel_ledger, upgrade_conversations
 
 # Import Stage 1 schemas and add Stage 2
 from .schemas_stage1 import (
@@ -50,6 +57,7 @@ from .schemas_stage1 import (
     UserUpdate,
 )
 from .sel_service import SELBusinessLogic
+from .unread_counters import unread_counters
 from .websocket_manager import websocket_manager
 
 
@@ -68,11 +76,13 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_DAYS = 7
 
 # Database
-engine = create_engine(DATABASE_URL)
+engine = create_db_engine(DATABASE_URL, pool_name="api")
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 # Create tables
 Base.metadata.create_all(bind=engine)
+upgrade_conversations(engine, SessionLocal)
+backfill_sel_ledger(engine, SessionLocal)
 
 # Redis
 redis_client = redis.Redis.from_url(REDIS_URL, decode_responses=True)
@@ -414,8 +424,7 @@ def get_sel_balance(
     current_user: User = Depends(get_current_user),
     sel_service: SELBusinessLogic = Depends(get_sel_service),
 ):
-    balance = sel_service.get_or_create_balance(current_user.id)
-    return balance
+    return sel_service.get_balance(current_user.id)
 
 
 @app.get("/sel/services", response_model=List[SELServiceWithOwner])
@@ -616,64 +625,26 @@ def get_users_list(
 def get_conversations(
     current_user: User = Depends(get_current_user), db: Session = Depends(get_db)
 ):
-    """Get user's conversations."""
-    participations = (
-        db.query(ConversationParticipant)
-        .filter(ConversationParticipant.user_id == current_user.id)
-        .all()
-    )
-
-    conversations = []
-    for participation in participations:
-        conversation = participation.conversation
-
-        # Get last message
-        last_message = (
-            db.query(Message)
-            .filter(Message.conversation_id == conversation.id)
-            .order_by(desc(Message.created_at))
-            .first()
-        )
+    """Get user's conversations (inbox)."""
+    return get_inbox(db, current_user.id)
 
-        conversations.append(
-            {
-                "id": str(conversation.id),
-                "name": conversation.name,
-                "type": conversation.type,
-                "class_name": conversation.class_name,
-                "last_message": (
-                    {
-                        "content": last_message.content if last_message else None,
-                        "created_at": (
-                            last_message.created_at.isoformat()
-                            if last_message
-                            else None
-                        ),
-                        "user_name": (
-                            f"{last_message.user.first_name} {last_message.user.last_name}"
-                            if last_message
-                            else None
-                        ),
-                    }
-                    if last_message
-                    else None
-                ),
-                "unread_count": 0,  # TODO: Calculate based on last_read_at
-                "updated_at": conversation.updated_at.isoformat(),
-            }
-        )
 
-    return conversations
+@app.get("/conversations/unread")
+def get_unread_counts(current_user: User = Depends(get_current_user)):
+    """Unread messages per conversation, for badges."""
+    return unread_counters.get(current_user.id)
 
 
 @app.get("/conversations/{conversation_id}/messages")
 def get_conversation_messages(
     conversation_id: UUID,
     limit: int = Query(50, le=100),
+    before: Optional[str] = None,
+    after: Optional[str] = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    """Get messages from a conversation."""
+    """Get a page of messages (oldest first); pass a message cursor to move."""
     # Verify user is participant
     participant = (
         db.query(ConversationParticipant)
@@ -690,29 +661,8 @@ def get_conversation_messages(
         )
 
     # Get messages
-    messages = (
-        db.query(Message)
-        .filter(Message.conversation_id == conversation_id)
-        .order_by(desc(Message.created_at))
-        .limit(limit)
-        .all()
-    )
-
-    messages.reverse()  # Oldest first
-
-    return [
-        {
-            "id": str(msg.id),
-            "conversation_id": str(msg.conversation_id),
-            "user_id": str(msg.user_id),
-            "user_name": f"{msg.user.first_name} {msg.user.last_name}",
-            "content": msg.content,
-            "message_type": msg.message_type,
-            "created_at": msg.created_at.isoformat(),
-            "edited_at": msg.edited_at.isoformat() if msg.edited_at else None,
-        }
-        for msg in messages
-    ]
+    messages = get_message_page(db, conversation_id, limit, before, after)
+    return [serialize_message(msg) for msg in messages]
 
 
 @app.post("/conversations/{conversation_id}/messages")
@@ -738,24 +688,32 @@ def send_message_to_conversation(
             status_code=403, detail="Accès interdit à cette conversation"
         )
 
-    # Create message
-    message = Message(
-        conversation_id=conversation_id,
-        user_id=current_user.id,
-        content=message_data.content.strip(),
-        message_type="text",
-    )
+    # Create message (queued for a batch insert with MESSAGE_WRITE_BEHIND=1)
+    content = message_data.content.strip()
+    message = message_sink.submit(db, conversation_id, current_user.id, content)
 
-    db.add(message)
-    db.commit()
-    db.refresh(message)
-
-    # TODO: Send real-time notification via WebSocket
+    # Real-time notification straight from the payload, no re-read
+    anyio.from_thread.run(
+        websocket_manager.broadcast_to_conversation,
+        conversation_id,
+        {
+            "type": "new_message",
+            "message": {
+                "id": message["id"],
+                "conversation_id": message["conversation_id"],
+                "user_id": message["user_id"],
+                "user_name": f"{current_user.first_name} {current_user.last_name}",
+                "content": content,
+                "created_at": message["created_at"],
+            },
+        },
+        current_user.id,
+    )
 
     return {
-        "id": str(message.id),
+        "id": message["id"],
         "message": "Message envoyé",
-        "created_at": message.created_at.isoformat(),
+        "created_at": message["created_at"],
     }
 
 
@@ -774,87 +732,9 @@ def get_events(
     db: Session = Depends(get_db),
 ):
     """Get school events."""
-    print(f"🔍 Events API called by user {current_user.email}")
-
-    # Start with all active events
-    query = db.query(Event).filter(Event.is_active)
-
-    # Count total events before filters
-    total_events = query.count()
-    print(f"🔍 Total active events in DB: {total_events}")
-
-    if upcoming_only:
-        # Show only future events
-        query = query.filter(Event.start_date >= datetime.utcnow())
-        print(f"🔍 After upcoming filter: {query.count()} events")
-
-    if event_type:
-        query = query.filter(Event.event_type == event_type)
-        print(f"🔍 After type filter ({event_type}): {query.count()} events")
-
-    if class_name:
-        query = query.filter(Event.class_name == class_name)
-        print(f"🔍 After class filter ({class_name}): {query.count()} events")
-
-    events = query.order_by(Event.start_date).limit(limit).all()
-    print(f"🔍 Final events to return: {len(events)}")
-
-    if not events:
-        print("❌ No events found - checking first event in DB...")
-        first_event = db.query(Event).first()
-        if first_event:
-            print(
-                f"📅 First event example: {first_event.title}, active: {first_event.is_active}, date: {first_event.start_date}"
-            )
-
-    result = []
-    for event in events:
-        # Check if user is registered
-        participant = (
-            db.query(EventParticipant)
-            .filter(
-                EventParticipant.event_id == event.id,
-                EventParticipant.user_id == current_user.id,
-            )
-            .first()
-        )
-
-        # Count participants
-        participants_count = (
-            db.query(EventParticipant)
-            .filter(
-                EventParticipant.event_id == event.id,
-                EventParticipant.status == "registered",
-            )
-            .count()
-        )
-
-        result.append(
-            {
-                "id": str(event.id),
-                "title": event.title,
-                "description": event.description,
-                "start_date": event.start_date.isoformat(),
-                "end_date": event.end_date.isoformat() if event.end_date else None,
-                "location": event.location,
-                "event_type": event.event_type,
-                "class_name": event.class_name,
-                "max_participants": event.max_participants,
-                "participants_count": participants_count,
-                "registration_required": event.registration_required,
-                "registration_deadline": (
-                    event.registration_deadline.isoformat()
-                    if event.registration_deadline
-                    else None
-                ),
-                "is_registered": participant is not None,
-                "created_by": str(event.created_by),
-                "created_at": event.created_at.isoformat(),
-            }
-        )
-
-    print(f"✅ Returning {len(result)} events to frontend")
-    return result
+    return list_events(
+        db, current_user.id, upcoming_only, event_type, class_name, limit
+    )
 
 
 @app.post("/events/{event_id}/register")
@@ -952,6 +832,24 @@ async def websocket_endpoint(
         await websocket.close(code=1011)
 
 
+@app.on_event("startup")
+async def start_websockets():
+    loop_lag_monitor.start()
+    message_sink.redis = redis_client
+    message_sink.session_factory = SessionLocal
+    message_sink.start()
+    unread_counters.redis = redis_client
+    websocket_manager.session_factory = SessionLocal
+    await websocket_manager.start()
+
+
+@app.on_event("shutdown")
+async def stop_websockets():
+    await websocket_manager.stop()
+    await message_sink.stop()
+    await loop_lag_monitor.stop()
+
+
 if __name__ == "__main__":
     import os
 
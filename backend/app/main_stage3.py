@@ -17,23 +17,26 @@ from passlib.context import CryptContext
 
 # Additional schemas for Stage 3
 from pydantic import BaseModel
-from sqlalchemy import and_, create_engine, desc, func, or_, text
+from sqlalchemy import and_, desc, func, or_, text
 from sqlalchemy.orm import Session, sessionmaker
 
+from .database import create_db_engine
+from .events_service import list_events
+from .message_sink import message_sink
+from .messaging_service import get_inbox, get_message_page, serialize_message
 from .minio_service import minio_service
 
 # Import all models (Stage 1 + Stage 2 + Stage 3)
 from .models_stage1 import Base, Child, SELService, SELTransaction, User
-from .models_stage2 import (
-    Conversation,
-    ConversationParticipant,
-    Event,
-    EventParticipant,
-    Message,
-    UserStatus,
-)
+from .models_stage2 import Conversation, ConversationParticipant, UserStatus
 from .models_stage3 import EducationResource, ShopInterest, ShopProduct
 from .mollie_service import mollie_service
+from .schema_upgrades import (
+    backfill_sel_ledger,
+    backfill_shop_interest_counters,
+    upgrade_conversations,
+    upgrade_shop_interests,
+)
 
 # Import schemas and services
 from .schemas_stage1 import (
@@ -84,11 +87,15 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_DAYS = 7
 
 # Database
-engine = create_engine(DATABASE_URL)
+engine = create_db_engine(DATABASE_URL, pool_name="api")
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 # Create tables
 Base.metadata.create_all(bind=engine)
+upgrade_conversations(engine, SessionLocal)
+backfill_sel_ledger(engine, SessionLocal)
+upgrade_shop_interests(engine)
+backfill_shop_interest_counters(SessionLocal)
 
 # Redis
 redis_client = redis.Redis.from_url(REDIS_URL, decode_responses=True)
@@ -381,7 +388,7 @@ def get_sel_balance(
     current_user: User = Depends(get_current_user),
     sel_service: SELBusinessLogic = Depends(get_sel_service),
 ):
-    return sel_service.get_or_create_balance(current_user.id)
+    return sel_service.get_balance(current_user.id)
 
 
 @app.get("/sel/services", response_model=List[SELServiceWithOwner])
@@ -569,10 +576,12 @@ def get_users_list(
 def get_conversation_messages(
     conversation_id: UUID,
     limit: int = Query(50, le=100),
+    before: Optional[str] = None,
+    after: Optional[str] = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    """Get messages from a conversation."""
+    """Get a page of messages (oldest first); pass a message cursor to move."""
     participant = (
         db.query(ConversationParticipant)
         .filter(
@@ -587,29 +596,8 @@ def get_conversation_messages(
             status_code=403, detail="Accès interdit à cette conversation"
         )
 
-    messages = (
-        db.query(Message)
-        .filter(Message.conversation_id == conversation_id)
-        .order_by(desc(Message.created_at))
-        .limit(limit)
-        .all()
-    )
-
-    messages.reverse()  # Oldest first
-
-    return [
-        {
-            "id": str(msg.id),
-            "conversation_id": str(msg.conversation_id),
-            "user_id": str(msg.user_id),
-            "user_name": f"{msg.user.first_name} {msg.user.last_name}",
-            "content": msg.content,
-            "message_type": msg.message_type,
-            "created_at": msg.created_at.isoformat(),
-            "edited_at": msg.edited_at.isoformat() if msg.edited_at else None,
-        }
-        for msg in messages
-    ]
+    messages = get_message_page(db, conversation_id, limit, before, after)
+    return [serialize_message(msg) for msg in messages]
 
 
 @app.post("/conversations/{conversation_id}/messages")
@@ -634,21 +622,14 @@ def send_message_to_conversation(
             status_code=403, detail="Accès interdit à cette conversation"
         )
 
-    message = Message(
-        conversation_id=conversation_id,
-        user_id=current_user.id,
-        content=message_data.content.strip(),
-        message_type="text",
+    message = message_sink.submit(
+        db, conversation_id, current_user.id, message_data.content.strip()
     )
 
-    db.add(message)
-    db.commit()
-    db.refresh(message)
-
     return {
-        "id": str(message.id),
+        "id": message["id"],
         "message": "Message envoyé",
-        "created_at": message.created_at.isoformat(),
+        "created_at": message["created_at"],
     }
 
 
@@ -656,50 +637,7 @@ def send_message_to_conversation(
 def get_conversations(
     current_user: User = Depends(get_current_user), db: Session = Depends(get_db)
 ):
-    participations = (
-        db.query(ConversationParticipant)
-        .filter(ConversationParticipant.user_id == current_user.id)
-        .all()
-    )
-
-    conversations = []
-    for participation in participations:
-        conversation = participation.conversation
-        last_message = (
-            db.query(Message)
-            .filter(Message.conversation_id == conversation.id)
-            .order_by(desc(Message.created_at))
-            .first()
-        )
-
-        conversations.append(
-            {
-                "id": str(conversation.id),
-                "name": conversation.name,
-                "type": conversation.type,
-                "class_name": conversation.class_name,
-                "last_message": (
-                    {
-                        "content": last_message.content if last_message else None,
-                        "created_at": (
-                            last_message.created_at.isoformat()
-                            if last_message
-                            else None
-                        ),
-                        "user_name": (
-                            f"{last_message.user.first_name} {last_message.user.last_name}"
-                            if last_message
-                            else None
-                        ),
-                    }
-                    if last_message
-                    else None
-                ),
-                "updated_at": conversation.updated_at.isoformat(),
-            }
-        )
-
-    return conversations
+    return get_inbox(db, current_user.id)
 
 
 @app.get("/events")
@@ -708,52 +646,7 @@ def get_events(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    query = db.query(Event).filter(Event.is_active)
-
-    if upcoming_only:
-        query = query.filter(Event.start_date >= datetime.utcnow())
-
-    events = query.order_by(Event.start_date).all()
-
-    result = []
-    for event in events:
-        participant = (
-            db.query(EventParticipant)
-            .filter(
-                EventParticipant.event_id == event.id,
-                EventParticipant.user_id == current_user.id,
-            )
-            .first()
-        )
-
-        participants_count = (
-            db.query(EventParticipant)
-            .filter(
-                EventParticipant.event_id == event.id,
-                EventParticipant.status == "registered",
-            )
-            .count()
-        )
-
-        result.append(
-            {
-                "id": str(event.id),
-                "title": event.title,
-                "description": event.description,
-                "start_date": event.start_date.isoformat(),
-                "end_date": event.end_date.isoformat() if event.end_date else None,
-                "location": event.location,
-                "event_type": event.event_type,
-                "class_name": event.class_name,
-                "max_participants": event.max_participants,
-                "participants_count": participants_count,
-                "registration_required": event.registration_required,
-                "is_registered": participant is not None,
-                "created_at": event.created_at.isoformat(),
-            }
-        )
-
-    return result
+    return list_events(db, current_user.id, upcoming_only)
 
 
 # ==========================================
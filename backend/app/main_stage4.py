@@ -28,21 +28,45 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 
 # Prometheus monitoring
+from prometheus_client import generate_latest
 from prometheus_fastapi_instrumentator import Instrumentator
 
 # Additional schemas for Stage 4
 from pydantic import BaseModel
-from sqlalchemy import and_, create_engine, desc, func, or_, text
+from sqlalchemy import and_, desc, func, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, sessionmaker
 
-from .analytics_service import get_analytics_service
+from .active_users import active_user_tracker
+from .analytics_pipeline import analytics_pipeline
+from .analytics_service import (
+    AsyncEcoleHubAnalytics,
+    enqueue_user_action,
+    get_analytics_service,
+)
+from .async_db import (
+    ASYNC_MODE,
+    create_async_db_engine,
+    create_async_redis,
+    create_async_session_factory,
+)
+from .auth_cache import AUTH_CACHE_REDIS, principal_cache
+from .database import create_db_engine
+from .events_service import list_events
+from .loop_monitor import loop_lag_monitor
+from .message_sink import message_sink
+from .messaging_service import (
+    get_inbox,
+    get_message_page,
+    serialize_message,
+)
+from .metrics_collector import metrics_collector
 from .minio_service import minio_service
 
 # Import all models and services from previous stages
 from .models_stage1 import (
     Base,
     Child,
-    SELBalance,
     SELCategory,
     SELService,
     SELTransaction,
@@ -51,13 +75,16 @@ from .models_stage1 import (
 from .models_stage2 import (
     Conversation,
     ConversationParticipant,
-    Message,
-    Event,
-    EventParticipant,
     PrivacyEvent,
     UserStatus,
 )
-from .models_stage3 import EducationResource, ShopInterest, ShopProduct
+from .models_stage3 import EducationResource, ShopProduct
+from .schema_upgrades import (
+    backfill_sel_ledger,
+    backfill_shop_interest_counters,
+    upgrade_conversations,
+    upgrade_shop_interests,
+)
 
 # Import schemas and services
 from .schemas_stage1 import (
@@ -65,9 +92,13 @@ from .schemas_stage1 import (
     ChildResponse,
     SELBalanceResponse,
     SELCategoryResponse,
+    SELDashboard,
     SELServiceCreate,
     SELServiceResponse,
+    SELServiceUpdate,
     SELServiceWithOwner,
+    SELSettlementRequest,
+    SELSettlementResult,
     SELTransactionCreate,
     SELTransactionResponse,
     Token,
@@ -75,8 +106,10 @@ from .schemas_stage1 import (
     UserResponse,
 )
 from .secrets_manager import get_database_url, get_jwt_secret, get_redis_url
-from .sel_service import SELBusinessLogic
-from .shop_service import ShopCollaborativeService
+from .sel_ledger import ledger_balance, verify_ledger
+from .sel_service import AsyncSELBusinessLogic, SELBusinessLogic
+from .shop_service import AsyncShopCollaborativeService, ShopCollaborativeService
+from .unread_counters import unread_counters
 
 # Back-compat helpers for tests expecting bare names
 try:
@@ -137,14 +170,17 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_DAYS = 7
 
 # Database
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {},
-)
+engine = create_db_engine(DATABASE_URL, pool_name="api")
 SessionLocal = sessionmaker(
     autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
 )
 
+# Opt-in asyncio engine for the async request stack (ECOLEHUB_ASYNC_MODE=1)
+async_engine = create_async_db_engine(DATABASE_URL) if ASYNC_MODE else None
+AsyncSessionLocal = (
+    create_async_session_factory(async_engine) if async_engine is not None else None
+)
+
 # Create tables
 Base.metadata.create_all(bind=engine)
 
@@ -312,6 +348,12 @@ def _migrate_children_parent_fk() -> None:
 
 _migrate_children_parent_fk()
 
+
+upgrade_conversations(engine, SessionLocal)
+backfill_sel_ledger(engine, SessionLocal)
+upgrade_shop_interests(engine)
+backfill_shop_interest_counters(SessionLocal)
+
 # Seed default SEL categories for compatibility/tests
 
 
@@ -347,6 +389,9 @@ def _seed_default_sel_categories() -> None:
 
 # Redis
 redis_client = redis.Redis.from_url(REDIS_URL, decode_responses=True)
+async_redis_client = create_async_redis(REDIS_URL) if ASYNC_MODE else None
+if AUTH_CACHE_REDIS:
+    principal_cache.redis = redis_client
 
 # Password hashing
 pwd_context = CryptContext(schemes=["pbkdf2_sha256", "bcrypt"], deprecated="auto")
@@ -415,6 +460,23 @@ def get_redis():
     return redis_client
 
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_sel_service(db: AsyncSession = Depends(get_async_db)):
+    return AsyncSELBusinessLogic(db)
+
+
+async def get_async_shop_service(db: AsyncSession = Depends(get_async_db)):
+    return AsyncShopCollaborativeService(db)
+
+
+def get_async_redis():
+    return async_redis_client
+
+
 # Helper functions
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -445,20 +507,56 @@ def get_current_user(
 
     token = credentials.credentials
 
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
+    # Recently validated tokens skip the decode and the users lookup
+    user = principal_cache.get_user(token, db)
+    if user is None:
+        payload = _decode_access_token(token, credentials_exception)
+        user = db.query(User).filter(User.email == payload["sub"]).first()
+        if user is None:
             raise credentials_exception
-    except JWTError:
+        principal_cache.put(token, user, payload.get("exp"))
+
+    active_user_tracker.touch(str(user.id))
+    return user
+
+
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db),
+):
+    credentials_exception = HTTPException(
+        status_code=401, detail="Could not validate credentials"
+    )
+
+    if credentials is None:
         raise credentials_exception
 
-    user = db.query(User).filter(User.email == email).first()
+    token = credentials.credentials
+
+    # Cache hits are merged without SQL, so the sync session facade is safe here
+    user = principal_cache.get_user(token, db.sync_session)
     if user is None:
-        raise credentials_exception
+        payload = _decode_access_token(token, credentials_exception)
+        result = await db.execute(select(User).where(User.email == payload["sub"]))
+        user = result.scalars().first()
+        if user is None:
+            raise credentials_exception
+        principal_cache.put(token, user, payload.get("exp"))
+
+    active_user_tracker.touch(str(user.id))
     return user
 
 
+def _decode_access_token(token: str, credentials_exception: HTTPException) -> dict:
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise credentials_exception
+    if payload.get("sub") is None:
+        raise credentials_exception
+    return payload
+
+
 # Middleware for analytics tracking
 @app.middleware("http")
 async def track_requests(request: Request, call_next):
@@ -469,10 +567,10 @@ async def track_requests(request: Request, call_next):
     # Track response time
     process_time = time.time() - start_time
 
-    # Log to analytics if user is authenticated
+    # Log to analytics if user is authenticated. The event is only queued:
+    # no DB session and no Redis round trip on the request path.
     if hasattr(request.state, "user"):
-        analytics = get_analytics_service(next(get_db()), redis_client)
-        analytics.track_user_action(
+        enqueue_user_action(
             str(request.state.user.id),
             f"api_call_{request.method}_{request.url.path}",
             {"response_time": process_time, "status_code": response.status_code},
@@ -481,6 +579,31 @@ async def track_requests(request: Request, call_next):
     return response
 
 
+@app.on_event("startup")
+async def start_background_tasks():
+    analytics_pipeline.redis = redis_client
+    active_user_tracker.redis = redis_client
+    analytics_pipeline.start()
+    metrics_collector.session_factory = SessionLocal
+    metrics_collector.redis = redis_client
+    metrics_collector.start()
+    message_sink.redis = redis_client
+    message_sink.session_factory = SessionLocal
+    message_sink.start()
+    unread_counters.redis = redis_client
+    principal_cache.start_listener()
+    loop_lag_monitor.start()
+
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    await loop_lag_monitor.stop()
+    await metrics_collector.stop()
+    await message_sink.stop()
+    await analytics_pipeline.stop()
+    principal_cache.stop_listener()
+
+
 # ==========================================
 # ROOT + HEALTH + METRICS ENDPOINTS
 # ==========================================
@@ -549,10 +672,10 @@ def health_check(db: Session = Depends(get_db), redis_conn=Depends(get_redis)):
 
 
 @app.get("/metrics")
-def get_metrics(db: Session = Depends(get_db), redis_conn=Depends(get_redis)):
+def get_metrics():
     """Prometheus metrics endpoint for EcoleHub monitoring."""
-    analytics = get_analytics_service(db, redis_conn)
-    return Response(content=analytics.get_prometheus_metrics(), media_type="text/plain")
+    # Business gauges are kept current by metrics_collector; no DB/Redis here
+    return Response(content=generate_latest(), media_type="text/plain")
 
 
 # ==========================================
@@ -571,7 +694,16 @@ def get_platform_analytics(
         raise HTTPException(status_code=403, detail="Admin access required")
 
     analytics = get_analytics_service(db, redis_conn)
-    return analytics.get_platform_overview()
+    return analytics.get_platform_overview_snapshot(_refresh_platform_overview)
+
+
+def _refresh_platform_overview():
+    # Background revalidation outlives the request, so it opens its own session
+    db = SessionLocal()
+    try:
+        return get_analytics_service(db, redis_client).get_platform_overview()
+    finally:
+        db.close()
 
 
 @api_router.get("/analytics/shop")
@@ -852,7 +984,7 @@ def get_sel_balance(
     current_user: User = Depends(get_current_user),
     sel_service: SELBusinessLogic = Depends(get_sel_service),
 ):
-    return sel_service.get_or_create_balance(current_user.id)
+    return sel_service.get_balance(current_user.id)
 
 
 @api_router.get("/sel/services", response_model=List[SELServiceWithOwner])
@@ -883,6 +1015,44 @@ def create_sel_service(
     return sel_service.create_service(current_user.id, service)
 
 
+@api_router.put("/sel/services/{service_id}", response_model=SELServiceResponse)
+def update_sel_service(
+    service_id: UUID,
+    update: SELServiceUpdate,
+    current_user: User = Depends(get_current_user),
+    sel_service: SELBusinessLogic = Depends(get_sel_service),
+):
+    return sel_service.update_service(service_id, current_user.id, update)
+
+
+@api_router.get("/sel/dashboard", response_model=SELDashboard)
+def get_sel_dashboard(
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    sel_service: SELBusinessLogic = Depends(get_sel_service),
+):
+    dashboard = sel_service.get_user_dashboard(
+        current_user.id, _refresh_dashboard_services
+    )
+    response.headers["Server-Timing"] = _server_timing(dashboard["timings"])
+    return dashboard
+
+
+def _refresh_dashboard_services():
+    # Background revalidation outlives the request, so it opens its own session
+    db = SessionLocal()
+    try:
+        return SELBusinessLogic(db).load_dashboard_services()
+    finally:
+        db.close()
+
+
+def _server_timing(timings: dict) -> str:
+    return ", ".join(
+        f"{section};dur={seconds * 1000:.1f}" for section, seconds in timings.items()
+    )
+
+
 @api_router.get("/sel/transactions", response_model=List[SELTransactionResponse])
 def get_user_transactions(
     current_user: User = Depends(get_current_user), db: Session = Depends(get_db)
@@ -907,8 +1077,7 @@ def get_user_balance(
     current_user: User = Depends(get_current_user),
     sel_service: SELBusinessLogic = Depends(get_sel_service),
 ):
-    balance = sel_service.get_or_create_balance(current_user.id)
-    return balance
+    return sel_service.get_balance(current_user.id)
 
 
 # Missing SEL transaction endpoints (back from Stage 3)
@@ -932,30 +1101,50 @@ def approve_sel_transaction(
     return sel_service.approve_transaction(transaction_id, current_user.id)
 
 
+@api_router.post(
+    "/sel/transactions/settle", response_model=List[SELSettlementResult]
+)
+def settle_sel_transactions(
+    request: SELSettlementRequest,
+    current_user: User = Depends(get_current_user),
+    sel_service: SELBusinessLogic = Depends(get_sel_service),
+):
+    # Coordinators settle on behalf of recipients (e.g. end of a school fair)
+    is_coordinator = (
+        "admin" in current_user.email or "direction" in current_user.email
+    )
+    return sel_service.settle_transactions(
+        request.transaction_ids, current_user.id, is_coordinator=is_coordinator
+    )
+
+
+@api_router.get("/admin/sel/ledger")
+def audit_sel_ledger(
+    current_user: User = Depends(get_current_user), db: Session = Depends(get_db)
+):
+    """Replay the SEL ledger and report balances that drifted from it."""
+    if "admin" not in current_user.email and "direction" not in current_user.email:
+        raise HTTPException(status_code=403, detail="Accès admin requis")
+    return verify_ledger(db)
+
+
 # Shop System (Stage 3)
 @api_router.get("/shop/products")
 def get_shop_products(
     category: Optional[str] = Query(None),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
     shop_service: ShopCollaborativeService = Depends(get_shop_service),
 ):
-    products = shop_service.get_products(category=category)
+    # Aggregates and the caller's interest come from a constant number of
+    # grouped queries, whatever the size of the catalogue.
+    catalogue = shop_service.get_catalogue(current_user.id, category=category)
+    return _serialize_catalogue(catalogue)
+
 
+def _serialize_catalogue(catalogue: List[dict]) -> List[dict]:
     items = []
-    for product in products:
-        info = shop_service.get_product_with_interest_count(product.id)
-
-        user_interest = (
-            db.query(ShopInterest)
-            .filter(
-                and_(
-                    ShopInterest.product_id == product.id,
-                    ShopInterest.user_id == current_user.id,
-                )
-            )
-            .first()
-        )
+    for info in catalogue:
+        user_interest = info["user_interest"]
 
         # Flatten structure to include basic product fields at top-level
         p = info["product"]
@@ -969,10 +1158,10 @@ def get_shop_products(
                 "min_quantity": p.min_quantity,
                 "created_by": str(p.created_by) if p.created_by else None,
                 # Aggregates
-                "total_interest": info.get("total_interest", 0),
-                "interested_users_count": info.get("interested_users_count", 0),
-                "progress_percentage": info.get("progress_percentage", 0.0),
-                "can_order": info.get("can_order", False),
+                "total_interest": info["total_interest"],
+                "interested_users_count": info["interested_users_count"],
+                "progress_percentage": info["progress_percentage"],
+                "can_order": info["can_order"],
                 # Current user interest
                 "user_interest": {
                     "has_interest": user_interest is not None,
@@ -1094,52 +1283,7 @@ def get_events(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    query = db.query(Event).filter(Event.is_active)
-
-    if upcoming_only:
-        query = query.filter(Event.start_date >= datetime.now(timezone.utc))
-
-    events = query.order_by(Event.start_date).all()
-
-    result = []
-    for event in events:
-        participant = (
-            db.query(EventParticipant)
-            .filter(
-                EventParticipant.event_id == event.id,
-                EventParticipant.user_id == current_user.id,
-            )
-            .first()
-        )
-
-        participants_count = (
-            db.query(EventParticipant)
-            .filter(
-                EventParticipant.event_id == event.id,
-                EventParticipant.status == "registered",
-            )
-            .count()
-        )
-
-        result.append(
-            {
-                "id": str(event.id),
-                "title": event.title,
-                "description": event.description,
-                "start_date": event.start_date.isoformat(),
-                "end_date": event.end_date.isoformat() if event.end_date else None,
-                "location": event.location,
-                "event_type": event.event_type,
-                "class_name": event.class_name,
-                "max_participants": event.max_participants,
-                "participants_count": participants_count,
-                "registration_required": event.registration_required,
-                "is_registered": participant is not None,
-                "created_at": event.created_at.isoformat(),
-            }
-        )
-
-    return result
+    return list_events(db, current_user.id, upcoming_only)
 
 
 # (router inclusion moved to bottom to ensure routes defined after are included)
@@ -1519,12 +1663,17 @@ def withdraw_consent(
 
 @api_router.get("/me/data_export")
 def data_export(
-    current_user: User = Depends(get_current_user), db: Session = Depends(get_db)
+    as_of: Optional[datetime] = Query(None),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
 ):
-    """Export user-related data (data portability)."""
+    """Export user-related data (data portability).
+
+    The SEL balance comes from the ledger, so `as_of` gives it at any past date.
+    """
     children = db.query(Child).filter(Child.parent_id == current_user.id).all()
     services = db.query(SELService).filter(SELService.user_id == current_user.id).all()
-    balance = db.query(SELBalance).filter(SELBalance.user_id == current_user.id).first()
+    balance = ledger_balance(db, current_user.id, as_of)
     response = {
         "user": {
             "id": str(current_user.id),
@@ -1558,9 +1707,10 @@ def data_export(
             for s in services
         ],
         "balance": {
-            "balance": balance.balance if balance else 0,
-            "total_given": balance.total_given if balance else 0,
-            "total_received": balance.total_received if balance else 0,
+            "balance": balance["balance"],
+            "total_given": balance["total_given"],
+            "total_received": balance["total_received"],
+            "as_of": as_of.isoformat() if as_of else None,
         },
     }
     try:
@@ -1737,50 +1887,12 @@ def compat_update_prefs(
 def get_conversations(
     current_user: User = Depends(get_current_user), db: Session = Depends(get_db)
 ):
-    participations = (
-        db.query(ConversationParticipant)
-        .filter(ConversationParticipant.user_id == current_user.id)
-        .all()
-    )
-
-    conversations = []
-    for participation in participations:
-        conversation = participation.conversation
-        last_message = (
-            db.query(Message)
-            .filter(Message.conversation_id == conversation.id)
-            .order_by(desc(Message.created_at))
-            .first()
-        )
+    return get_inbox(db, current_user.id)
 
-        conversations.append(
-            {
-                "id": str(conversation.id),
-                "name": conversation.name,
-                "type": conversation.type,
-                "class_name": conversation.class_name,
-                "last_message": (
-                    {
-                        "content": last_message.content if last_message else None,
-                        "created_at": (
-                            last_message.created_at.isoformat() if last_message else None
-                        ),
-                        "user_name": (
-                            f"{last_message.user.first_name} {last_message.user.last_name}"
-                            if last_message
-                            else None
-                        ),
-                    }
-                    if last_message
-                    else None
-                ),
-                "updated_at": conversation.updated_at.isoformat()
-                if conversation.updated_at
-                else None,
-            }
-        )
 
-    return conversations
+@api_router.get("/conversations/unread")
+def get_unread_counts(current_user: User = Depends(get_current_user)):
+    return unread_counters.get(current_user.id)
 
 
 @api_router.post("/conversations/direct")
@@ -1841,6 +1953,8 @@ def create_direct_conversation(
 def get_conversation_messages(
     conversation_id: UUID,
     limit: int = Query(50, le=100),
+    before: Optional[str] = None,
+    after: Optional[str] = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
@@ -1855,27 +1969,8 @@ def get_conversation_messages(
     if not participant:
         raise HTTPException(status_code=403, detail="Accès interdit à cette conversation")
 
-    messages = (
-        db.query(Message)
-        .filter(Message.conversation_id == conversation_id)
-        .order_by(desc(Message.created_at))
-        .limit(limit)
-        .all()
-    )
-    messages.reverse()
-    return [
-        {
-            "id": str(msg.id),
-            "conversation_id": str(msg.conversation_id),
-            "user_id": str(msg.user_id),
-            "user_name": f"{msg.user.first_name} {msg.user.last_name}",
-            "content": msg.content,
-            "message_type": msg.message_type,
-            "created_at": msg.created_at.isoformat() if msg.created_at else None,
-            "edited_at": msg.edited_at.isoformat() if msg.edited_at else None,
-        }
-        for msg in messages
-    ]
+    messages = get_message_page(db, conversation_id, limit, before, after)
+    return [serialize_message(msg) for msg in messages]
 
 
 @app.post("/conversations/{conversation_id}/messages")
@@ -1896,19 +1991,14 @@ def post_conversation_message(
     if not participant:
         raise HTTPException(status_code=403, detail="Accès interdit à cette conversation")
 
-    message = Message(
-        conversation_id=conversation_id,
-        user_id=current_user.id,
-        content=message_data.content.strip(),
-        message_type="text",
+    # Queued for a batch insert with MESSAGE_WRITE_BEHIND=1
+    message = message_sink.submit(
+        db, conversation_id, current_user.id, message_data.content.strip()
     )
-    db.add(message)
-    db.commit()
-    db.refresh(message)
     return {
-        "id": str(message.id),
+        "id": message["id"],
         "message": "Message envoyé",
-        "created_at": message.created_at.isoformat() if message.created_at else None,
+        "created_at": message["created_at"],
     }
 
 
@@ -2014,12 +2104,16 @@ def create_education_resource(
 def api_get_conversation_messages(
     conversation_id: UUID,
     limit: int = Query(50, le=100),
+    before: Optional[str] = None,
+    after: Optional[str] = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     return get_conversation_messages(
         conversation_id=conversation_id,
         limit=limit,
+        before=before,
+        after=after,
         current_user=current_user,
         db=db,
     )
@@ -2039,8 +2133,138 @@ def api_post_conversation_message(
         db=db,
     )
 
+
+# ==========================================
+# ASYNC REQUEST STACK (ECOLEHUB_ASYNC_MODE=1)
+# ==========================================
+
+# Async twins of the hottest endpoints. The router is included before
+# api_router, so these shadow the sync handlers when async mode is enabled.
+async_api_router = APIRouter(prefix="/api")
+
+
+@async_api_router.get("/me", response_model=UserResponse)
+async def async_read_users_me(current_user: User = Depends(get_current_user_async)):
+    return read_users_me(current_user)
+
+
+@async_api_router.get("/sel/categories", response_model=List[SELCategoryResponse])
+async def async_get_sel_categories(
+    sel_service: AsyncSELBusinessLogic = Depends(get_async_sel_service),
+):
+    return await sel_service.get_categories()
+
+
+@async_api_router.get("/sel/balance", response_model=SELBalanceResponse)
+async def async_get_sel_balance(
+    current_user: User = Depends(get_current_user_async),
+    sel_service: AsyncSELBusinessLogic = Depends(get_async_sel_service),
+):
+    return await sel_service.get_balance(current_user.id)
+
+
+@async_api_router.get("/sel/dashboard", response_model=SELDashboard)
+async def async_get_sel_dashboard(
+    response: Response,
+    current_user: User = Depends(get_current_user_async),
+    sel_service: AsyncSELBusinessLogic = Depends(get_async_sel_service),
+):
+    dashboard = await sel_service.get_user_dashboard(
+        current_user.id, _refresh_dashboard_services
+    )
+    response.headers["Server-Timing"] = _server_timing(dashboard["timings"])
+    return dashboard
+
+
+@async_api_router.get("/sel/services", response_model=List[SELServiceWithOwner])
+async def async_get_sel_services(
+    category: Optional[str] = Query(None),
+    limit: int = Query(50, le=100),
+    current_user: User = Depends(get_current_user_async),
+    sel_service: AsyncSELBusinessLogic = Depends(get_async_sel_service),
+):
+    return await sel_service.get_available_services(current_user.id, category, limit)
+
+
+@async_api_router.get("/shop/products")
+async def async_get_shop_products(
+    category: Optional[str] = Query(None),
+    current_user: User = Depends(get_current_user_async),
+    shop_service: AsyncShopCollaborativeService = Depends(get_async_shop_service),
+):
+    catalogue = await shop_service.get_catalogue(current_user.id, category=category)
+    return _serialize_catalogue(catalogue)
+
+
+@async_api_router.post("/shop/products/{product_id}/interest")
+async def async_express_product_interest(
+    product_id: UUID,
+    interest: ShopInterestCreate,
+    current_user: User = Depends(get_current_user_async),
+    shop_service: AsyncShopCollaborativeService = Depends(get_async_shop_service),
+):
+    return await shop_service.express_interest(
+        user_id=current_user.id,
+        product_id=product_id,
+        quantity=interest.quantity,
+        notes=interest.notes,
+    )
+
+
+@async_api_router.delete("/shop/products/{product_id}/interest")
+async def async_cancel_product_interest(
+    product_id: UUID,
+    current_user: User = Depends(get_current_user_async),
+    shop_service: AsyncShopCollaborativeService = Depends(get_async_shop_service),
+):
+    return await shop_service.cancel_interest(current_user.id, product_id)
+
+
+@async_api_router.get("/analytics/platform")
+async def async_get_platform_analytics(
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+    redis_conn=Depends(get_async_redis),
+):
+    """Get platform overview analytics (admin only)."""
+    if "admin" not in current_user.email and "direction" not in current_user.email:
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    return await AsyncEcoleHubAnalytics(db, redis_conn).get_platform_overview_snapshot(
+        _refresh_platform_overview
+    )
+
+
+@async_api_router.get("/analytics/shop")
+async def async_get_shop_analytics(
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+    redis_conn=Depends(get_async_redis),
+):
+    """Get shop analytics (admin only)."""
+    if "admin" not in current_user.email and "direction" not in current_user.email:
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    return await AsyncEcoleHubAnalytics(db, redis_conn).get_shop_analytics()
+
+
+@async_api_router.get("/analytics/sel")
+async def async_get_sel_analytics(
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+    redis_conn=Depends(get_async_redis),
+):
+    """Get SEL system analytics (admin only)."""
+    if "admin" not in current_user.email and "direction" not in current_user.email:
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    return await AsyncEcoleHubAnalytics(db, redis_conn).get_sel_analytics()
+
+
 # Finally include the API router and expose metrics
 if not globals().get("_ROUTER_INCLUDED"):
+    if ASYNC_MODE:
+        app.include_router(async_api_router)
     app.include_router(api_router)
     instrumentator.expose(app)
     _ROUTER_INCLUDED = True
@@ -0,0 +1,258 @@
+"""
+EcoleHub - Write-behind message sink
+Chat messages are acknowledged once appended to a Redis stream and inserted
+into PostgreSQL in multi-row batches by a background consumer
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from prometheus_client import Counter, Histogram
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .db_types import dialect_insert
+from .messaging_service import record_last_messages
+from .models_stage2 import Message
+from .unread_counters import unread_counters
+
+MESSAGE_WRITE_BEHIND = os.getenv("MESSAGE_WRITE_BEHIND", "0") == "1"
+MESSAGE_STREAM = "messages:pending"
+MESSAGE_STREAM_GROUP = "message-writers"
+MESSAGE_BATCH_SIZE = int(os.getenv("MESSAGE_BATCH_SIZE", "200"))
+# How long one read waits for new entries; while waiting, arriving messages
+# accumulate into the next batch
+MESSAGE_BLOCK_MS = int(os.getenv("MESSAGE_BLOCK_MS", "20"))
+# Entries left unacknowledged this long (crashed consumer, DB outage) are
+# claimed again and replayed
+MESSAGE_CLAIM_IDLE_MS = int(os.getenv("MESSAGE_CLAIM_IDLE_MS", "30000"))
+
+ecolehub_message_sink_batch_size = Histogram(
+    "ecolehub_message_sink_batch_size",
+    "Messages inserted per write-behind batch",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 200, 500),
+)
+ecolehub_message_sink_replayed = Counter(
+    "ecolehub_message_sink_replayed_total",
+    "Messages claimed again after not being acknowledged in time",
+)
+ecolehub_message_sink_rejected = Counter(
+    "ecolehub_message_sink_rejected_total",
+    "Queued messages the database refused (e.g. conversation deleted)",
+)
+
+StreamEntry = Tuple[str, Dict[str, str]]
+
+
+def _message_row(fields: Dict[str, str]) -> Dict[str, Any]:
+    return {
+        "id": UUID(fields["id"]),
+        "conversation_id": UUID(fields["conversation_id"]),
+        "user_id": UUID(fields["user_id"]),
+        "content": fields["content"],
+        "message_type": fields["message_type"],
+        "created_at": datetime.fromisoformat(fields["created_at"]),
+    }
+
+
+class MessageSink:
+    """
+    Persists chat messages. With write-behind enabled and the consumer
+    running, submit() only XADDs to a Redis stream (durable with AOF) and
+    returns; the consumer inserts whatever accumulated in one statement,
+    updates the unread counters for the rows it inserted, and acknowledges
+    it. Ids and timestamps are assigned up front so callers can
+    fan the message out immediately, and replays are idempotent.
+    """
+
+    def __init__(
+        self,
+        redis_client=None,
+        session_factory: Optional[Callable[[], Session]] = None,
+        enabled: bool = MESSAGE_WRITE_BEHIND,
+        batch_size: int = MESSAGE_BATCH_SIZE,
+        block_ms: int = MESSAGE_BLOCK_MS,
+        claim_idle_ms: int = MESSAGE_CLAIM_IDLE_MS,
+    ):
+        self.redis = redis_client
+        self.session_factory = session_factory
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.block_ms = block_ms
+        self.claim_idle_ms = claim_idle_ms
+        self.consumer = f"{socket.gethostname()}-{uuid.uuid4().hex[:8]}"
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def submit(
+        self,
+        db: Session,
+        conversation_id: UUID,
+        user_id: UUID,
+        content: str,
+        message_type: str = "text",
+    ) -> Dict[str, str]:
+        """Store a message (or queue it durably); returns its payload."""
+        payload = {
+            "id": str(uuid.uuid4()),
+            "conversation_id": str(conversation_id),
+            "user_id": str(user_id),
+            "content": content,
+            "message_type": message_type,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+        if not (self.enabled and self.running and self._enqueue(payload)):
+            inserted = insert_messages(db, [_message_row(payload)])
+            db.commit()
+            unread_counters.record_messages(db, inserted)
+        return payload
+
+    def _enqueue(self, payload: Dict[str, str]) -> bool:
+        try:
+            self.redis.xadd(MESSAGE_STREAM, payload)
+            return True
+        except Exception as e:
+            logging.error(f"❌ Message sink enqueue error, writing inline: {e}")
+            return False
+
+    def start(self) -> None:
+        """Create the consumer group and start consuming (app startup)."""
+        if self.running or not self.enabled:
+            return
+        try:
+            self.redis.xgroup_create(
+                MESSAGE_STREAM, MESSAGE_STREAM_GROUP, id="0", mkstream=True
+            )
+        except Exception as e:
+            if "BUSYGROUP" not in str(e):
+                logging.error(f"❌ Message sink unavailable, writing inline: {e}")
+                return
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        # Entries from a previous run of a crashed instance come back first
+        next_replay = loop.time()
+        while True:
+            try:
+                if loop.time() >= next_replay:
+                    await asyncio.to_thread(self.replay_stale)
+                    next_replay = loop.time() + self.claim_idle_ms / 1000
+                await asyncio.to_thread(self.flush_once)
+            except Exception as e:
+                logging.error(f"❌ Message sink read error: {e}")
+                await asyncio.sleep(1)
+
+    def flush_once(self) -> int:
+        """Insert the next batch of queued messages; returns how many."""
+        response = self.redis.xreadgroup(
+            MESSAGE_STREAM_GROUP,
+            self.consumer,
+            {MESSAGE_STREAM: ">"},
+            count=self.batch_size,
+            block=self.block_ms,
+        )
+        entries = response[0][1] if response else []
+        if entries:
+            self._persist(entries)
+        return len(entries)
+
+    def replay_stale(self) -> int:
+        """Claim and insert entries nobody acknowledged in time."""
+        replayed = 0
+        start = "0-0"
+        while True:
+            start, entries, *_ = self.redis.xautoclaim(
+                MESSAGE_STREAM,
+                MESSAGE_STREAM_GROUP,
+                self.consumer,
+                min_idle_time=self.claim_idle_ms,
+                start_id=start,
+                count=self.batch_size,
+            )
+            if entries:
+                self._persist(entries)
+                replayed += len(entries)
+            if not entries or start == "0-0":
+                break
+        ecolehub_message_sink_replayed.inc(replayed)
+        return replayed
+
+    def _persist(self, entries: List[StreamEntry]) -> None:
+        db = self.session_factory()
+        try:
+            try:
+                inserted = insert_messages(
+                    db, [_message_row(fields) for _, fields in entries]
+                )
+                db.commit()
+                unread_counters.record_messages(db, inserted)
+                done = [entry_id for entry_id, _ in entries]
+            except IntegrityError:
+                # One bad row must not block the stream: retry them one by one
+                db.rollback()
+                done = self._persist_each(db, entries)
+            ecolehub_message_sink_batch_size.observe(len(done))
+        except Exception as e:
+            # Left unacknowledged; replayed once claimable again
+            db.rollback()
+            logging.error(f"❌ Message sink write error: {e}")
+            return
+        finally:
+            db.close()
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.xack(MESSAGE_STREAM, MESSAGE_STREAM_GROUP, *done)
+        pipe.xdel(MESSAGE_STREAM, *done)
+        pipe.execute()
+
+    def _persist_each(self, db: Session, entries: List[StreamEntry]) -> List[str]:
+        for entry_id, fields in entries:
+            try:
+                inserted = insert_messages(db, [_message_row(fields)])
+                db.commit()
+                unread_counters.record_messages(db, inserted)
+            except IntegrityError as e:
+                db.rollback()
+                ecolehub_message_sink_rejected.inc()
+                logging.error(f"❌ Message {fields.get('id')} rejected: {e}")
+        # Rejected rows are acknowledged too: retrying cannot make them valid
+        return [entry_id for entry_id, _ in entries]
+
+
+def insert_messages(db: Session, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Multi-row INSERT that skips ids already stored (safe to replay), and
+    moves each conversation's last message along in the same transaction.
+    Returns the conversation and sender of the rows actually inserted, so a
+    replay is not counted twice.
+    """
+    insert = dialect_insert(db)
+    inserted = db.execute(
+        insert(Message)
+        .on_conflict_do_nothing(index_elements=["id"])
+        .returning(Message.conversation_id, Message.user_id),
+        rows,
+    )
+    record_last_messages(db, rows)
+    return [dict(row._mapping) for row in inserted]
+
+
+message_sink = MessageSink()
@@ -0,0 +1,221 @@
+"""
+EcoleHub Stage 2 - Conversation history and inbox
+Keyset (cursor) pagination over messages, so scrolling back through a long
+class chat costs one indexed range scan per page whatever the offset, and an
+inbox read in one statement from the denormalized last message
+"""
+
+import base64
+import binascii
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import and_, bindparam, exists, func, or_, select, tuple_, update
+from sqlalchemy.orm import Session, aliased, joinedload
+
+from .models_stage1 import User
+from .models_stage2 import Conversation, ConversationParticipant, Message
+
+MessageKey = Tuple[datetime, UUID]
+
+
+def encode_cursor(message: Message) -> str:
+    """Opaque cursor pointing at a message's (created_at, id) position."""
+    raw = f"{message.created_at.isoformat()}|{message.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> MessageKey:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, message_id = base64.urlsafe_b64decode(padded).decode().split("|", 1)
+        return datetime.fromisoformat(created_at), UUID(message_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Curseur de pagination invalide")
+
+
+def get_message_page(
+    db: Session,
+    conversation_id: UUID,
+    limit: int = 50,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+) -> List[Message]:
+    """
+    One page of a conversation, oldest first.
+    Without cursors: the newest `limit` messages. With `before`: the `limit`
+    messages just older than that cursor (scrolling back). With `after`: the
+    `limit` messages just newer (catching up). Ties on created_at are broken
+    by id, matching the (conversation_id, created_at, id) index.
+    """
+    position = tuple_(Message.created_at, Message.id)
+    # Cursor values must bind like the columns (SQLite compares datetimes as text)
+    position_types = [Message.created_at.type, Message.id.type]
+    query = (
+        db.query(Message)
+        .options(joinedload(Message.user))
+        .filter(Message.conversation_id == conversation_id)
+    )
+    if before:
+        query = query.filter(
+            position < tuple_(*decode_cursor(before), types=position_types)
+        )
+    if after:
+        query = query.filter(
+            position > tuple_(*decode_cursor(after), types=position_types)
+        )
+
+    if after and not before:
+        return query.order_by(Message.created_at, Message.id).limit(limit).all()
+    messages = (
+        query.order_by(Message.created_at.desc(), Message.id.desc()).limit(limit).all()
+    )
+    messages.reverse()
+    return messages
+
+
+def serialize_message(message: Message) -> Dict[str, Any]:
+    return {
+        "id": str(message.id),
+        "conversation_id": str(message.conversation_id),
+        "user_id": str(message.user_id),
+        "user_name": f"{message.user.first_name} {message.user.last_name}",
+        "content": message.content,
+        "message_type": message.message_type,
+        "created_at": message.created_at.isoformat(),
+        "edited_at": message.edited_at.isoformat() if message.edited_at else None,
+        "cursor": encode_cursor(message),
+    }
+
+
+def record_last_messages(db: Session, rows: List[Dict[str, Any]]) -> None:
+    """
+    Point each conversation at the newest of the given messages, in the
+    caller's transaction. A conversation already showing something newer
+    (a batch replayed late) keeps it.
+    """
+    newest: Dict[Any, Dict[str, Any]] = {}
+    for row in rows:
+        current = newest.get(row["conversation_id"])
+        if current is None or (row["created_at"], row["id"]) > (
+            current["created_at"],
+            current["id"],
+        ):
+            newest[row["conversation_id"]] = row
+    if not newest:
+        return
+
+    shown = aliased(Message)
+    shown_is_newer = exists().where(
+        shown.id == Conversation.last_message_id,
+        tuple_(shown.created_at, shown.id)
+        >= tuple_(
+            bindparam("message_created_at", type_=Message.created_at.type),
+            bindparam("message_id", type_=Message.id.type),
+        ),
+    )
+    statement = (
+        update(Conversation)
+        .where(Conversation.id == bindparam("conversation"), ~shown_is_newer)
+        .values(last_message_id=bindparam("message_id"))
+        .execution_options(synchronize_session=False)
+    )
+    db.connection().execute(
+        statement,
+        [
+            {
+                "conversation": row["conversation_id"],
+                "message_id": row["id"],
+                "message_created_at": row["created_at"],
+            }
+            for row in newest.values()
+        ],
+    )
+
+
+def backfill_last_messages(db: Session) -> None:
+    """Fill last_message_id for conversations written before it existed."""
+    newest = (
+        select(Message.id)
+        .where(Message.conversation_id == Conversation.id)
+        .order_by(Message.created_at.desc(), Message.id.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    db.execute(
+        update(Conversation)
+        .where(
+            Conversation.last_message_id.is_(None),
+            exists().where(Message.conversation_id == Conversation.id),
+        )
+        .values(last_message_id=newest)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+def get_inbox(db: Session, user_id: UUID) -> List[Dict[str, Any]]:
+    """
+    A user's conversations, most recent activity first, with the last
+    message, its author and the unread count, in one statement.
+    """
+    last = aliased(Message)
+    author = aliased(User)
+    unread = (
+        select(func.count(Message.id))
+        .where(
+            Message.conversation_id == Conversation.id,
+            Message.user_id != user_id,
+            or_(
+                ConversationParticipant.last_read_at.is_(None),
+                Message.created_at > ConversationParticipant.last_read_at,
+            ),
+        )
+        .correlate(Conversation, ConversationParticipant)
+        .scalar_subquery()
+    )
+    rows = (
+        db.query(
+            Conversation,
+            last,
+            author.first_name,
+            author.last_name,
+            unread.label("unread_count"),
+        )
+        .join(
+            ConversationParticipant,
+            and_(
+                ConversationParticipant.conversation_id == Conversation.id,
+                ConversationParticipant.user_id == user_id,
+            ),
+        )
+        .outerjoin(last, last.id == Conversation.last_message_id)
+        .outerjoin(author, author.id == last.user_id)
+        .order_by(func.coalesce(last.created_at, Conversation.created_at).desc())
+        .all()
+    )
+    return [
+        {
+            "id": str(conversation.id),
+            "name": conversation.name,
+            "type": conversation.type,
+            "class_name": conversation.class_name,
+            "last_message": (
+                {
+                    "id": str(message.id),
+                    "content": message.content,
+                    "created_at": message.created_at.isoformat(),
+                    "user_name": f"{first_name} {last_name}",
+                }
+                if message is not None
+                else None
+            ),
+            "unread_count": unread_count,
+            "updated_at": (
+                conversation.updated_at.isoformat() if conversation.updated_at else None
+            ),
+        }
+        for conversation, message, first_name, last_name, unread_count in rows
+    ]
@@ -0,0 +1,97 @@
+"""
+EcoleHub Stage 4 - Business metrics collector
+Refreshes business gauges on a schedule so /metrics never queries a backend
+"""
+
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import Callable, Optional
+
+from prometheus_client import Gauge, Histogram
+from sqlalchemy.orm import Session
+
+from .analytics_service import EcoleHubAnalytics
+
+METRICS_REFRESH_INTERVAL = float(os.getenv("METRICS_REFRESH_INTERVAL", "30"))
+# Fraction of the interval added or removed at random, so replicas started
+# together do not hit the database in lockstep
+METRICS_REFRESH_JITTER = float(os.getenv("METRICS_REFRESH_JITTER", "0.2"))
+
+ecolehub_business_metrics_refreshed = Gauge(
+    "ecolehub_business_metrics_last_refresh_timestamp_seconds",
+    "When the business gauges were last recomputed",
+)
+ecolehub_business_metrics_duration = Histogram(
+    "ecolehub_business_metrics_refresh_duration_seconds",
+    "Time to recompute the business gauges",
+)
+
+
+class BusinessMetricsCollector:
+    """
+    Background task recomputing the business gauges (families, users, SEL
+    balance, active users). Scrapes only serialize the last values.
+    """
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Session]] = None,
+        redis_client=None,
+        interval: float = METRICS_REFRESH_INTERVAL,
+        jitter: float = METRICS_REFRESH_JITTER,
+    ):
+        self.session_factory = session_factory
+        self.redis = redis_client
+        self.interval = interval
+        self.jitter = jitter
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def next_delay(self) -> float:
+        return self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def start(self) -> None:
+        """Start collecting on the running event loop (app startup)."""
+        if not self.running:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.to_thread(self.collect_once)
+            await asyncio.sleep(self.next_delay())
+
+    def collect_once(self) -> None:
+        """
+        Recompute every business gauge once. The refresh timestamp only
+        moves when all of them were refreshed, so it shows when they stall.
+        """
+        start = time.perf_counter()
+        db = None
+        try:
+            db = self.session_factory()
+            if EcoleHubAnalytics(db, self.redis).refresh_business_metrics():
+                ecolehub_business_metrics_refreshed.set_to_current_time()
+        except Exception as e:
+            logging.error(f"❌ Business metrics collection error: {e}")
+        finally:
+            if db is not None:
+                db.close()
+            ecolehub_business_metrics_duration.observe(time.perf_counter() - start)
+
+
+metrics_collector = BusinessMetricsCollector()
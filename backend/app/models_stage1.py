@@ -1,14 +1,17 @@
 import uuid
 
 from sqlalchemy import (
+    BigInteger,
     Boolean,
     CheckConstraint,
     Column,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
+    UniqueConstraint,
 )
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, synonym
@@ -202,3 +205,50 @@ class SELBalance(Base):
 
     # Relationships
     user = relationship("User", back_populates="sel_balance")
+
+
+class SELLedgerEntry(Base):
+    """
+    Append-only double entry: an approved transaction writes a debit for
+    the payer and a credit for the payee. Never updated or deleted.
+    """
+
+    __tablename__ = "sel_ledger_entries"
+
+    # Monotonic, so "entries since a snapshot" is an id range
+    id = Column(
+        BigInteger().with_variant(Integer, "sqlite"),
+        primary_key=True,
+        autoincrement=True,
+    )
+    transaction_id = Column(
+        UUIDType(), ForeignKey("sel_transactions.id"), nullable=False
+    )
+    user_id = Column(UUIDType(), ForeignKey("users.id"), nullable=False)
+    amount = Column(Integer, nullable=False)  # < 0 debit, > 0 credit
+    # When recorded: ids and created_at follow the same order
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    # Settlement date of history recorded after the fact (backfill)
+    settled_at = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        CheckConstraint("amount <> 0", name="nonzero_amount"),
+        UniqueConstraint("transaction_id", "user_id", name="uq_ledger_entry"),
+        Index("idx_sel_ledger_user", "user_id", "id"),
+    )
+
+
+class SELBalanceSnapshot(Base):
+    """A user's balance and totals through ledger entry last_entry_id."""
+
+    __tablename__ = "sel_balance_snapshots"
+
+    id = Column(UUIDType(), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUIDType(), ForeignKey("users.id"), nullable=False)
+    last_entry_id = Column(BigInteger, nullable=False)
+    balance = Column(Integer, nullable=False)
+    total_given = Column(Integer, nullable=False)
+    total_received = Column(Integer, nullable=False)
+    taken_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (Index("idx_sel_snapshots_user", "user_id", "last_entry_id"),)
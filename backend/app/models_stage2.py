@@ -10,6 +10,7 @@ from sqlalchemy import (
     Column,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
@@ -32,6 +33,9 @@ class Conversation(Base):
     class_name = Column(String(10))  # For class-specific conversations
     created_by = Column(UUIDType(), ForeignKey("users.id"))
     is_active = Column(Boolean, default=True)
+    # Newest message, kept on write for the inbox. Deliberately no FK:
+    # messages already reference conversations and a cycle would order inserts
+    last_message_id = Column(UUIDType())
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
@@ -80,6 +84,10 @@ class Message(Base):
             "message_type IN ('text', 'image', 'file', 'system')",
             name="valid_message_type",
         ),
+        # History pages are keyset range scans on this index
+        Index(
+            "idx_messages_conversation_keyset", "conversation_id", "created_at", "id"
+        ),
     )
 
     # Relationships
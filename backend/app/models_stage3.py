@@ -49,6 +49,12 @@ class ShopProduct(Base):
         "ShopInterest", back_populates="product", cascade="all, delete-orphan"
     )
     orders = relationship("ShopOrder", back_populates="product")
+    interest_counter = relationship(
+        "ShopInterestCounter",
+        uselist=False,
+        back_populates="product",
+        cascade="all, delete-orphan",
+    )
 
 
 class ShopInterest(Base):
@@ -65,6 +71,10 @@ class ShopInterest(Base):
     notes = Column(Text)  # Size, color, special requirements
     status = Column(String(20), default="interested")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Quantity and status changes; the analytics rollup refreshes from it
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
 
     # Constraints
     __table_args__ = (
@@ -80,6 +90,30 @@ class ShopInterest(Base):
     user = relationship("User")
 
 
+class ShopInterestCounter(Base):
+    """
+    Materialized interest totals per product.
+    Maintained on write by the shop service, rebuilt from shop_interests by the
+    reconciliation task.
+    """
+
+    __tablename__ = "shop_interest_counters"
+
+    product_id = Column(
+        UUIDType(),
+        ForeignKey("shop_products.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    total_quantity = Column(Integer, nullable=False, default=0)
+    participants_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+    # Relationships
+    product = relationship("ShopProduct", back_populates="interest_counter")
+
+
 class ShopOrder(Base):
     __tablename__ = "shop_orders"
 
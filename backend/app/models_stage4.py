@@ -0,0 +1,67 @@
+"""
+EcoleHub Stage 4 Models - Analytics daily rollups
+Pre-aggregated facts so analytics cost does not grow with years of history
+"""
+
+from sqlalchemy import DECIMAL, Column, Date, DateTime, Integer, String
+from sqlalchemy.sql import func
+
+from .db_types import UUIDType
+
+# Import previous stage models
+from .models_stage3 import Base
+
+
+class AnalyticsRollupState(Base):
+    """High-water mark of each rollup: source rows changed after it are pending."""
+
+    __tablename__ = "analytics_rollup_state"
+
+    name = Column(String(50), primary_key=True)
+    watermark = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+
+class SELDailyStats(Base):
+    """SEL transactions per day, status and service category."""
+
+    __tablename__ = "analytics_sel_daily"
+
+    day = Column(Date, primary_key=True)
+    status = Column(String(20), primary_key=True)
+    category = Column(String(50), primary_key=True)
+    transactions_count = Column(Integer, nullable=False, default=0)
+    units_total = Column(Integer, nullable=False, default=0)
+
+
+class ShopInterestDailyStats(Base):
+    """Shop interests expressed per day and product."""
+
+    __tablename__ = "analytics_shop_interest_daily"
+
+    day = Column(Date, primary_key=True)
+    product_id = Column(UUIDType(), primary_key=True)
+    category = Column(String(50), nullable=False)
+    interests_count = Column(Integer, nullable=False, default=0)
+    quantity_total = Column(Integer, nullable=False, default=0)
+
+
+class ShopRevenueDailyStats(Base):
+    """Paid or delivered group orders per day (by order date)."""
+
+    __tablename__ = "analytics_shop_revenue_daily"
+
+    day = Column(Date, primary_key=True)
+    orders_count = Column(Integer, nullable=False, default=0)
+    revenue = Column(DECIMAL(12, 2), nullable=False, default=0)
+
+
+class MessageDailyStats(Base):
+    """Messages sent per day."""
+
+    __tablename__ = "analytics_messages_daily"
+
+    day = Column(Date, primary_key=True)
+    messages_count = Column(Integer, nullable=False, default=0)
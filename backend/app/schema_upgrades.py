@@ -0,0 +1,128 @@
+"""
+EcoleHub - Startup schema upgrades shared by the stages
+create_all() only creates missing tables: columns and indexes added to
+existing tables, and the data backfills they need, are applied here.
+Helpers for later-stage tables import their models when called, so that
+importing this module does not add those tables to an earlier stage's schema
+"""
+
+import logging
+from typing import Callable
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from .sel_ledger import backfill_ledger
+
+
+def _columns(conn, table: str) -> set:
+    if conn.dialect.name == "sqlite":
+        return {
+            row[1]
+            for row in conn.exec_driver_sql(f"PRAGMA table_info({table})").fetchall()
+        }
+    return {
+        row[0]
+        for row in conn.exec_driver_sql(
+            "SELECT column_name FROM information_schema.columns "
+            f"WHERE table_schema = current_schema() AND table_name = '{table}'"
+        ).fetchall()
+    }
+
+
+def upgrade_conversations(engine: Engine, session_factory: Callable[[], Session]):
+    """
+    Add conversations.last_message_id and fill it for existing chats, and
+    the (conversation_id, created_at, id) index that history pages use.
+    """
+    from .messaging_service import backfill_last_messages
+
+    try:
+        with engine.begin() as conn:
+            conn.exec_driver_sql(
+                "CREATE INDEX IF NOT EXISTS idx_messages_conversation_keyset "
+                "ON messages (conversation_id, created_at, id)"
+            )
+            if "last_message_id" not in _columns(conn, "conversations"):
+                column_type = (
+                    "UUID" if conn.dialect.name == "postgresql" else "CHAR(36)"
+                )
+                conn.exec_driver_sql(
+                    f"ALTER TABLE conversations ADD COLUMN last_message_id {column_type}"
+                )
+        session = session_factory()
+        try:
+            backfill_last_messages(session)
+        finally:
+            session.close()
+    except Exception as e:
+        # The app still starts; the inbox shows no last message meanwhile
+        logging.error(f"❌ Conversation schema upgrade failed: {e}")
+
+
+def backfill_sel_ledger(engine: Engine, session_factory: Callable[[], Session]):
+    """
+    Record transactions approved before the ledger existed: balances are
+    read from the ledger, so unrecorded history would show as 120. Safe on
+    every start, as backfilled entries are stamped when recorded and cannot
+    land inside an earlier snapshot.
+    """
+    try:
+        with engine.begin() as conn:
+            if "settled_at" not in _columns(conn, "sel_ledger_entries"):
+                column_type = (
+                    "TIMESTAMPTZ" if conn.dialect.name == "postgresql" else "DATETIME"
+                )
+                conn.exec_driver_sql(
+                    f"ALTER TABLE sel_ledger_entries ADD COLUMN settled_at {column_type}"
+                )
+        session = session_factory()
+        try:
+            recorded = backfill_ledger(session)
+        finally:
+            session.close()
+        if recorded:
+            logging.info(f"SEL ledger backfilled with {recorded} transactions")
+    except Exception as e:
+        # The verifier keeps reporting what is still unrecorded
+        logging.error(f"❌ SEL ledger backfill failed: {e}")
+
+
+def upgrade_shop_interests(engine: Engine):
+    """
+    Add shop_interests.updated_at, which the analytics rollup watches for
+    quantity changes. Existing rows keep NULL and fall back to created_at.
+    """
+    try:
+        with engine.begin() as conn:
+            if "updated_at" not in _columns(conn, "shop_interests"):
+                column_type = (
+                    "TIMESTAMPTZ" if conn.dialect.name == "postgresql" else "DATETIME"
+                )
+                conn.exec_driver_sql(
+                    f"ALTER TABLE shop_interests ADD COLUMN updated_at {column_type}"
+                )
+    except Exception as e:
+        logging.error(f"❌ Shop interest schema upgrade failed: {e}")
+
+
+def backfill_shop_interest_counters(session_factory: Callable[[], Session]):
+    """
+    Build the materialized interest counters once for interests recorded
+    before they existed; product pages read the counters only.
+    """
+    from .models_stage3 import ShopInterest, ShopInterestCounter
+    from .shop_service import ShopCollaborativeService
+
+    try:
+        session = session_factory()
+        try:
+            if session.query(ShopInterestCounter).first() is None and (
+                session.query(ShopInterest).first() is not None
+            ):
+                ShopCollaborativeService(session).rebuild_interest_counters()
+        finally:
+            session.close()
+    except Exception as e:
+        # The nightly reconciliation task rebuilds them anyway
+        logging.error(f"❌ Shop interest counter backfill failed: {e}")
@@ -174,6 +174,17 @@ class SELTransactionResponse(SELTransactionBase):
         from_attributes = True
 
 
+# Batch settlement
+class SELSettlementRequest(BaseModel):
+    transaction_ids: List[UUID] = Field(..., min_length=1, max_length=1000)
+
+
+class SELSettlementResult(BaseModel):
+    transaction_id: UUID
+    status_code: int  # 200 approved, 400/403/404 as the single approve endpoint
+    detail: str
+
+
 # SEL Balance Schemas
 class SELBalanceResponse(BaseModel):
     user_id: UUID
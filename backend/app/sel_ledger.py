@@ -0,0 +1,288 @@
+"""
+EcoleHub SEL - Double-entry ledger and balance snapshots
+Every approved transaction is recorded as a debit for the payer and a credit
+for the payee, never rewritten. Balances are read as the latest snapshot plus
+the entries after it, so a read only touches recent history, any point in
+time can be rebuilt, and sel_balances can be audited by replaying the ledger
+"""
+
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+from uuid import UUID
+
+from sqlalchemy import and_, case, exists, func, insert, select
+from sqlalchemy.orm import Session
+
+from .models_stage1 import (
+    SELBalance,
+    SELBalanceSnapshot,
+    SELLedgerEntry,
+    SELTransaction,
+)
+
+# Every account opens with 2 hours of credit, outside the ledger
+OPENING_BALANCE = 120
+# A new snapshot leaves out entries younger than this: an entry can take its
+# id before a concurrent one yet commit after it, and a snapshot must never
+# skip past an entry that was not visible yet
+SNAPSHOT_SETTLE_SECONDS = int(os.getenv("SEL_SNAPSHOT_SETTLE_SECONDS", "300"))
+
+SETTLED_STATUSES = ("approved", "completed")
+
+
+def record_entries(
+    db: Session,
+    transactions: Iterable[SELTransaction],
+    at: Optional[datetime] = None,
+    settled_at: Optional[datetime] = None,
+) -> None:
+    """Write the debit and credit of each settled transaction, in the caller's transaction."""
+    at = at or datetime.now(timezone.utc)
+    rows = []
+    for transaction in transactions:
+        rows.append(
+            {
+                "transaction_id": transaction.id,
+                "user_id": transaction.from_user_id,
+                "amount": -transaction.units,
+                "created_at": at,
+                "settled_at": settled_at,
+            }
+        )
+        rows.append(
+            {
+                "transaction_id": transaction.id,
+                "user_id": transaction.to_user_id,
+                "amount": transaction.units,
+                "created_at": at,
+                "settled_at": settled_at,
+            }
+        )
+    if rows:
+        # Core executemany: the generated ids are not needed back
+        db.connection().execute(SELLedgerEntry.__table__.insert(), rows)
+
+
+def _utc(moment: datetime) -> datetime:
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc)
+
+
+def _positions(
+    db: Session,
+    user_ids: Optional[List[UUID]] = None,
+    as_of: Optional[datetime] = None,
+    through_entry: Optional[int] = None,
+) -> Dict[UUID, Dict[str, Any]]:
+    """
+    Latest snapshot plus the entries after it, per user: one query for the
+    snapshots and one grouped query for the deltas. Users without any
+    snapshot start from the opening balance; users with neither a snapshot
+    nor entries are absent; "moved" tells whether entries followed the
+    snapshot.
+    """
+    latest = select(
+        SELBalanceSnapshot.user_id,
+        func.max(SELBalanceSnapshot.last_entry_id).label("last_entry_id"),
+    ).group_by(SELBalanceSnapshot.user_id)
+    if user_ids is not None:
+        latest = latest.where(SELBalanceSnapshot.user_id.in_(user_ids))
+    if as_of is not None:
+        latest = latest.where(SELBalanceSnapshot.taken_at <= as_of)
+    if through_entry is not None:
+        latest = latest.where(SELBalanceSnapshot.last_entry_id <= through_entry)
+    latest = latest.subquery()
+
+    positions: Dict[UUID, Dict[str, Any]] = {}
+    snapshots = db.execute(
+        select(SELBalanceSnapshot).join(
+            latest,
+            and_(
+                SELBalanceSnapshot.user_id == latest.c.user_id,
+                SELBalanceSnapshot.last_entry_id == latest.c.last_entry_id,
+            ),
+        )
+    ).scalars()
+    for snapshot in snapshots:
+        positions[snapshot.user_id] = {
+            "balance": snapshot.balance,
+            "total_given": snapshot.total_given,
+            "total_received": snapshot.total_received,
+            "updated_at": snapshot.taken_at,
+            "moved": False,
+        }
+
+    amount = SELLedgerEntry.amount
+    deltas = (
+        select(
+            SELLedgerEntry.user_id,
+            func.sum(amount),
+            func.sum(case((amount < 0, -amount), else_=0)),
+            func.sum(case((amount > 0, amount), else_=0)),
+            func.max(SELLedgerEntry.created_at),
+        )
+        .outerjoin(latest, latest.c.user_id == SELLedgerEntry.user_id)
+        .where(SELLedgerEntry.id > func.coalesce(latest.c.last_entry_id, 0))
+        .group_by(SELLedgerEntry.user_id)
+    )
+    if user_ids is not None:
+        deltas = deltas.where(SELLedgerEntry.user_id.in_(user_ids))
+    if as_of is not None:
+        deltas = deltas.where(SELLedgerEntry.created_at <= as_of)
+    if through_entry is not None:
+        deltas = deltas.where(SELLedgerEntry.id <= through_entry)
+    for user_id, net, given, received, last_at in db.execute(deltas):
+        position = positions.setdefault(
+            user_id,
+            {
+                "balance": OPENING_BALANCE,
+                "total_given": 0,
+                "total_received": 0,
+                "updated_at": None,
+            },
+        )
+        position["balance"] += net
+        position["total_given"] += given
+        position["total_received"] += received
+        position["updated_at"] = last_at
+        position["moved"] = True
+    return positions
+
+
+def ledger_balance(
+    db: Session, user_id: UUID, as_of: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """A user's balance and totals now, or as they stood at `as_of`."""
+    as_of = _utc(as_of) if as_of else None
+    position = _positions(db, [user_id], as_of=as_of).get(user_id, {})
+    return {
+        "user_id": user_id,
+        "balance": position.get("balance", OPENING_BALANCE),
+        "total_given": position.get("total_given", 0),
+        "total_received": position.get("total_received", 0),
+        "updated_at": position.get("updated_at") or as_of or datetime.now(timezone.utc),
+    }
+
+
+def take_snapshots(db: Session, now: Optional[datetime] = None) -> int:
+    """
+    Snapshot every user with entries since their last snapshot, up to the
+    newest entry older than SNAPSHOT_SETTLE_SECONDS. Returns how many
+    snapshots were written.
+    """
+    cutoff = _utc(now or datetime.now(timezone.utc)) - timedelta(
+        seconds=SNAPSHOT_SETTLE_SECONDS
+    )
+    boundary = db.execute(
+        select(func.max(SELLedgerEntry.id)).where(SELLedgerEntry.created_at <= cutoff)
+    ).scalar()
+    if boundary is None:
+        return 0
+    snapshots = [
+        {
+            "user_id": user_id,
+            "last_entry_id": boundary,
+            "balance": position["balance"],
+            "total_given": position["total_given"],
+            "total_received": position["total_received"],
+            "taken_at": cutoff,
+        }
+        for user_id, position in _positions(db, through_entry=boundary).items()
+        if position["moved"]
+    ]
+    if snapshots:
+        db.execute(insert(SELBalanceSnapshot), snapshots)
+    db.commit()
+    return len(snapshots)
+
+
+def backfill_ledger(db: Session) -> int:
+    """
+    Record settled transactions approved before the ledger existed. They are
+    recorded now, with their settlement date in settled_at: snapshots take
+    their boundary from created_at and assume it follows the id order.
+    """
+    missing = (
+        db.query(SELTransaction)
+        .filter(
+            SELTransaction.status.in_(SETTLED_STATUSES),
+            ~exists().where(SELLedgerEntry.transaction_id == SELTransaction.id),
+        )
+        .order_by(SELTransaction.completed_at, SELTransaction.created_at)
+        .all()
+    )
+    at = datetime.now(timezone.utc)
+    for transaction in missing:
+        record_entries(
+            db,
+            [transaction],
+            at=at,
+            settled_at=transaction.completed_at or transaction.created_at,
+        )
+    db.commit()
+    return len(missing)
+
+
+def verify_ledger(db: Session) -> Dict[str, Any]:
+    """
+    Replay the whole ledger from the opening balances and compare it with
+    sel_balances and with the snapshot-based reads. Also reports settled
+    transactions whose entries are missing or do not cancel out.
+    """
+    amount = SELLedgerEntry.amount
+    replayed: Dict[UUID, tuple] = {
+        user_id: (OPENING_BALANCE + net, given, received)
+        for user_id, net, given, received in db.execute(
+            select(
+                SELLedgerEntry.user_id,
+                func.sum(amount),
+                func.sum(case((amount < 0, -amount), else_=0)),
+                func.sum(case((amount > 0, amount), else_=0)),
+            ).group_by(SELLedgerEntry.user_id)
+        )
+    }
+    opening = (OPENING_BALANCE, 0, 0)
+    stored = {
+        user_id: (balance, given, received)
+        for user_id, balance, given, received in db.execute(
+            select(
+                SELBalance.user_id,
+                SELBalance.balance,
+                SELBalance.total_given,
+                SELBalance.total_received,
+            )
+        )
+    }
+    snapshot_reads = {
+        user_id: (p["balance"], p["total_given"], p["total_received"])
+        for user_id, p in _positions(db).items()
+    }
+
+    drifted = sorted(
+        str(user_id)
+        for user_id in set(replayed) | set(stored)
+        if stored.get(user_id, opening) != replayed.get(user_id, opening)
+        or snapshot_reads.get(user_id, opening) != replayed.get(user_id, opening)
+    )
+    unbalanced = [
+        str(transaction_id)
+        for (transaction_id,) in db.execute(
+            select(SELLedgerEntry.transaction_id)
+            .group_by(SELLedgerEntry.transaction_id)
+            .having((func.sum(amount) != 0) | (func.count() != 2))
+        )
+    ]
+    unrecorded = db.execute(
+        select(func.count(SELTransaction.id)).where(
+            SELTransaction.status.in_(SETTLED_STATUSES),
+            ~exists().where(SELLedgerEntry.transaction_id == SELTransaction.id),
+        )
+    ).scalar()
+    return {
+        "users": len(set(replayed) | set(stored)),
+        "drifted": drifted,
+        "unbalanced_transactions": unbalanced,
+        "unrecorded_transactions": unrecorded,
+    }
@@ -1,12 +1,103 @@
-from typing import List, Optional
+import os
+import random
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Set
 from uuid import UUID
 
 from fastapi import HTTPException
-from sqlalchemy import and_, desc, func, or_
-from sqlalchemy.orm import Session
-
+from prometheus_client import Histogram
+from sqlalchemy import and_, case, desc, event, func, or_, select, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
+
+from .caching import SnapshotCache
+from .db_types import dialect_insert
 from .models_stage1 import SELBalance, SELCategory, SELService, SELTransaction, User
-from .schemas_stage1 import SELServiceCreate, SELTransactionCreate
+from .schemas_stage1 import SELServiceCreate, SELServiceUpdate, SELTransactionCreate
+from .sel_ledger import ledger_balance, record_entries
+
+# Belgian SEL limits, also enforced by the balance_limits CHECK constraint
+SEL_BALANCE_MIN = -300
+SEL_BALANCE_MAX = 600
+# Approvals losing a serialization race or a deadlock are run again
+SEL_APPROVAL_ATTEMPTS = 3
+# PostgreSQL serialization_failure and deadlock_detected
+RETRYABLE_SQLSTATES = {"40001", "40P01"}
+
+# Dashboard "available services": the newest active services, shared by every
+# parent and filtered per user. Fresh for TTL, then served stale while it is
+# recomputed in the background for up to STALE more seconds. Creating or
+# updating a service invalidates this instance's copy; other replicas catch up
+# within the TTL.
+SEL_DASHBOARD_SERVICES = 20
+SEL_DASHBOARD_SERVICES_CACHED = 100
+SEL_DASHBOARD_SERVICES_TTL_SECONDS = float(
+    os.getenv("SEL_DASHBOARD_SERVICES_TTL_SECONDS", "60")
+)
+SEL_DASHBOARD_SERVICES_STALE_SECONDS = float(
+    os.getenv("SEL_DASHBOARD_SERVICES_STALE_SECONDS", "300")
+)
+AVAILABLE_SERVICES_KEY = "available_services"
+
+available_services_cache = SnapshotCache(
+    ttl_seconds=SEL_DASHBOARD_SERVICES_TTL_SECONDS,
+    stale_seconds=SEL_DASHBOARD_SERVICES_STALE_SECONDS,
+)
+
+ecolehub_sel_dashboard_duration = Histogram(
+    "ecolehub_sel_dashboard_duration_seconds",
+    "Time spent on each section of the SEL dashboard",
+    ["section"],
+)
+
+# Session.info key of the per-session balance cache (user_id -> SELBalance)
+BALANCE_CACHE_KEY = "sel_balances"
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_cached_balances(session: Session, previous_transaction) -> None:
+    # Rows created in the rolled back transaction no longer exist
+    session.info.pop(BALANCE_CACHE_KEY, None)
+
+
+class _SettlementConflict(Exception):
+    """A row changed between planning a settlement and applying it."""
+
+
+def _is_retryable(error: OperationalError) -> bool:
+    if getattr(error.orig, "pgcode", None) in RETRYABLE_SQLSTATES:
+        return True
+    # SQLite reports lock contention it could not wait out as "locked"
+    return "database is locked" in str(error.orig)
+
+
+def _serialize_service(service: SELService) -> Dict[str, Any]:
+    # Plain values (SELServiceWithOwner shape): snapshots outlive the session
+    owner = service.user
+    return {
+        "id": service.id,
+        "user_id": service.user_id,
+        "provider_id": service.user_id,
+        "title": service.title,
+        "description": service.description,
+        "category": service.category,
+        "units_per_hour": service.units_per_hour,
+        "is_active": service.is_active,
+        "created_at": service.created_at,
+        "updated_at": service.updated_at,
+        "user": {
+            "id": owner.id,
+            "email": owner.email,
+            "first_name": owner.first_name,
+            "last_name": owner.last_name,
+            "is_active": owner.is_active,
+            "is_verified": owner.is_verified,
+            "created_at": owner.created_at,
+        },
+    }
 
 
 class SELBusinessLogic:
@@ -20,17 +111,41 @@ class SELBusinessLogic:
 
     # Balance Management
     def get_or_create_balance(self, user_id: UUID) -> SELBalance:
-        """Get user balance or create with initial 120 units."""
-        balance = (
-            self.db.query(SELBalance).filter(SELBalance.user_id == user_id).first()
-        )
-        if not balance:
-            balance = SELBalance(user_id=user_id, balance=120)
-            self.db.add(balance)
-            self.db.commit()
-            self.db.refresh(balance)
+        """
+        Get user balance or create it with the initial 120 units.
+        A missing row is created with INSERT .. ON CONFLICT DO NOTHING
+        RETURNING in the caller's transaction (nothing is committed here), so
+        concurrent first uses cannot collide. Rows are cached on the session
+        for the rest of the request.
+        """
+        cache = self.db.info.setdefault(BALANCE_CACHE_KEY, {})
+        balance = cache.get(user_id)
+        if balance is not None:
+            return balance
+
+        query = self.db.query(SELBalance).filter(SELBalance.user_id == user_id)
+        balance = query.first()
+        if balance is None:
+            insert = dialect_insert(self.db)
+            balance = self.db.scalars(
+                insert(SELBalance)
+                .values(user_id=user_id, balance=120)
+                .on_conflict_do_nothing(index_elements=["user_id"])
+                .returning(SELBalance)
+            ).first()
+            if balance is None:
+                # Created by a concurrent request in the meantime
+                balance = query.first()
+        cache[user_id] = balance
         return balance
 
+    def get_balance(self, user_id: UUID, as_of: Optional[datetime] = None) -> dict:
+        """
+        Balance and totals from the ledger (latest snapshot plus later
+        entries), now or at a point in time.
+        """
+        return ledger_balance(self.db, user_id, as_of)
+
     def validate_transaction_balance(
         self, from_user_id: UUID, to_user_id: UUID, units: int
     ) -> dict:
@@ -46,14 +161,14 @@ class SELBusinessLogic:
         new_to_balance = to_balance.balance + units
 
         # Check Belgian limits: -300 to +600
-        if new_from_balance < -300:
+        if new_from_balance < SEL_BALANCE_MIN:
             return {
                 "valid": False,
                 "message": f"Transaction refusée: votre solde deviendrait {new_from_balance} unités (limite: -300)",
                 "balances": {"from": from_balance.balance, "to": to_balance.balance},
             }
 
-        if new_to_balance > 600:
+        if new_to_balance > SEL_BALANCE_MAX:
             return {
                 "valid": False,
                 "message": f"Transaction refusée: le destinataire dépasserait {new_to_balance} unités (limite: +600)",
@@ -113,14 +228,31 @@ class SELBusinessLogic:
         self.db.add(service)
         self.db.commit()
         self.db.refresh(service)
+        available_services_cache.invalidate()
+        return service
+
+    def update_service(
+        self, service_id: UUID, user_id: UUID, update: SELServiceUpdate
+    ) -> SELService:
+        """Update one of the user's own services."""
+        service = self.db.get(SELService, service_id)
+        if not service:
+            raise HTTPException(status_code=404, detail="Service non trouvé")
+        if service.user_id != user_id:
+            raise HTTPException(
+                status_code=403, detail="Vous ne pouvez modifier que vos services"
+            )
+        for field, value in update.model_dump(exclude_unset=True).items():
+            setattr(service, field, value)
+        self.db.commit()
+        self.db.refresh(service)
+        available_services_cache.invalidate()
         return service
 
     def get_available_services(
         self, requesting_user_id: UUID, category: Optional[str] = None, limit: int = 50
     ) -> List[SELService]:
         """Get available services (excluding own services) with user information."""
-        from sqlalchemy.orm import joinedload
-
         query = (
             self.db.query(SELService)
             .options(joinedload(SELService.user))
@@ -205,13 +337,31 @@ class SELBusinessLogic:
     ) -> SELTransaction:
         """
         Approve a transaction and update balances.
-        Only the recipient (to_user) can approve.
+        Only the recipient (to_user) can approve. The status change and both
+        balance moves are conditional UPDATEs in one database transaction,
+        so concurrent approvals against the same account cannot overdraw it;
+        serialization failures and deadlocks are retried.
         """
-        transaction = (
-            self.db.query(SELTransaction)
-            .filter(SELTransaction.id == transaction_id)
-            .first()
-        )
+        for attempt in range(1, SEL_APPROVAL_ATTEMPTS + 1):
+            try:
+                self._settle_transaction(transaction_id, approving_user_id)
+                self.db.commit()
+                break
+            except OperationalError as e:
+                self.db.rollback()
+                if not _is_retryable(e) or attempt == SEL_APPROVAL_ATTEMPTS:
+                    raise
+                time.sleep(random.uniform(0, 0.05 * attempt))
+            except HTTPException:
+                self.db.rollback()
+                raise
+
+        transaction = self.db.get(SELTransaction, transaction_id)
+        self.db.refresh(transaction)
+        return transaction
+
+    def _settle_transaction(self, transaction_id: UUID, approving_user_id: UUID):
+        transaction = self.db.get(SELTransaction, transaction_id)
         if not transaction:
             raise HTTPException(status_code=404, detail="Transaction non trouvée")
 
@@ -222,39 +372,249 @@ class SELBusinessLogic:
                 detail="Seul le destinataire peut approuver cette transaction",
             )
 
-        if transaction.status != "pending":
+        from_user_id, to_user_id = transaction.from_user_id, transaction.to_user_id
+        units = transaction.units
+        self.get_or_create_balance(from_user_id)
+        self.get_or_create_balance(to_user_id)
+
+        # Claim the pending transaction: a concurrent approval matches no row
+        claimed = self.db.execute(
+            update(SELTransaction)
+            .where(
+                SELTransaction.id == transaction_id, SELTransaction.status == "pending"
+            )
+            .values(status="approved", completed_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        if claimed.rowcount == 0:
+            self.db.rollback()
+            self.db.refresh(transaction)
             raise HTTPException(
                 status_code=400, detail=f"Transaction déjà {transaction.status}"
             )
 
-        # Re-validate balance limits (in case balances changed)
-        validation = self.validate_transaction_balance(
-            transaction.from_user_id, transaction.to_user_id, transaction.units
+        # Fixed lock order (by user id) so opposite transfers cannot deadlock
+        moves = {
+            from_user_id: (
+                -units,
+                SELBalance.balance - units >= SEL_BALANCE_MIN,
+                {"total_given": SELBalance.total_given + units},
+            ),
+            to_user_id: (
+                units,
+                SELBalance.balance + units <= SEL_BALANCE_MAX,
+                {"total_received": SELBalance.total_received + units},
+            ),
+        }
+        for user_id in sorted(moves, key=str):
+            delta, within_limits, totals = moves[user_id]
+            moved = self.db.execute(
+                update(SELBalance)
+                .where(SELBalance.user_id == user_id, within_limits)
+                .values(balance=SELBalance.balance + delta, **totals)
+                .execution_options(synchronize_session=False)
+            )
+            if moved.rowcount == 0:
+                # Explain with the committed balances, not the half-applied ones
+                self.db.rollback()
+                self.db.expire_all()
+                validation = self.validate_transaction_balance(
+                    from_user_id, to_user_id, units
+                )
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Transaction impossible: {validation['message']}",
+                )
+        record_entries(self.db, [transaction])
+        self.db.expire_all()
+
+    def settle_transactions(
+        self,
+        transaction_ids: List[UUID],
+        settling_user_id: UUID,
+        is_coordinator: bool = False,
+    ) -> List[dict]:
+        """
+        Approve many pending transactions in one database transaction.
+        Coordinators may settle any transaction, others only those they
+        receive. Transactions are applied oldest first; one that would push
+        a balance past the limits is rejected and the rest still go
+        through. Balances move with a single conditional UPDATE; if a
+        concurrent change invalidates the plan, the whole batch is retried.
+        """
+        for attempt in range(1, SEL_APPROVAL_ATTEMPTS + 1):
+            try:
+                results = self._settle_batch(
+                    transaction_ids, settling_user_id, is_coordinator
+                )
+                self.db.commit()
+                return results
+            except (OperationalError, _SettlementConflict) as e:
+                self.db.rollback()
+                retryable = isinstance(e, _SettlementConflict) or _is_retryable(e)
+                if not retryable or attempt == SEL_APPROVAL_ATTEMPTS:
+                    raise HTTPException(
+                        status_code=409,
+                        detail="Règlement interrompu par une modification concurrente",
+                    )
+                time.sleep(random.uniform(0, 0.05 * attempt))
+
+    def _settle_batch(
+        self, transaction_ids: List[UUID], settling_user_id: UUID, is_coordinator: bool
+    ) -> List[dict]:
+        found = {
+            transaction.id: transaction
+            for transaction in self.db.query(SELTransaction)
+            .filter(SELTransaction.id.in_(transaction_ids))
+            .with_for_update()
+            .populate_existing()
+        }
+        results, settleable = self._triage(
+            transaction_ids, found, settling_user_id, is_coordinator
         )
+        settleable.sort(key=lambda t: (t.created_at is None, t.created_at, str(t.id)))
 
-        if not validation["valid"]:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Transaction impossible: {validation['message']}",
+        balances = self._lock_balances(
+            {t.from_user_id for t in settleable} | {t.to_user_id for t in settleable}
+        )
+        moves: Dict[UUID, List[int]] = {}  # user -> [delta, given, received]
+        approved = []
+        for transaction in settleable:
+            units = transaction.units
+            payer = balances[transaction.from_user_id] - units
+            payee = balances[transaction.to_user_id] + units
+            if payer < SEL_BALANCE_MIN:
+                results[transaction.id] = (
+                    400,
+                    f"Transaction refusée: votre solde deviendrait {payer} unités "
+                    f"(limite: {SEL_BALANCE_MIN})",
+                )
+                continue
+            if payee > SEL_BALANCE_MAX:
+                results[transaction.id] = (
+                    400,
+                    f"Transaction refusée: le destinataire dépasserait {payee} unités "
+                    f"(limite: +{SEL_BALANCE_MAX})",
+                )
+                continue
+            balances[transaction.from_user_id] = payer
+            balances[transaction.to_user_id] = payee
+            moves.setdefault(transaction.from_user_id, [0, 0, 0])
+            moves.setdefault(transaction.to_user_id, [0, 0, 0])
+            moves[transaction.from_user_id][0] -= units
+            moves[transaction.from_user_id][1] += units
+            moves[transaction.to_user_id][0] += units
+            moves[transaction.to_user_id][2] += units
+            results[transaction.id] = (200, "Transaction approuvée")
+            approved.append(transaction)
+
+        if approved:
+            approved_ids = [transaction.id for transaction in approved]
+            record_entries(self.db, approved)
+            self._apply_moves(moves)
+            claimed = self.db.execute(
+                update(SELTransaction)
+                .where(
+                    SELTransaction.id.in_(approved_ids),
+                    SELTransaction.status == "pending",
+                )
+                .values(status="approved", completed_at=func.now())
+                .execution_options(synchronize_session=False)
+            )
+            if claimed.rowcount != len(approved):
+                raise _SettlementConflict()
+        return [
+            {
+                "transaction_id": transaction_id,
+                "status_code": results[transaction_id][0],
+                "detail": results[transaction_id][1],
+            }
+            for transaction_id in transaction_ids
+        ]
+
+    @staticmethod
+    def _triage(
+        transaction_ids: List[UUID],
+        found: Dict[UUID, SELTransaction],
+        settling_user_id: UUID,
+        is_coordinator: bool,
+    ):
+        """Per-item errors, and the transactions left to settle (deduplicated)."""
+        results = {}
+        settleable = []
+        for transaction_id in transaction_ids:
+            transaction = found.get(transaction_id)
+            if transaction is None:
+                results[transaction_id] = (404, "Transaction non trouvée")
+            elif not is_coordinator and transaction.to_user_id != settling_user_id:
+                results[transaction_id] = (
+                    403,
+                    "Seul le destinataire peut approuver cette transaction",
+                )
+            elif transaction.status != "pending":
+                results[transaction_id] = (
+                    400,
+                    f"Transaction déjà {transaction.status}",
+                )
+            elif transaction_id not in results:
+                results[transaction_id] = None
+                settleable.append(transaction)
+        return results, settleable
+
+    def _lock_balances(self, user_ids: Set[UUID]) -> Dict[UUID, int]:
+        """Current balance per user, creating missing rows; locked in id order."""
+        if not user_ids:
+            return {}
+        insert = dialect_insert(self.db)
+        self.db.execute(
+            insert(SELBalance)
+            .values(
+                [
+                    {"id": uuid.uuid4(), "user_id": user_id, "balance": 120}
+                    for user_id in user_ids
+                ]
+            )
+            .on_conflict_do_nothing(index_elements=["user_id"])
+        )
+        rows = (
+            self.db.query(SELBalance.user_id, SELBalance.balance)
+            .filter(SELBalance.user_id.in_(user_ids))
+            .order_by(SELBalance.user_id)
+            .with_for_update()
+        )
+        return {user_id: balance for user_id, balance in rows}
+
+    def _apply_moves(self, moves: Dict[UUID, List[int]]) -> None:
+        # One statement for every balance; the limit check is repeated in SQL
+        # so a balance changed since it was read stops the batch instead of
+        # being overwritten
+        def per_user(index):
+            return case(
+                *[
+                    (SELBalance.user_id == user_id, move[index])
+                    for user_id, move in moves.items()
+                ],
+                else_=0,
             )
 
-        # Update balances
-        from_balance = self.get_or_create_balance(transaction.from_user_id)
-        to_balance = self.get_or_create_balance(transaction.to_user_id)
-
-        from_balance.balance -= transaction.units
-        from_balance.total_given += transaction.units
-
-        to_balance.balance += transaction.units
-        to_balance.total_received += transaction.units
-
-        # Update transaction
-        transaction.status = "approved"
-        transaction.completed_at = func.now()
-
-        self.db.commit()
-        self.db.refresh(transaction)
-        return transaction
+        new_balance = SELBalance.balance + per_user(0)
+        moved = self.db.execute(
+            update(SELBalance)
+            .where(
+                SELBalance.user_id.in_(moves),
+                new_balance >= SEL_BALANCE_MIN,
+                new_balance <= SEL_BALANCE_MAX,
+            )
+            .values(
+                balance=new_balance,
+                total_given=SELBalance.total_given + per_user(1),
+                total_received=SELBalance.total_received + per_user(2),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if moved.rowcount != len(moves):
+            raise _SettlementConflict()
+        self.db.expire_all()
 
     def cancel_transaction(
         self, transaction_id: UUID, cancelling_user_id: UUID
@@ -292,35 +652,58 @@ class SELBusinessLogic:
         return transaction
 
     # Dashboard and Statistics
-    def get_user_dashboard(self, user_id: UUID) -> dict:
-        """Get SEL dashboard data for a user."""
-        balance = self.get_or_create_balance(user_id)
+    def get_user_dashboard(
+        self, user_id: UUID, refresh: Optional[Callable[[], List[dict]]] = None
+    ) -> dict:
+        """
+        Get SEL dashboard data for a user.
+        Both counts come from one statement and recent transactions load
+        their users and service in the same query. Available services are
+        served from the shared snapshot; `refresh` rebuilds it in the
+        background with its own session once stale. Per-section durations
+        are returned under "timings" (seconds) and observed in Prometheus.
+        """
+        timings = {}
+        start = time.perf_counter()
+
+        def lap(section):
+            nonlocal start
+            now = time.perf_counter()
+            timings[section] = now - start
+            ecolehub_sel_dashboard_duration.labels(section=section).observe(
+                timings[section]
+            )
+            start = now
+
+        balance = self.get_balance(user_id)
+        lap("balance")
 
-        # Count active services
         active_services = (
-            self.db.query(func.count(SELService.id))
-            .filter(and_(SELService.user_id == user_id, SELService.is_active))
-            .scalar()
+            select(func.count(SELService.id))
+            .where(SELService.user_id == user_id, SELService.is_active)
+            .scalar_subquery()
         )
-
-        # Count pending transactions
         pending_transactions = (
-            self.db.query(func.count(SELTransaction.id))
-            .filter(
-                and_(
-                    or_(
-                        SELTransaction.from_user_id == user_id,
-                        SELTransaction.to_user_id == user_id,
-                    ),
-                    SELTransaction.status == "pending",
-                )
+            select(func.count(SELTransaction.id))
+            .where(
+                or_(
+                    SELTransaction.from_user_id == user_id,
+                    SELTransaction.to_user_id == user_id,
+                ),
+                SELTransaction.status == "pending",
             )
-            .scalar()
+            .scalar_subquery()
         )
+        counts = self.db.execute(select(active_services, pending_transactions)).one()
+        lap("counts")
 
-        # Recent transactions
         recent_transactions = (
             self.db.query(SELTransaction)
+            .options(
+                joinedload(SELTransaction.from_user),
+                joinedload(SELTransaction.to_user),
+                joinedload(SELTransaction.service),
+            )
             .filter(
                 or_(
                     SELTransaction.from_user_id == user_id,
@@ -331,18 +714,119 @@ class SELBusinessLogic:
             .limit(10)
             .all()
         )
+        lap("recent_transactions")
 
-        # Available services from others
-        available_services = self.get_available_services(user_id, limit=20)
+        available_services = self._dashboard_services(user_id, refresh)
+        lap("available_services")
 
         return {
             "balance": balance,
-            "active_services": active_services,
-            "pending_transactions": pending_transactions,
+            "active_services": counts[0],
+            "pending_transactions": counts[1],
             "recent_transactions": recent_transactions,
             "available_services": available_services,
+            "timings": timings,
         }
 
+    def _dashboard_services(
+        self, user_id: UUID, refresh: Optional[Callable[[], List[dict]]]
+    ) -> List[dict]:
+        shared = available_services_cache.get(
+            AVAILABLE_SERVICES_KEY, self.load_dashboard_services, refresh
+        )
+        services = [s for s in shared if s["user_id"] != user_id]
+        if (
+            len(services) < SEL_DASHBOARD_SERVICES
+            and len(shared) == SEL_DASHBOARD_SERVICES_CACHED
+        ):
+            # The user owns most of the snapshot; older services may be missing
+            return [
+                _serialize_service(service)
+                for service in self.get_available_services(
+                    user_id, limit=SEL_DASHBOARD_SERVICES
+                )
+            ]
+        return services[:SEL_DASHBOARD_SERVICES]
+
+    def load_dashboard_services(self) -> List[dict]:
+        """Newest active services with their owners, for every user's dashboard."""
+        services = (
+            self.db.query(SELService)
+            .options(joinedload(SELService.user))
+            .filter(SELService.is_active)
+            .order_by(desc(SELService.created_at))
+            .limit(SEL_DASHBOARD_SERVICES_CACHED)
+        )
+        return [_serialize_service(service) for service in services]
+
     def get_categories(self) -> List[SELCategory]:
         """Get all SEL categories."""
         return self.db.query(SELCategory).order_by(SELCategory.name).all()
+
+
+class AsyncSELBusinessLogic:
+    """
+    Async variant of SELBusinessLogic for the opt-in async stack.
+    Rules are shared with the sync class through AsyncSession.run_sync.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def _run(self, method: str, *args, **kwargs):
+        return await self.db.run_sync(
+            lambda session: getattr(SELBusinessLogic(session), method)(*args, **kwargs)
+        )
+
+    async def get_or_create_balance(self, user_id: UUID) -> SELBalance:
+        return await self._run("get_or_create_balance", user_id)
+
+    async def get_balance(
+        self, user_id: UUID, as_of: Optional[datetime] = None
+    ) -> dict:
+        return await self._run("get_balance", user_id, as_of)
+
+    async def create_service(
+        self, user_id: UUID, service_data: SELServiceCreate
+    ) -> SELService:
+        return await self._run("create_service", user_id, service_data)
+
+    async def get_available_services(
+        self, requesting_user_id: UUID, category: Optional[str] = None, limit: int = 50
+    ) -> List[SELService]:
+        return await self._run(
+            "get_available_services", requesting_user_id, category, limit
+        )
+
+    async def create_transaction(
+        self, from_user_id: UUID, transaction_data: SELTransactionCreate
+    ) -> SELTransaction:
+        return await self._run("create_transaction", from_user_id, transaction_data)
+
+    async def approve_transaction(
+        self, transaction_id: UUID, approving_user_id: UUID
+    ) -> SELTransaction:
+        return await self._run("approve_transaction", transaction_id, approving_user_id)
+
+    async def settle_transactions(
+        self,
+        transaction_ids: List[UUID],
+        settling_user_id: UUID,
+        is_coordinator: bool = False,
+    ) -> List[dict]:
+        return await self._run(
+            "settle_transactions", transaction_ids, settling_user_id, is_coordinator
+        )
+
+    async def update_service(
+        self, service_id: UUID, user_id: UUID, update: SELServiceUpdate
+    ) -> SELService:
+        return await self._run("update_service", service_id, user_id, update)
+
+    async def get_user_dashboard(
+        self, user_id: UUID, refresh: Optional[Callable[[], List[dict]]] = None
+    ) -> dict:
+        return await self._run("get_user_dashboard", user_id, refresh)
+
+    async def get_categories(self) -> List[SELCategory]:
+        return await self._run("get_categories")
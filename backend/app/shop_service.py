@@ -4,17 +4,33 @@ Collaborative purchasing for EcoleHub families
 """
 
 from decimal import Decimal
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from uuid import UUID
 
 from fastapi import HTTPException
-from sqlalchemy import and_, func
+from sqlalchemy import and_, func, text
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from .models_stage3 import ShopInterest, ShopOrder, ShopOrderItem, ShopProduct
+from .db_types import dialect_insert
+from .models_stage3 import (
+    ShopInterest,
+    ShopInterestCounter,
+    ShopOrder,
+    ShopOrderItem,
+    ShopProduct,
+)
 from .mollie_service import mollie_service
 
 
+def _interest_progress(total_interest: int, min_quantity: int) -> Tuple[float, bool]:
+    """Return (progress percentage, can_order) for a group buying threshold."""
+    progress_percentage = (
+        min((total_interest / min_quantity) * 100, 100) if min_quantity > 0 else 100
+    )
+    return progress_percentage, total_interest >= min_quantity
+
+
 class ShopCollaborativeService:
     """
     Service for collaborative buying system
@@ -38,6 +54,148 @@ class ShopCollaborativeService:
 
         return query.order_by(ShopProduct.created_at.desc()).all()
 
+    def get_catalogue(
+        self, user_id: UUID, category: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get active products with interest aggregates and the user's own interest.
+        Runs a fixed number of queries whatever the size of the catalogue.
+        """
+        query = (
+            self.db.query(
+                ShopProduct,
+                func.coalesce(ShopInterestCounter.total_quantity, 0),
+                func.coalesce(ShopInterestCounter.participants_count, 0),
+            )
+            .outerjoin(
+                ShopInterestCounter, ShopInterestCounter.product_id == ShopProduct.id
+            )
+            .filter(ShopProduct.is_active)
+        )
+        if category:
+            query = query.filter(ShopProduct.category == category)
+        rows = query.order_by(ShopProduct.created_at.desc()).all()
+
+        # The caller's own interests (any status), fetched once for all products
+        user_interests = {
+            interest.product_id: interest
+            for interest in self.db.query(ShopInterest)
+            .filter(ShopInterest.user_id == user_id)
+            .all()
+        }
+
+        catalogue = []
+        for product, total_interest, interested_users_count in rows:
+            total_interest = int(total_interest)
+            progress_percentage, can_order = _interest_progress(
+                total_interest, product.min_quantity
+            )
+            catalogue.append(
+                {
+                    "product": product,
+                    "total_interest": total_interest,
+                    "interested_users_count": int(interested_users_count),
+                    "progress_percentage": round(progress_percentage, 1),
+                    "can_order": can_order,
+                    "user_interest": user_interests.get(product.id),
+                }
+            )
+        return catalogue
+
+    def get_interest_totals(self, product_id: UUID) -> Tuple[int, int]:
+        """Get (total interested quantity, participants) from the counters."""
+        counter = (
+            self.db.query(
+                ShopInterestCounter.total_quantity,
+                ShopInterestCounter.participants_count,
+            )
+            .filter(ShopInterestCounter.product_id == product_id)
+            .first()
+        )
+        if not counter:
+            return 0, 0
+        return counter.total_quantity, counter.participants_count
+
+    def _apply_interest_delta(
+        self, product_id: UUID, quantity_delta: int, participants_delta: int
+    ) -> None:
+        """
+        Adjust the product interest counters inside the caller's transaction.
+        The counter row is created on first use; the increment itself is a
+        single UPDATE so concurrent writers never lose an update.
+        """
+        insert = dialect_insert(self.db)
+        self.db.execute(
+            insert(ShopInterestCounter)
+            .values(product_id=product_id, total_quantity=0, participants_count=0)
+            .on_conflict_do_nothing(index_elements=["product_id"])
+        )
+        self.db.query(ShopInterestCounter).filter(
+            ShopInterestCounter.product_id == product_id
+        ).update(
+            {
+                ShopInterestCounter.total_quantity: ShopInterestCounter.total_quantity
+                + quantity_delta,
+                ShopInterestCounter.participants_count: ShopInterestCounter.participants_count
+                + participants_delta,
+            },
+            synchronize_session=False,
+        )
+
+    def rebuild_interest_counters(self) -> Dict[str, int]:
+        """
+        Rebuild every product counter from shop_interests.
+        Returns the number of products counted and how many counters drifted.
+        """
+        if self.db.get_bind().dialect.name == "postgresql":
+            # Block concurrent counter updates while the table is rebuilt
+            self.db.execute(text("LOCK TABLE shop_interest_counters IN EXCLUSIVE MODE"))
+
+        actual = {
+            row.product_id: (int(row.total_quantity), int(row.participants_count))
+            for row in self.db.query(
+                ShopInterest.product_id,
+                func.sum(ShopInterest.quantity).label("total_quantity"),
+                func.count(ShopInterest.id).label("participants_count"),
+            )
+            .filter(ShopInterest.status == "interested")
+            .group_by(ShopInterest.product_id)
+            .all()
+        }
+        stored = {
+            row.product_id: (row.total_quantity, row.participants_count)
+            for row in self.db.query(
+                ShopInterestCounter.product_id,
+                ShopInterestCounter.total_quantity,
+                ShopInterestCounter.participants_count,
+            ).all()
+        }
+        drifted = [
+            product_id
+            for product_id in set(actual) | set(stored)
+            if actual.get(product_id, (0, 0)) != stored.get(product_id, (0, 0))
+        ]
+
+        self.db.query(ShopInterestCounter).delete(synchronize_session=False)
+        if actual:
+            self.db.execute(
+                ShopInterestCounter.__table__.insert(),
+                [
+                    {
+                        "product_id": product_id,
+                        "total_quantity": total_quantity,
+                        "participants_count": participants_count,
+                    }
+                    for product_id, (
+                        total_quantity,
+                        participants_count,
+                    ) in actual.items()
+                ],
+            )
+        self.db.commit()
+
+        return {"products": len(actual), "drifted": len(drifted)}
+
     def get_product_with_interest_count(self, product_id: UUID) -> Dict[str, Any]:
         """Get product with current interest count and users."""
         product = (
@@ -46,20 +204,9 @@ class ShopCollaborativeService:
         if not product:
             raise HTTPException(status_code=404, detail="Produit non trouvé")
 
-        # Count total interest
-        total_interest = (
-            self.db.query(func.sum(ShopInterest.quantity))
-            .filter(
-                and_(
-                    ShopInterest.product_id == product_id,
-                    ShopInterest.status == "interested",
-                )
-            )
-            .scalar()
-            or 0
-        )
+        total_interest, interested_users_count = self.get_interest_totals(product_id)
 
-        # Count interested users
+        # Interested users, for display
         interested_users = (
             self.db.query(ShopInterest)
             .filter(
@@ -72,12 +219,9 @@ class ShopCollaborativeService:
         )
 
         # Calculate group buying progress
-        progress_percentage = (
-            min((total_interest / product.min_quantity) * 100, 100)
-            if product.min_quantity > 0
-            else 100
+        progress_percentage, can_order = _interest_progress(
+            total_interest, product.min_quantity
         )
-        can_order = total_interest >= product.min_quantity
 
         # Calculate Belgian price with tax
         tax_calculation = mollie_service.calculate_belgian_tax(
@@ -87,7 +231,7 @@ class ShopCollaborativeService:
         return {
             "product": product,
             "total_interest": total_interest,
-            "interested_users_count": len(interested_users),
+            "interested_users_count": interested_users_count,
             "min_quantity": product.min_quantity,
             "progress_percentage": round(progress_percentage, 1),
             "can_order": can_order,
@@ -132,11 +276,16 @@ class ShopCollaborativeService:
 
         if existing_interest:
             # Update existing interest
+            if existing_interest.status == "interested":
+                quantity_delta, participants_delta = (
+                    quantity - existing_interest.quantity,
+                    0,
+                )
+            else:
+                quantity_delta, participants_delta = quantity, 1
             existing_interest.quantity = quantity
             existing_interest.notes = notes
             existing_interest.status = "interested"
-            self.db.commit()
-            self.db.refresh(existing_interest)
 
             action = "updated"
             interest = existing_interest
@@ -150,23 +299,17 @@ class ShopCollaborativeService:
                 status="interested",
             )
             self.db.add(interest)
-            self.db.commit()
-            self.db.refresh(interest)
+            quantity_delta, participants_delta = quantity, 1
 
             action = "created"
 
+        # Interest row and counters change in the same transaction
+        self._apply_interest_delta(product_id, quantity_delta, participants_delta)
+        self.db.commit()
+        self.db.refresh(interest)
+
         # Check if we've reached minimum quantity for group order
-        total_interest = (
-            self.db.query(func.sum(ShopInterest.quantity))
-            .filter(
-                and_(
-                    ShopInterest.product_id == product_id,
-                    ShopInterest.status == "interested",
-                )
-            )
-            .scalar()
-            or 0
-        )
+        total_interest, _ = self.get_interest_totals(product_id)
 
         threshold_reached = total_interest >= product.min_quantity
 
@@ -204,6 +347,8 @@ class ShopCollaborativeService:
         if not interest:
             raise HTTPException(status_code=404, detail="Intérêt non trouvé")
 
+        if interest.status == "interested":
+            self._apply_interest_delta(product_id, -interest.quantity, -1)
         self.db.delete(interest)
         self.db.commit()
 
@@ -259,9 +404,10 @@ class ShopCollaborativeService:
             status="pending",
         )
 
+        # Flush for the id; the order, its items and the counter delta commit
+        # together below
         self.db.add(order)
-        self.db.commit()
-        self.db.refresh(order)
+        self.db.flush()
 
         # Create individual order items for each interested parent
         for interest in interests:
@@ -280,6 +426,8 @@ class ShopCollaborativeService:
             # Mark interest as confirmed
             interest.status = "confirmed"
 
+        # Confirmed interests no longer count towards the next group order
+        self._apply_interest_delta(product_id, -total_quantity, -len(interests))
         self.db.commit()
 
         # TODO: Create Celery task for Mollie payment processing
@@ -332,6 +480,51 @@ class ShopCollaborativeService:
         return [cat[0] for cat in categories if cat[0]]
 
 
+class AsyncShopCollaborativeService:
+    """
+    Async variant of ShopCollaborativeService for the opt-in async stack.
+    Group buying rules are shared with the sync class through run_sync.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def _run(self, method: str, *args, **kwargs):
+        return await self.db.run_sync(
+            lambda session: getattr(ShopCollaborativeService(session), method)(
+                *args, **kwargs
+            )
+        )
+
+    async def get_catalogue(
+        self, user_id: UUID, category: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        return await self._run("get_catalogue", user_id, category=category)
+
+    async def express_interest(
+        self,
+        user_id: UUID,
+        product_id: UUID,
+        quantity: int = 1,
+        notes: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        return await self._run("express_interest", user_id, product_id, quantity, notes)
+
+    async def cancel_interest(self, user_id: UUID, product_id: UUID) -> Dict[str, Any]:
+        return await self._run("cancel_interest", user_id, product_id)
+
+    async def create_group_order(
+        self, product_id: UUID, admin_user_id: UUID
+    ) -> Dict[str, Any]:
+        return await self._run("create_group_order", product_id, admin_user_id)
+
+    async def get_user_orders(self, user_id: UUID) -> List[Dict[str, Any]]:
+        return await self._run("get_user_orders", user_id)
+
+    async def get_product_categories(self) -> List[str]:
+        return await self._run("get_product_categories")
+
+
 # Global shop service function
 def get_shop_service(db: Session) -> ShopCollaborativeService:
     return ShopCollaborativeService(db)
@@ -0,0 +1,167 @@
+"""
+EcoleHub Stage 2 - Unread message counters
+One Redis hash per user (conversation -> unread count), kept on write so the
+badge is a single HGETALL however large the conversations are
+"""
+
+import logging
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+
+from .models_stage2 import ConversationParticipant, Message
+
+UNREAD_KEY_PREFIX = "unread:"
+
+
+def _key(user_id: Any) -> str:
+    return f"{UNREAD_KEY_PREFIX}{user_id}"
+
+
+class UnreadCounters:
+    """
+    Incremented for every other participant when a message is stored, reset
+    when a user opens the conversation. The database (messages newer than
+    last_read_at) stays the source of truth: reconcile() rewrites drifted
+    hashes from it with a compare-and-set, which also repairs increments lost
+    while Redis was unavailable without dropping ones made during the run.
+    """
+
+    def __init__(self, redis_client=None):
+        self.redis = redis_client
+
+    def record_message(
+        self, db: Session, conversation_id: UUID, sender_id: UUID
+    ) -> None:
+        """Count a new message as unread for everyone but its sender."""
+        self.record_messages(
+            db, [{"conversation_id": conversation_id, "user_id": sender_id}]
+        )
+
+    def record_messages(self, db: Session, messages: List[Dict[str, Any]]) -> None:
+        """
+        Count a batch of new messages (conversation_id, user_id as sender):
+        one participants query and one pipeline for the whole batch.
+        """
+        if self.redis is None or not messages:
+            return
+        try:
+            members: Dict[Any, List[Any]] = {}
+            for conversation_id, user_id in db.query(
+                ConversationParticipant.conversation_id,
+                ConversationParticipant.user_id,
+            ).filter(
+                ConversationParticipant.conversation_id.in_(
+                    {m["conversation_id"] for m in messages}
+                )
+            ):
+                members.setdefault(conversation_id, []).append(user_id)
+            pipe = self.redis.pipeline(transaction=False)
+            for message in messages:
+                conversation_id = message["conversation_id"]
+                for user_id in members.get(conversation_id, ()):
+                    if user_id != message["user_id"]:
+                        pipe.hincrby(_key(user_id), str(conversation_id), 1)
+            pipe.execute()
+        except Exception as e:
+            # reconcile() restores what is lost here
+            logging.error(f"❌ Unread counter update error: {e}")
+
+    def reset(self, user_id: UUID, conversation_id: UUID) -> None:
+        if self.redis is None:
+            return
+        try:
+            self.redis.hdel(_key(user_id), str(conversation_id))
+        except Exception as e:
+            logging.error(f"❌ Unread counter reset error: {e}")
+
+    def get(self, user_id: UUID) -> Dict[str, int]:
+        """Unread count per conversation (conversations with none are absent)."""
+        if self.redis is None:
+            return {}
+        counts = self.redis.hgetall(_key(user_id))
+        return {conversation: int(count) for conversation, count in counts.items()}
+
+    def reconcile(self, db: Session) -> Dict[str, int]:
+        """
+        Recompute every participant's counters in one grouped query and
+        rewrite the hashes that differ. Returns how many users were checked
+        and how many had drifted.
+        """
+        expected: Dict[str, Dict[str, int]] = {}
+        for user_id, conversation_id, count in self._unread_counts(db):
+            expected.setdefault(_key(user_id), {})[str(conversation_id)] = count
+
+        # Hashes that should now be empty are found with SCAN, which does not
+        # block Redis the way KEYS does
+        keys = list(set(expected) | set(self.redis.scan_iter(f"{UNREAD_KEY_PREFIX}*")))
+        pipe = self.redis.pipeline(transaction=False)
+        for key in keys:
+            pipe.hgetall(key)
+        drifted = [
+            key
+            for key, stored in zip(keys, pipe.execute())
+            if _counts(stored) != expected.get(key, {})
+        ]
+        for key in drifted:
+            self._rewrite(db, key)
+        return {"users": len(keys), "drifted": len(drifted)}
+
+    def _unread_counts(self, db: Session, user_id: Optional[UUID] = None):
+        query = (
+            db.query(
+                ConversationParticipant.user_id,
+                ConversationParticipant.conversation_id,
+                func.count(Message.id),
+            )
+            .join(
+                Message,
+                and_(
+                    Message.conversation_id == ConversationParticipant.conversation_id,
+                    Message.user_id != ConversationParticipant.user_id,
+                    or_(
+                        ConversationParticipant.last_read_at.is_(None),
+                        Message.created_at > ConversationParticipant.last_read_at,
+                    ),
+                ),
+            )
+            .group_by(
+                ConversationParticipant.user_id, ConversationParticipant.conversation_id
+            )
+        )
+        if user_id is not None:
+            query = query.filter(ConversationParticipant.user_id == user_id)
+        return query.all()
+
+    def _rewrite(self, db: Session, key: str) -> None:
+        """
+        Replace one user's hash with a compare-and-set. The hash is watched
+        before that user is recounted, so an increment landing before the
+        write aborts it and the count is taken again. (A message committed
+        before the recount whose increment lands after the write is counted
+        twice until the next run.)
+        """
+        user_id = UUID(key[len(UNREAD_KEY_PREFIX) :])
+
+        def rewrite(pipe):
+            wanted = {
+                str(conversation_id): count
+                for _, conversation_id, count in self._unread_counts(db, user_id)
+            }
+            stored = pipe.hgetall(key)
+            pipe.multi()
+            if _counts(stored) != wanted:
+                pipe.delete(key)
+                if wanted:
+                    pipe.hset(key, mapping=wanted)
+
+        self.redis.transaction(rewrite, key)
+
+
+def _counts(stored: Dict[str, Any]) -> Dict[str, int]:
+    return {field: int(count) for field, count in stored.items()}
+
+
+unread_counters = UnreadCounters()
@@ -2,78 +2,341 @@
 EcoleHub Stage 2 - WebSocket Manager for Real-time Communication
 """
 
+import asyncio
 import json
-from typing import Dict, List, Set
-from uuid import UUID
-
-import redis
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from uuid import UUID, uuid4
+
+import redis.asyncio as aioredis
 from fastapi import WebSocket, WebSocketDisconnect
+from prometheus_client import Counter, Gauge, Histogram
 from sqlalchemy.orm import Session
 from sqlalchemy.sql import func
 
-from .models_stage2 import ConversationParticipant, Message, User, UserStatus
+from .db_types import dialect_insert
+from .message_sink import message_sink
+from .models_stage2 import ConversationParticipant, User, UserStatus
+from .unread_counters import unread_counters
+
+# Frames buffered per socket before the client is treated as a slow consumer
+WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "256"))
+WS_SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", "5"))
+# "Try again later": the client reconnects and reloads missed history
+WS_CLOSE_SLOW_CONSUMER = 1013
+
+# Threads running the ORM work of WebSocket frames, off the event loop
+WS_DB_WORKERS = int(os.getenv("WS_DB_WORKERS", "4"))
+
+# user_status rows are written in one bulk upsert per interval; a connection
+# flapping within it costs a single row write
+WS_STATUS_FLUSH_INTERVAL = float(os.getenv("WS_STATUS_FLUSH_INTERVAL", "10"))
+WS_STATUS_BATCH_SIZE = 500
+
+# Typing indicators: at most one accepted event per user and conversation per
+# interval, one aggregated frame per conversation per tick, and typists who
+# go quiet for the TTL are dropped
+WS_TYPING_INTERVAL = float(os.getenv("WS_TYPING_INTERVAL", "2"))
+WS_TYPING_TICK = float(os.getenv("WS_TYPING_TICK", "0.5"))
+WS_TYPING_TTL = float(os.getenv("WS_TYPING_TTL", "6"))
+# Other instances drop our typists a TTL after receiving them, so the set is
+# republished while non-empty, well within the TTL
+WS_TYPING_HEARTBEAT = WS_TYPING_TTL / 3
+
+# Cross-instance delivery and presence
+WS_CONVERSATION_CHANNEL = "ws:conversation:"
+WS_USER_CHANNEL = "ws:user:"
+WS_PRESENCE_KEY = "ws:presence"
+WS_HEARTBEAT_INTERVAL = float(os.getenv("WS_HEARTBEAT_INTERVAL", "30"))
+# Users not refreshed by any instance for this long are offline
+WS_PRESENCE_TTL = float(os.getenv("WS_PRESENCE_TTL", "90"))
+
+ecolehub_ws_connections = Gauge(
+    "ecolehub_ws_connections", "WebSocket connections open on this instance"
+)
+ecolehub_ws_backplane_messages = Counter(
+    "ecolehub_ws_backplane_messages_total",
+    "Frames exchanged with other instances over Redis pub/sub",
+    ["direction"],
+)
+ecolehub_ws_db_duration = Histogram(
+    "ecolehub_ws_db_duration_seconds",
+    "Database work triggered by WebSocket frames, including executor wait",
+    ["operation"],
+)
+ecolehub_ws_status_updates = Counter(
+    "ecolehub_ws_status_updates_total",
+    "Online/offline transitions, by whether they reached user_status",
+    ["result"],
+)
+ecolehub_ws_typing_events = Counter(
+    "ecolehub_ws_typing_events_total",
+    "Typing events received, by whether they changed what others see",
+    ["result"],
+)
+ecolehub_ws_typing_frames = Counter(
+    "ecolehub_ws_typing_frames_total", "Aggregated typing frames sent"
+)
+ecolehub_ws_evictions = Counter(
+    "ecolehub_ws_evictions_total",
+    "WebSocket clients disconnected by the server",
+    ["reason"],
+)
+
+
+class ClientConnection:
+    """
+    One client socket with its own bounded outbound queue.
+    A dedicated writer task drains the queue, so a slow client only delays
+    itself; when its queue overflows or a send times out it is evicted.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        on_evict: Callable[["ClientConnection", str], None],
+        max_queue: int = WS_SEND_QUEUE_SIZE,
+        send_timeout: float = WS_SEND_TIMEOUT,
+    ):
+        self.websocket = websocket
+        self.send_timeout = send_timeout
+        self.closed = False
+        self._on_evict = on_evict
+        self._queue: "asyncio.Queue[str]" = asyncio.Queue(maxsize=max_queue)
+        self._writer = asyncio.get_running_loop().create_task(self._drain())
+
+    def offer(self, text: str) -> bool:
+        """Queue a frame without waiting; False if the client cannot keep up."""
+        if self.closed:
+            return False
+        try:
+            self._queue.put_nowait(text)
+            return True
+        except asyncio.QueueFull:
+            self.evict("queue_full")
+            return False
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    async def _drain(self) -> None:
+        # wait_for may swallow a cancel that races a completed send, so the
+        # closed flag is what actually ends the loop
+        while not self.closed:
+            text = await self._queue.get()
+            try:
+                await asyncio.wait_for(
+                    self.websocket.send_text(text), timeout=self.send_timeout
+                )
+            except asyncio.TimeoutError:
+                self.evict("send_timeout")
+                return
+            except Exception:
+                self.evict("send_error")
+                return
+
+    def evict(self, reason: str) -> None:
+        if self.closed:
+            return
+        self.close()
+        ecolehub_ws_evictions.labels(reason=reason).inc()
+        self._on_evict(self, reason)
+        asyncio.get_running_loop().create_task(self._close_socket())
+
+    def close(self) -> None:
+        """Stop the writer; frames still queued are discarded."""
+        self.closed = True
+        if self._writer is not asyncio.current_task():
+            self._writer.cancel()
+
+    async def wait_closed(self) -> None:
+        await asyncio.gather(self._writer, return_exceptions=True)
+
+    async def _close_socket(self) -> None:
+        try:
+            await self.websocket.close(code=WS_CLOSE_SLOW_CONSUMER)
+        except Exception:
+            pass
 
 
 class WebSocketManager:
     """
     Manages WebSocket connections for real-time messaging.
-    Uses Redis for scaling across multiple backend instances.
+    Uses Redis for scaling across multiple backend instances: each instance
+    subscribes to the pub/sub channels of the conversations (and users) it
+    holds sockets for, every broadcast is published once, and presence is a
+    Redis sorted set refreshed by each instance's heartbeat.
     """
 
-    def __init__(self, redis_url: str = "redis://localhost:6379/0"):
-        # Active connections: user_id -> WebSocket
-        self.active_connections: Dict[str, WebSocket] = {}
+    def __init__(self, redis_url: str = "redis://localhost:6379/0", redis_client=None):
+        # Active connections: user_id -> ClientConnection
+        self.active_connections: Dict[str, ClientConnection] = {}
 
         # User subscriptions: user_id -> Set[conversation_ids]
         self.user_subscriptions: Dict[str, Set[str]] = {}
 
+        # Reverse index: conversation_id -> Set[connected user_ids]
+        self.conversation_members: Dict[str, Set[str]] = {}
+
         # Redis for pub/sub and presence
-        self.redis_client = redis.Redis.from_url(redis_url, decode_responses=True)
+        self.redis_client = redis_client or aioredis.Redis.from_url(
+            redis_url, decode_responses=True
+        )
+        self.instance_id = uuid4().hex
+        self._pubsub = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._background: List[asyncio.Task] = []
+
+        # Typing indicators: conversation -> user -> when last accepted, plus
+        # other instances' typists and what was last sent / published
+        self._typing: Dict[str, Dict[str, float]] = {}
+        self._remote_typing: Dict[str, Dict[str, Tuple[List[str], float]]] = {}
+        self._typing_sent: Dict[str, List[str]] = {}
+        self._typing_published: Dict[str, Tuple[List[str], float]] = {}
+        self._typing_dirty: Set[str] = set()
+
+        # Latest (is_online, last_seen) per user awaiting the next bulk write
+        self.session_factory: Optional[Callable[[], Session]] = None
+        self._status_changes: Dict[str, Tuple[bool, datetime]] = {}
+
+        # Bounded pool for blocking SQLAlchemy calls; a slow INSERT ties up
+        # one of these threads instead of every socket on the worker
+        self._db_executor = ThreadPoolExecutor(
+            max_workers=WS_DB_WORKERS, thread_name_prefix="ws-db"
+        )
+
+    async def start(self):
+        """Join the backplane (app startup); without it delivery stays local."""
+        loop = asyncio.get_running_loop()
+        self._background = [
+            loop.create_task(self._flush_statuses()),
+            loop.create_task(self._typing_ticks()),
+        ]
+        try:
+            self._pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+            # Channels of sockets accepted before startup, plus one of our own
+            # so the pub/sub connection always exists
+            await self._pubsub.subscribe(
+                f"ws:instance:{self.instance_id}",
+                *(WS_USER_CHANNEL + uid for uid in self.active_connections),
+                *(WS_CONVERSATION_CHANNEL + cid for cid in self.conversation_members),
+            )
+        except Exception as e:
+            print(f"❌ WebSocket backplane unavailable, local delivery only: {e}")
+            self._pubsub = None
+            return
+        self._background += [
+            loop.create_task(self._listen_backplane()),
+            loop.create_task(self._heartbeat()),
+        ]
+
+    async def stop(self):
+        """Leave the backplane and close local sockets (app shutdown)."""
+        for task in self._background:
+            task.cancel()
+        await asyncio.gather(*self._background, return_exceptions=True)
+        self._background = []
+        await self.close_all()
+        await self.flush_statuses_once()
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
 
     async def connect(self, websocket: WebSocket, user_id: UUID, db: Session):
         """Connect user and mark as online."""
         await websocket.accept()
 
         user_id_str = str(user_id)
-        self.active_connections[user_id_str] = websocket
-        self.user_subscriptions[user_id_str] = set()
+        self.attach(user_id_str, websocket)
 
         # Mark user as online
-        await self._update_user_status(user_id, True, db)
+        await self._mark_online(user_id_str)
+        self._record_status(user_id, True)
 
         # Subscribe to user's conversations
-        await self._subscribe_user_conversations(user_id_str, db)
+        for conversation_id_str in await self._run_db(
+            _load_conversation_ids, db, user_id
+        ):
+            self.subscribe(user_id_str, conversation_id_str)
 
         print(f"👋 User {user_id_str} connected")
 
-    async def disconnect(self, user_id: UUID, db: Session):
-        """Disconnect user and mark as offline."""
-        user_id_str = str(user_id)
+    def attach(self, user_id_str: str, websocket: WebSocket) -> ClientConnection:
+        """Register an accepted socket, replacing the user's previous one."""
+        self._detach(user_id_str)
+        connection = ClientConnection(websocket, self._on_evict)
+        self.active_connections[user_id_str] = connection
+        self.user_subscriptions[user_id_str] = set()
+        self._listen(WS_USER_CHANNEL + user_id_str)
+        ecolehub_ws_connections.set(len(self.active_connections))
+        return connection
 
-        if user_id_str in self.active_connections:
-            del self.active_connections[user_id_str]
+    def subscribe(self, user_id_str: str, conversation_id_str: str) -> None:
+        if user_id_str not in self.active_connections:
+            return
+        self.user_subscriptions[user_id_str].add(conversation_id_str)
+        if conversation_id_str not in self.conversation_members:
+            self.conversation_members[conversation_id_str] = set()
+            self._listen(WS_CONVERSATION_CHANNEL + conversation_id_str)
+        self.conversation_members[conversation_id_str].add(user_id_str)
+
+    def unsubscribe(self, user_id_str: str, conversation_id_str: str) -> None:
+        self.user_subscriptions.get(user_id_str, set()).discard(conversation_id_str)
+        members = self.conversation_members.get(conversation_id_str)
+        if members is not None:
+            members.discard(user_id_str)
+            if not members:
+                del self.conversation_members[conversation_id_str]
+                self._unlisten(WS_CONVERSATION_CHANNEL + conversation_id_str)
+
+    def _detach(self, user_id_str: str, connection: Optional[ClientConnection] = None):
+        """Forget a user's socket (only `connection`, when given)."""
+        current = self.active_connections.get(user_id_str)
+        if current is None or (connection is not None and current is not connection):
+            return
+        current.close()
+        del self.active_connections[user_id_str]
+        for conversation_id_str in list(self.user_subscriptions.get(user_id_str, ())):
+            self.unsubscribe(user_id_str, conversation_id_str)
+        self.user_subscriptions.pop(user_id_str, None)
+        self._unlisten(WS_USER_CHANNEL + user_id_str)
+        ecolehub_ws_connections.set(len(self.active_connections))
+
+    def _on_evict(self, connection: ClientConnection, reason: str) -> None:
+        for user_id_str, current in list(self.active_connections.items()):
+            if current is connection:
+                self._detach(user_id_str, connection)
+                print(f"🐢 User {user_id_str} evicted ({reason})")
 
-        if user_id_str in self.user_subscriptions:
-            del self.user_subscriptions[user_id_str]
+    async def disconnect(self, user_id: UUID, db: Session):
+        """Disconnect user and mark as offline."""
+        self._detach(str(user_id))
 
         # Mark user as offline
-        await self._update_user_status(user_id, False, db)
+        await self._mark_offline(str(user_id))
+        self._record_status(user_id, False)
 
-        print(f"👋 User {user_id_str} disconnected")
+        print(f"👋 User {user_id} disconnected")
 
-    async def send_personal_message(self, message: str, user_id: UUID):
-        """Send message to specific user."""
-        user_id_str = str(user_id)
+    async def close_all(self):
+        """Drop every local connection and wait for their writers (shutdown)."""
+        connections = list(self.active_connections.values())
+        for user_id_str in list(self.active_connections):
+            self._detach(user_id_str)
+        for connection in connections:
+            await connection.wait_closed()
 
-        if user_id_str in self.active_connections:
-            try:
-                await self.active_connections[user_id_str].send_text(message)
-                return True
-            except BaseException:
-                # Connection closed, clean up
-                del self.active_connections[user_id_str]
-                return False
-        return False
+    async def send_personal_message(self, message: str, user_id: UUID):
+        """Send message to specific user, wherever they are connected."""
+        connection = self.active_connections.get(str(user_id))
+        if connection is not None:
+            return connection.offer(message)
+        receivers = await self._publish(WS_USER_CHANNEL + str(user_id), message)
+        return receivers > 0
 
     async def broadcast_to_conversation(
         self, conversation_id: UUID, message_data: dict, sender_id: UUID = None
@@ -84,25 +347,132 @@ class WebSocketManager:
 
         message_json = json.dumps(message_data)
 
-        # Send to all connected users subscribed to this conversation
-        disconnected_users = []
-
-        for user_id_str, subscriptions in self.user_subscriptions.items():
-            if conversation_id_str in subscriptions and user_id_str != sender_id_str:
-                if user_id_str in self.active_connections:
-                    try:
-                        await self.active_connections[user_id_str].send_text(
-                            message_json
-                        )
-                    except BaseException:
-                        disconnected_users.append(user_id_str)
-
-        # Clean up disconnected users
-        for user_id_str in disconnected_users:
-            if user_id_str in self.active_connections:
-                del self.active_connections[user_id_str]
-            if user_id_str in self.user_subscriptions:
-                del self.user_subscriptions[user_id_str]
+        self._deliver_local(conversation_id_str, message_json, sender_id_str)
+        await self._publish(
+            WS_CONVERSATION_CHANNEL + conversation_id_str, message_json, sender_id_str
+        )
+
+    def _deliver_local(
+        self, conversation_id_str: str, message_json: str, sender_id_str: str = None
+    ):
+        # Only the conversation's connected members are visited. Frames are
+        # queued per socket, so no client waits behind a slower one; clients
+        # whose queue is full are evicted by offer().
+        members = self.conversation_members.get(conversation_id_str, ())
+        for user_id_str in list(members):
+            if user_id_str != sender_id_str:
+                connection = self.active_connections.get(user_id_str)
+                if connection is not None:
+                    connection.offer(message_json)
+
+    # Backplane
+
+    def _listen(self, channel: str) -> None:
+        if self._pubsub is not None:
+            self._spawn(self._pubsub.subscribe(channel))
+
+    def _unlisten(self, channel: str) -> None:
+        if self._pubsub is not None:
+            self._spawn(self._pubsub.unsubscribe(channel))
+
+    def _spawn(self, coro) -> None:
+        # Keep a reference until done; channel changes are fire-and-forget
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _publish(
+        self, channel: str, message_json: str, sender_id_str: str = None
+    ) -> int:
+        """Publish once for every other instance; returns the receiver count."""
+        return await self._publish_envelope(
+            channel, sender=sender_id_str, frame=message_json
+        )
+
+    async def _publish_envelope(self, channel: str, **fields) -> int:
+        if self._pubsub is None:
+            return 0
+        envelope = json.dumps({"origin": self.instance_id, **fields})
+        try:
+            receivers = await self.redis_client.publish(channel, envelope)
+        except Exception as e:
+            print(f"❌ WebSocket backplane publish error: {e}")
+            return 0
+        ecolehub_ws_backplane_messages.labels(direction="out").inc()
+        return receivers
+
+    async def _listen_backplane(self) -> None:
+        while True:
+            try:
+                message = await self._pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # redis-py resubscribes every channel when it reconnects
+                print(f"❌ WebSocket backplane error: {e}")
+                await asyncio.sleep(1)
+                continue
+            if message is not None:
+                self._on_backplane_message(message["channel"], message["data"])
+
+    def _on_backplane_message(self, channel: str, data: str) -> None:
+        envelope = json.loads(data)
+        if envelope["origin"] == self.instance_id:
+            return
+        ecolehub_ws_backplane_messages.labels(direction="in").inc()
+        if "typing" in envelope:
+            self._merge_remote_typing(
+                channel[len(WS_CONVERSATION_CHANNEL) :],
+                envelope["origin"],
+                envelope["typing"],
+            )
+        elif channel.startswith(WS_CONVERSATION_CHANNEL):
+            self._deliver_local(
+                channel[len(WS_CONVERSATION_CHANNEL) :],
+                envelope["frame"],
+                envelope["sender"],
+            )
+        elif channel.startswith(WS_USER_CHANNEL):
+            connection = self.active_connections.get(channel[len(WS_USER_CHANNEL) :])
+            if connection is not None:
+                connection.offer(envelope["frame"])
+
+    # Presence
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(WS_HEARTBEAT_INTERVAL)
+            try:
+                await self.refresh_presence()
+            except Exception as e:
+                print(f"❌ WebSocket presence heartbeat error: {e}")
+
+    async def refresh_presence(self) -> None:
+        """Re-announce local users and expire those no instance refreshed."""
+        now = time.time()
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            if self.active_connections:
+                pipe.zadd(
+                    WS_PRESENCE_KEY, {uid: now for uid in self.active_connections}
+                )
+            pipe.zremrangebyscore(WS_PRESENCE_KEY, "-inf", now - WS_PRESENCE_TTL)
+            await pipe.execute()
+
+    async def _mark_online(self, user_id_str: str) -> None:
+        try:
+            await self.redis_client.zadd(WS_PRESENCE_KEY, {user_id_str: time.time()})
+        except Exception as e:
+            print(f"❌ WebSocket presence error: {e}")
+
+    async def _mark_offline(self, user_id_str: str) -> None:
+        # Another instance still holding a socket re-adds the user on its
+        # next heartbeat
+        try:
+            await self.redis_client.zrem(WS_PRESENCE_KEY, user_id_str)
+        except Exception as e:
+            print(f"❌ WebSocket presence error: {e}")
 
     async def handle_message(self, websocket: WebSocket, user_id: UUID, db: Session):
         """Handle incoming WebSocket messages."""
@@ -123,7 +493,10 @@ class WebSocketManager:
                 elif message_type == "typing":
                     await self._handle_typing(user_id, message_data)
                 elif message_type == "ping":
-                    await websocket.send_text(json.dumps({"type": "pong"}))
+                    # Through the queue: only the writer task sends on a socket
+                    await self.send_personal_message(
+                        json.dumps({"type": "pong"}), user_id
+                    )
 
         except WebSocketDisconnect:
             await self.disconnect(user_id, db)
@@ -141,45 +514,14 @@ class WebSocketManager:
         if not content:
             return
 
-        # Verify user is participant
-        participant = (
-            db.query(ConversationParticipant)
-            .filter(
-                ConversationParticipant.conversation_id == conversation_id,
-                ConversationParticipant.user_id == user_id,
-            )
-            .first()
+        message = await self._run_db(
+            _store_message, db, user_id, conversation_id, content
         )
-
-        if not participant:
+        if message is None:
             return
 
-        # Create message in database
-        message = Message(
-            conversation_id=conversation_id,
-            user_id=user_id,
-            content=content,
-            message_type="text",
-        )
-        db.add(message)
-        db.commit()
-        db.refresh(message)
-
-        # Get user info for broadcast
-        user = db.query(User).filter(User.id == user_id).first()
-
         # Broadcast to conversation participants
-        broadcast_data = {
-            "type": "new_message",
-            "message": {
-                "id": str(message.id),
-                "conversation_id": str(conversation_id),
-                "user_id": str(user_id),
-                "user_name": f"{user.first_name} {user.last_name}",
-                "content": content,
-                "created_at": message.created_at.isoformat(),
-            },
-        }
+        broadcast_data = {"type": "new_message", "message": message}
 
         await self.broadcast_to_conversation(conversation_id, broadcast_data, user_id)
 
@@ -192,24 +534,10 @@ class WebSocketManager:
         conversation_id_str = str(conversation_id)
 
         # Add to user's subscriptions
-        if user_id_str not in self.user_subscriptions:
-            self.user_subscriptions[user_id_str] = set()
-
-        self.user_subscriptions[user_id_str].add(conversation_id_str)
+        self.subscribe(user_id_str, conversation_id_str)
 
         # Update last_read_at
-        participant = (
-            db.query(ConversationParticipant)
-            .filter(
-                ConversationParticipant.conversation_id == conversation_id,
-                ConversationParticipant.user_id == user_id,
-            )
-            .first()
-        )
-
-        if participant:
-            participant.last_read_at = func.now()
-            db.commit()
+        await self._run_db(_mark_conversation_read, db, user_id, conversation_id)
 
     async def _handle_leave_conversation(
         self, user_id: UUID, message_data: dict, db: Session
@@ -218,64 +546,257 @@ class WebSocketManager:
         conversation_id_str = str(message_data.get("conversation_id"))
         user_id_str = str(user_id)
 
-        if user_id_str in self.user_subscriptions:
-            self.user_subscriptions[user_id_str].discard(conversation_id_str)
+        self.unsubscribe(user_id_str, conversation_id_str)
 
     async def _handle_typing(self, user_id: UUID, message_data: dict):
         """Handle typing indicators."""
         conversation_id = UUID(message_data.get("conversation_id"))
         is_typing = message_data.get("is_typing", False)
 
-        # Get user info
+        conversation_id_str = str(conversation_id)
         user_id_str = str(user_id)
+        now = time.monotonic()
+        typists = self._typing.get(conversation_id_str, {})
+        last_accepted = typists.get(user_id_str)
+
+        # Repeats within the interval are dropped: the user is already shown
+        # as typing, and the next accepted event keeps it that way
+        if is_typing and (
+            last_accepted is not None and now - last_accepted < WS_TYPING_INTERVAL
+        ):
+            ecolehub_ws_typing_events.labels(result="suppressed").inc()
+            return
+        if not is_typing and last_accepted is None:
+            ecolehub_ws_typing_events.labels(result="suppressed").inc()
+            return
 
-        # Broadcast typing status
-        typing_data = {
-            "type": "typing",
-            "conversation_id": str(conversation_id),
-            "user_id": user_id_str,
-            "is_typing": is_typing,
-        }
-
-        await self.broadcast_to_conversation(conversation_id, typing_data, user_id)
-
-    async def _subscribe_user_conversations(self, user_id_str: str, db: Session):
-        """Subscribe user to their conversations."""
-        user_id = UUID(user_id_str)
-
-        # Get user's conversation participations
-        participations = (
-            db.query(ConversationParticipant)
-            .filter(ConversationParticipant.user_id == user_id)
-            .all()
-        )
-
-        for participation in participations:
-            conversation_id_str = str(participation.conversation_id)
-            self.user_subscriptions[user_id_str].add(conversation_id_str)
-
-    async def _update_user_status(self, user_id: UUID, is_online: bool, db: Session):
-        """Update user online status."""
-        user_status = db.query(UserStatus).filter(UserStatus.user_id == user_id).first()
+        ecolehub_ws_typing_events.labels(result="delivered").inc()
+        if is_typing:
+            self._typing.setdefault(conversation_id_str, {})[user_id_str] = now
+        else:
+            del typists[user_id_str]
+        self._typing_dirty.add(conversation_id_str)
+
+    def _expire_typists(self, expired_before: float) -> None:
+        for conversation_id_str, typists in list(self._typing.items()):
+            for user_id_str, accepted in list(typists.items()):
+                if accepted < expired_before:
+                    del typists[user_id_str]
+                    self._typing_dirty.add(conversation_id_str)
+        for conversation_id_str, remote in list(self._remote_typing.items()):
+            for origin, (_, received) in list(remote.items()):
+                if received < expired_before:
+                    del remote[origin]
+                    self._typing_dirty.add(conversation_id_str)
+
+    def _merge_remote_typing(
+        self, conversation_id_str: str, origin: str, user_ids: List[str]
+    ) -> None:
+        remote = self._remote_typing.setdefault(conversation_id_str, {})
+        if user_ids:
+            remote[origin] = (user_ids, time.monotonic())
+        else:
+            remote.pop(origin, None)
+        self._typing_dirty.add(conversation_id_str)
+
+    async def _typing_ticks(self) -> None:
+        while True:
+            await asyncio.sleep(WS_TYPING_TICK)
+            await self.flush_typing()
+
+    async def flush_typing(self) -> None:
+        """
+        Send one frame per conversation whose set of typists changed:
+        {"type": "typing", "conversation_id": ..., "user_ids": [...]}.
+        Clients ignore their own id; an empty list means nobody is typing.
+        """
+        now = time.monotonic()
+        self._expire_typists(now - WS_TYPING_TTL)
+        for conversation_id_str, typists in self._typing.items():
+            _, published_at = self._typing_published.get(
+                conversation_id_str, ([], float("-inf"))
+            )
+            if typists and now - published_at >= WS_TYPING_HEARTBEAT:
+                self._typing_dirty.add(conversation_id_str)
+        dirty, self._typing_dirty = self._typing_dirty, set()
+        for conversation_id_str in dirty:
+            local = sorted(self._typing.get(conversation_id_str, ()))
+            remote = self._remote_typing.get(conversation_id_str, {})
+            merged = sorted(
+                set(local).union(*(user_ids for user_ids, _ in remote.values()))
+            )
 
-        if not user_status:
-            user_status = UserStatus(
-                user_id=user_id, is_online=is_online, last_seen=func.now()
+            if merged != self._typing_sent.get(conversation_id_str, []):
+                frame = {
+                    "type": "typing",
+                    "conversation_id": conversation_id_str,
+                    "user_ids": merged,
+                }
+                self._deliver_local(conversation_id_str, json.dumps(frame))
+                ecolehub_ws_typing_frames.inc()
+                self._typing_sent[conversation_id_str] = merged
+
+            # Other instances merge our typists into their own frames
+            published, published_at = self._typing_published.get(
+                conversation_id_str, ([], float("-inf"))
+            )
+            if local != published or (
+                local and now - published_at >= WS_TYPING_HEARTBEAT
+            ):
+                await self._publish_envelope(
+                    WS_CONVERSATION_CHANNEL + conversation_id_str, typing=local
+                )
+                self._typing_published[conversation_id_str] = (local, now)
+
+            if not merged:
+                for state in (
+                    self._typing,
+                    self._remote_typing,
+                    self._typing_sent,
+                    self._typing_published,
+                ):
+                    state.pop(conversation_id_str, None)
+
+    def _record_status(self, user_id: UUID, is_online: bool) -> None:
+        """Record user online status; persisted by the next status flush."""
+        user_id_str = str(user_id)
+        if user_id_str in self._status_changes:
+            ecolehub_ws_status_updates.labels(result="coalesced").inc()
+        self._status_changes[user_id_str] = (is_online, datetime.now(timezone.utc))
+
+    async def _flush_statuses(self) -> None:
+        while True:
+            await asyncio.sleep(WS_STATUS_FLUSH_INTERVAL)
+            await self.flush_statuses_once()
+
+    async def flush_statuses_once(self) -> int:
+        """Upsert every pending status change; returns the rows written."""
+        if not self._status_changes or self.session_factory is None:
+            return 0
+        changes, self._status_changes = self._status_changes, {}
+        rows = [
+            {"user_id": UUID(uid), "is_online": is_online, "last_seen": last_seen}
+            for uid, (is_online, last_seen) in changes.items()
+        ]
+        try:
+            for start in range(0, len(rows), WS_STATUS_BATCH_SIZE):
+                batch = rows[start : start + WS_STATUS_BATCH_SIZE]
+                await self._run_db(_write_user_statuses, self.session_factory(), batch)
+        except Exception as e:
+            # Presence in Redis stays accurate; the table catches up on the
+            # users' next transition
+            print(f"❌ User status flush error: {e}")
+            return 0
+        ecolehub_ws_status_updates.labels(result="written").inc(len(rows))
+        return len(rows)
+
+    async def _run_db(self, operation: Callable[..., Any], db: Session, *args):
+        """Run blocking ORM work on the DB executor, never on the event loop."""
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._db_executor, partial(_in_session, operation, db, *args)
+            )
+        finally:
+            ecolehub_ws_db_duration.labels(operation=operation.__name__[1:]).observe(
+                time.perf_counter() - start
             )
-            db.add(user_status)
-        else:
-            user_status.is_online = is_online
-            user_status.last_seen = func.now()
 
-        db.commit()
+    async def get_online_users(self) -> List[str]:
+        """Get list of currently online user IDs (all instances)."""
+        return await self.redis_client.zrangebyscore(
+            WS_PRESENCE_KEY, time.time() - WS_PRESENCE_TTL, "+inf"
+        )
 
-    def get_online_users(self) -> List[str]:
-        """Get list of currently online user IDs."""
-        return list(self.active_connections.keys())
+    async def is_user_online(self, user_id: UUID) -> bool:
+        """Check if user is currently online on any instance."""
+        last_seen = await self.redis_client.zscore(WS_PRESENCE_KEY, str(user_id))
+        return last_seen is not None and last_seen >= time.time() - WS_PRESENCE_TTL
+
+
+# Blocking database work, run on WebSocketManager's executor. Each one returns
+# plain data so nothing attached to the session crosses back to the loop.
+
+
+def _in_session(operation: Callable[..., Any], db: Session, *args):
+    try:
+        return operation(db, *args)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        # The socket's session is long-lived: hand the connection back to the
+        # pool between frames
+        db.close()
+
+
+def _load_conversation_ids(db: Session, user_id: UUID) -> List[str]:
+    rows = db.query(ConversationParticipant.conversation_id).filter(
+        ConversationParticipant.user_id == user_id
+    )
+    return [str(conversation_id) for (conversation_id,) in rows]
+
+
+def _store_message(
+    db: Session, user_id: UUID, conversation_id: UUID, content: str
+) -> Optional[dict]:
+    # Verify user is participant and get their name in one query
+    sender = (
+        db.query(User.first_name, User.last_name)
+        .join(ConversationParticipant, ConversationParticipant.user_id == User.id)
+        .filter(
+            ConversationParticipant.conversation_id == conversation_id,
+            ConversationParticipant.user_id == user_id,
+        )
+        .first()
+    )
+
+    if not sender:
+        return None
+
+    # Queued for the next batch insert (or written now without write-behind)
+    message = message_sink.submit(db, conversation_id, user_id, content)
+
+    return {
+        "id": message["id"],
+        "conversation_id": message["conversation_id"],
+        "user_id": message["user_id"],
+        "user_name": f"{sender.first_name} {sender.last_name}",
+        "content": content,
+        "created_at": message["created_at"],
+    }
+
+
+def _mark_conversation_read(db: Session, user_id: UUID, conversation_id: UUID):
+    participant = (
+        db.query(ConversationParticipant)
+        .filter(
+            ConversationParticipant.conversation_id == conversation_id,
+            ConversationParticipant.user_id == user_id,
+        )
+        .first()
+    )
 
-    def is_user_online(self, user_id: UUID) -> bool:
-        """Check if user is currently online."""
-        return str(user_id) in self.active_connections
+    if participant:
+        participant.last_read_at = func.now()
+        db.commit()
+        unread_counters.reset(user_id, conversation_id)
+
+
+def _write_user_statuses(db: Session, rows: List[dict]):
+    insert = dialect_insert(db)
+    statement = insert(UserStatus).values(rows)
+    db.execute(
+        statement.on_conflict_do_update(
+            index_elements=["user_id"],
+            set_={
+                "is_online": statement.excluded.is_online,
+                "last_seen": statement.excluded.last_seen,
+                "updated_at": func.now(),
+            },
+        )
+    )
+    db.commit()
 
 
 # Global WebSocket manager instance
@@ -0,0 +1,30 @@
+"""
+EcoleHub Stage 4 - Celery Tasks for Analytics
+Keeps the daily analytics rollups up to date
+"""
+
+import logging
+from typing import Any, Dict
+
+from ..analytics_rollups import AnalyticsRollups
+from ..workers.celery_app import celery_app
+from ..workers.database import SessionLocal
+
+
+@celery_app.task(name="refresh_analytics_rollups")
+def refresh_analytics_rollups(full: bool = False) -> Dict[str, Any]:
+    """
+    Recompute the days touched since the last run (or everything when full)
+    Incremental runs are frequent; the nightly full run drops deleted rows
+    """
+    db = SessionLocal()
+    try:
+        written = AnalyticsRollups(db).refresh(full=full)
+        return {"success": True, "full": full, "rows": written}
+
+    except Exception as e:
+        db.rollback()
+        logging.error(f"❌ Analytics rollup refresh failed: {str(e)}")
+        return {"success": False, "error": str(e)}
+    finally:
+        db.close()
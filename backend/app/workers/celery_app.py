@@ -6,6 +6,7 @@ Background tasks for shop orders and notifications
 import os
 
 from celery import Celery
+from celery.schedules import crontab
 
 # Redis URL for Celery broker
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
@@ -15,7 +16,13 @@ celery_app = Celery(
     "ecolehub_tasks",
     broker=REDIS_URL,
     backend=REDIS_URL,
-    include=["app.workers.shop_tasks", "app.workers.notification_tasks"],
+    include=[
+        "app.workers.shop_tasks",
+        "app.workers.notification_tasks",
+        "app.workers.analytics_tasks",
+        "app.workers.messaging_tasks",
+        "app.workers.sel_tasks",
+    ],
 )
 
 # Celery configuration
@@ -31,6 +38,35 @@ celery_app.conf.update(
     },
 )
 
+# Periodic maintenance tasks (celery beat)
+celery_app.conf.beat_schedule = {
+    "reconcile-shop-interest-counters": {
+        "task": "reconcile_interest_counters",
+        "schedule": crontab(hour=3, minute=0),
+    },
+    "refresh-analytics-rollups": {
+        "task": "refresh_analytics_rollups",
+        "schedule": crontab(minute="*/10"),
+    },
+    "rebuild-analytics-rollups": {
+        "task": "refresh_analytics_rollups",
+        "schedule": crontab(hour=3, minute=30),
+        "kwargs": {"full": True},
+    },
+    "reconcile-unread-counters": {
+        "task": "reconcile_unread_counters",
+        "schedule": crontab(minute="*/15"),
+    },
+    "snapshot-sel-balances": {
+        "task": "snapshot_sel_balances",
+        "schedule": crontab(hour=2, minute=30),
+    },
+    "verify-sel-ledger": {
+        "task": "verify_sel_ledger",
+        "schedule": crontab(hour=4, minute=0),
+    },
+}
+
 # Configure task execution
 celery_app.conf.update(
     worker_prefetch_multiplier=1,
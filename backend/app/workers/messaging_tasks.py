@@ -0,0 +1,36 @@
+"""
+EcoleHub Stage 2 - Celery Tasks for Messaging
+Keeps the Redis unread counters in line with the database
+"""
+
+import logging
+from typing import Any, Dict
+
+import redis
+
+from ..unread_counters import UnreadCounters
+from ..workers.celery_app import REDIS_URL, celery_app
+from ..workers.database import SessionLocal
+
+
+@celery_app.task(name="reconcile_unread_counters")
+def reconcile_unread_counters() -> Dict[str, Any]:
+    """
+    Rewrite drifted unread counters from messages newer than last_read_at
+    Drift comes from increments lost while Redis was unreachable
+    """
+    db = SessionLocal()
+    try:
+        counters = UnreadCounters(
+            redis.Redis.from_url(REDIS_URL, decode_responses=True)
+        )
+        result = counters.reconcile(db)
+        if result["drifted"]:
+            logging.warning(f"⚠️ Unread counters drifted for {result['drifted']} users")
+        return {"success": True, **result}
+
+    except Exception as e:
+        logging.error(f"❌ Unread counter reconciliation failed: {str(e)}")
+        return {"success": False, "error": str(e)}
+    finally:
+        db.close()
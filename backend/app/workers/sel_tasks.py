@@ -0,0 +1,54 @@
+"""
+EcoleHub - Celery Tasks for the SEL ledger
+Nightly balance snapshots and the ledger audit
+"""
+
+import logging
+from typing import Any, Dict
+
+from ..sel_ledger import take_snapshots, verify_ledger
+from ..workers.celery_app import celery_app
+from ..workers.database import SessionLocal
+
+
+@celery_app.task(name="snapshot_sel_balances")
+def snapshot_sel_balances() -> Dict[str, Any]:
+    """Snapshot balances that moved, so balance reads only add recent entries"""
+    db = SessionLocal()
+    try:
+        return {"success": True, "snapshots": take_snapshots(db)}
+
+    except Exception as e:
+        db.rollback()
+        logging.error(f"❌ SEL balance snapshot failed: {str(e)}")
+        return {"success": False, "error": str(e)}
+    finally:
+        db.close()
+
+
+@celery_app.task(name="verify_sel_ledger")
+def verify_sel_ledger() -> Dict[str, Any]:
+    """
+    Replay the ledger against sel_balances and the snapshots
+    Drift is reported, never repaired automatically
+    """
+    db = SessionLocal()
+    try:
+        result = verify_ledger(db)
+        if (
+            result["drifted"]
+            or result["unbalanced_transactions"]
+            or result["unrecorded_transactions"]
+        ):
+            logging.warning(
+                f"⚠️ SEL ledger drift: {len(result['drifted'])} balances, "
+                f"{len(result['unbalanced_transactions'])} unbalanced and "
+                f"{result['unrecorded_transactions']} unrecorded transactions"
+            )
+        return {"success": True, **result}
+
+    except Exception as e:
+        logging.error(f"❌ SEL ledger verification failed: {str(e)}")
+        return {"success": False, "error": str(e)}
+    finally:
+        db.close()
@@ -7,7 +7,9 @@ import logging
 from typing import Any, Dict
 
 from ..mollie_service import mollie_service
+from ..shop_service import ShopCollaborativeService
 from ..workers.celery_app import celery_app
+from ..workers.database import SessionLocal
 
 
 @celery_app.task(name="process_group_order")
@@ -141,3 +143,26 @@ def create_printful_order(order_id: str, printful_product_id: str) -> Dict[str,
     except Exception as e:
         logging.error(f"❌ Printful order error: {str(e)}")
         return {"success": False, "error": str(e)}
+
+
+@celery_app.task(name="reconcile_interest_counters")
+def reconcile_interest_counters() -> Dict[str, Any]:
+    """
+    Rebuild the materialized shop interest counters from shop_interests
+    Scheduled nightly; also safe to run by hand after manual data fixes
+    """
+    db = SessionLocal()
+    try:
+        result = ShopCollaborativeService(db).rebuild_interest_counters()
+        if result["drifted"]:
+            logging.warning(
+                f"⚠️ Shop interest counters drifted for {result['drifted']} products"
+            )
+        return {"success": True, **result}
+
+    except Exception as e:
+        db.rollback()
+        logging.error(f"❌ Interest counter reconciliation failed: {str(e)}")
+        return {"success": False, "error": str(e)}
+    finally:
+        db.close()
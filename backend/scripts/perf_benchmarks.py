@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+EcoleHub performance benchmarks
+Seeds a throwaway SQLite database and measures hot read/write paths.
+Run locally from backend/: PYTHONPATH=. python scripts/perf_benchmarks.py shop-catalogue
+"""
+
+import argparse
+import asyncio
+import os
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.auth_cache import principal_cache
+from app.events_service import list_events
+from app.models_stage1 import Base, SELTransaction, User
+from app.models_stage2 import Event, EventParticipant
+from app.models_stage3 import ShopInterest, ShopProduct
+from app.sel_service import SELBusinessLogic
+from app.shop_service import ShopCollaborativeService
+from app.websocket_manager import WebSocketManager
+
+
+def make_session():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(
+        autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
+    )
+    return engine, SessionLocal()
+
+
+def make_users(db, count):
+    users = [
+        User(
+            email=f"bench-{uuid.uuid4().hex[:8]}@ecolehub.be",
+            first_name="Bench",
+            last_name=str(i),
+            hashed_password="!",
+        )
+        for i in range(count)
+    ]
+    db.add_all(users)
+    db.commit()
+    return users
+
+
+class QueryCounter:
+    """Count SQL statements sent to an engine."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        self.count = 0
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+def report(label, queries, elapsed):
+    print(f"{label:<40} queries={queries:<6} time={elapsed * 1000:8.1f} ms")
+
+
+def bench_shop_catalogue(args):
+    """Compare the per-product read path with the batched catalogue query."""
+    for size in args.sizes:
+        engine, db = make_session()
+        users = make_users(db, args.users)
+        for i in range(size):
+            product = ShopProduct(
+                name=f"Produit {i}",
+                base_price=Decimal("9.90"),
+                category="fournitures",
+                min_quantity=10,
+            )
+            db.add(product)
+            db.flush()
+            for user in users[: args.interests_per_product]:
+                db.add(ShopInterest(product_id=product.id, user_id=user.id))
+        db.commit()
+
+        shop_service = ShopCollaborativeService(db)
+        shop_service.rebuild_interest_counters()
+        current_user = users[0]
+
+        with QueryCounter(engine) as counter:
+            start = time.perf_counter()
+            for product in shop_service.get_products():
+                shop_service.get_product_with_interest_count(product.id)
+                db.query(ShopInterest).filter(
+                    ShopInterest.product_id == product.id,
+                    ShopInterest.user_id == current_user.id,
+                ).first()
+            report(
+                f"per-product ({size} products)",
+                counter.count,
+                time.perf_counter() - start,
+            )
+
+        db.expunge_all()
+        with QueryCounter(engine) as counter:
+            start = time.perf_counter()
+            shop_service.get_catalogue(current_user.id)
+            report(
+                f"catalogue ({size} products)",
+                counter.count,
+                time.perf_counter() - start,
+            )
+
+        db.close()
+
+
+def bench_events(args):
+    """Compare per-event registration lookups with the aggregated listing."""
+    for size in args.sizes:
+        engine, db = make_session()
+        users = make_users(db, args.users)
+        start_date = datetime.now(timezone.utc) + timedelta(days=1)
+        for i in range(size):
+            event_row = Event(
+                title=f"Événement {i}", start_date=start_date + timedelta(hours=i)
+            )
+            db.add(event_row)
+            db.flush()
+            db.add_all(
+                EventParticipant(event_id=event_row.id, user_id=user.id)
+                for user in users[: i % args.users]
+            )
+        db.commit()
+        current_user = users[0]
+
+        with QueryCounter(engine) as counter:
+            start = time.perf_counter()
+            for event_row in db.query(Event).filter(Event.is_active).all():
+                db.query(EventParticipant).filter(
+                    EventParticipant.event_id == event_row.id,
+                    EventParticipant.user_id == current_user.id,
+                ).first()
+                db.query(EventParticipant).filter(
+                    EventParticipant.event_id == event_row.id,
+                    EventParticipant.status == "registered",
+                ).count()
+            report(
+                f"per-event ({size} events)",
+                counter.count,
+                time.perf_counter() - start,
+            )
+
+        db.expunge_all()
+        with QueryCounter(engine) as counter:
+            start = time.perf_counter()
+            list_events(db, current_user.id)
+            report(
+                f"list_events ({size} events)",
+                counter.count,
+                time.perf_counter() - start,
+            )
+
+        db.close()
+
+
+def make_pending_transactions(db, users, count):
+    transactions = [
+        SELTransaction(
+            from_user_id=users[i % len(users)].id,
+            to_user_id=users[(i + 1) % len(users)].id,
+            units=5,
+            status="pending",
+        )
+        for i in range(count)
+    ]
+    db.add_all(transactions)
+    db.commit()
+    return transactions
+
+
+def bench_sel_settlement(args):
+    """Compare approving pending SEL transactions one by one with a batch settlement."""
+    for size in args.sizes:
+        engine, db = make_session()
+        users = make_users(db, args.users)
+        transactions = make_pending_transactions(db, users, size)
+        sel_service = SELBusinessLogic(db)
+        with QueryCounter(engine) as counter:
+            start = time.perf_counter()
+            for transaction in transactions:
+                sel_service.approve_transaction(transaction.id, transaction.to_user_id)
+            report(
+                f"per-transaction ({size} pending)",
+                counter.count,
+                time.perf_counter() - start,
+            )
+        db.close()
+
+        engine, db = make_session()
+        users = make_users(db, args.users)
+        transactions = make_pending_transactions(db, users, size)
+        sel_service = SELBusinessLogic(db)
+        with QueryCounter(engine) as counter:
+            start = time.perf_counter()
+            sel_service.settle_transactions(
+                [t.id for t in transactions], users[0].id, is_coordinator=True
+            )
+            report(
+                f"settle_transactions ({size} pending)",
+                counter.count,
+                time.perf_counter() - start,
+            )
+        db.close()
+
+
+def bench_auth_cache(args):
+    """Requests/sec on an authenticated endpoint with and without the principal cache."""
+    os.environ.setdefault("DATABASE_URL", "sqlite://")
+    from fastapi.testclient import TestClient
+
+    from app import main_stage4
+
+    engine, db = make_session()
+    user = make_users(db, 1)[0]
+    token = main_stage4.create_access_token({"sub": user.email})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    def get_bench_db():
+        yield db
+
+    main_stage4.app.dependency_overrides[main_stage4.get_db] = get_bench_db
+    client = TestClient(main_stage4.app)
+    ttl = principal_cache.ttl_seconds
+
+    for label, cache_ttl in (("uncached", 0), ("cached", ttl or 30)):
+        principal_cache.ttl_seconds = cache_ttl
+        principal_cache.clear()
+        client.get("/api/me", headers=headers)
+        with QueryCounter(engine) as counter:
+            start = time.perf_counter()
+            for _ in range(args.requests):
+                client.get("/api/me", headers=headers)
+            elapsed = time.perf_counter() - start
+        report(f"GET /api/me {label}", counter.count, elapsed)
+        print(f"{'':<40} {args.requests / elapsed:8.0f} req/s")
+
+    principal_cache.ttl_seconds = ttl
+    main_stage4.app.dependency_overrides.clear()
+    db.close()
+
+
+class BenchSocket:
+    """Stand-in WebSocket that records when the expected frames arrived."""
+
+    def __init__(self, done, delay=0.0):
+        self.done = done
+        self.delay = delay
+        self.received = 0
+
+    async def send_text(self, text):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.received += 1
+        self.done.arrived()
+
+    async def close(self, code=1000):
+        pass
+
+
+class Arrivals:
+    def __init__(self, expected):
+        self.expected = expected
+        self.count = 0
+        self.event = asyncio.Event()
+
+    def arrived(self):
+        self.count += 1
+        if self.count >= self.expected:
+            self.event.set()
+
+
+async def _ws_broadcast(connections, conversations, messages):
+    manager = WebSocketManager()
+    # One conversation holds everyone (school announcement), the others
+    # hold idle sockets that the fan-out should never visit
+    arrivals = Arrivals((connections - 1) * messages)
+    for i in range(connections):
+        manager.attach(f"u{i}", BenchSocket(arrivals))
+        manager.subscribe(f"u{i}", "announcement")
+        manager.subscribe(f"u{i}", f"class-{i % conversations}")
+    # One stalled client must not hold the others back
+    manager.attach("stalled", BenchSocket(Arrivals(1), delay=60))
+    manager.subscribe("stalled", "announcement")
+
+    start = time.perf_counter()
+    for n in range(messages):
+        await manager.broadcast_to_conversation("announcement", {"n": n}, "u0")
+    enqueued = time.perf_counter() - start
+    await arrivals.event.wait()
+    delivered = time.perf_counter() - start
+    await manager.close_all()
+    return enqueued, delivered
+
+
+def bench_ws_broadcast(args):
+    """Broadcast latency to one conversation as the connection count grows."""
+    for connections in args.connections:
+        enqueued, delivered = asyncio.run(
+            _ws_broadcast(connections, args.conversations, args.messages)
+        )
+        print(
+            f"{connections:>6} sockets  {args.messages} messages  "
+            f"enqueue={enqueued * 1000:8.1f} ms  "
+            f"all delivered={delivered * 1000:8.1f} ms"
+        )
+
+
+BENCHMARKS = {
+    "auth-cache": bench_auth_cache,
+    "events": bench_events,
+    "sel-settlement": bench_sel_settlement,
+    "shop-catalogue": bench_shop_catalogue,
+    "ws-broadcast": bench_ws_broadcast,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 200])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--interests-per-product", type=int, default=15)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument(
+        "--connections", type=int, nargs="+", default=[100, 500, 1500, 3000]
+    )
+    parser.add_argument("--conversations", type=int, default=50)
+    parser.add_argument("--messages", type=int, default=20)
+    args = parser.parse_args()
+    BENCHMARKS[args.benchmark](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ from typing import Generator
 
 import pytest
 from fastapi.testclient import TestClient
+from redis.exceptions import WatchError
 from sqlalchemy import create_engine
 from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.pool import StaticPool
@@ -13,6 +14,8 @@ os.environ["TESTING"] = "1"
 os.environ["DATABASE_URL"] = "sqlite:///test.db"
 os.environ["REDIS_URL"] = "redis://localhost:6379/15"
 
+from app.analytics_service import platform_overview_cache  # noqa: E402
+from app.auth_cache import principal_cache  # noqa: E402
 from app.main_stage4 import (  # noqa: E402
     Base,
     app,
@@ -22,6 +25,7 @@ from app.main_stage4 import (  # noqa: E402
     get_redis,
 )
 from app.models_stage1 import Child, SELService, User  # noqa: E402
+from app.sel_service import available_services_cache  # noqa: E402
 
 # Test Database Setup
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -57,9 +61,80 @@ def db_session(db_engine) -> Generator[Session, None, None]:
     connection.close()
 
 
+class UnclosedSession:
+    """Wraps the test session for code that closes the sessions it opens."""
+
+    def __init__(self, session):
+        self._session = session
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+    def close(self):
+        pass
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self._redis = redis
+        self._commands = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self._commands.append((name, args, kwargs))
+
+    def execute(self):
+        self._redis.round_trips += 1
+        results = [
+            getattr(self._redis, name)(*args, **kwargs)
+            for name, args, kwargs in self._commands
+        ]
+        self._commands = []
+        return results
+
+
+class FakeTransaction:
+    """WATCH / MULTI / EXEC: commands run at once until multi(), then queue."""
+
+    def __init__(self, redis, watches):
+        self._redis = redis
+        self._watched = {key: redis._versions.get(key, 0) for key in watches}
+        self._commands = None
+
+    def __getattr__(self, name):
+        if self._commands is None:
+            return getattr(self._redis, name)
+        return lambda *args, **kwargs: self._commands.append((name, args, kwargs))
+
+    def multi(self):
+        self._commands = []
+
+    def execute(self):
+        if any(self._redis._versions.get(k, 0) != v for k, v in self._watched.items()):
+            raise WatchError("Watched variable changed.")
+        return [
+            getattr(self._redis, name)(*args, **kwargs)
+            for name, args, kwargs in self._commands or []
+        ]
+
+
 class FakeRedis:
     def __init__(self):
         self._store = {}
+        self._versions = {}
+        self.round_trips = 0
+
+    def _touch(self, key):
+        self._versions[key] = self._versions.get(key, 0) + 1
+
+    def transaction(self, func, *watches, value_from_callable=False):
+        while True:
+            pipe = FakeTransaction(self, watches)
+            try:
+                value = func(pipe)
+                results = pipe.execute()
+            except WatchError:
+                continue
+            return value if value_from_callable else results
 
     def lpush(self, key, value):
         self._store.setdefault(key, []).insert(0, value)
@@ -78,6 +153,63 @@ class FakeRedis:
     def ping(self):
         return True
 
+    def zadd(self, key, mapping):
+        self._store.setdefault(key, {}).update(mapping)
+
+    def zcount(self, key, low, high):
+        return len(self._zrange(key, low, high))
+
+    def zrangebyscore(self, key, low, high):
+        return self._zrange(key, low, high)
+
+    def zscore(self, key, member):
+        return self._store.get(key, {}).get(member)
+
+    def zrem(self, key, *members):
+        removed = [m for m in members if self._store.get(key, {}).pop(m, None)]
+        return len(removed)
+
+    def zremrangebyscore(self, key, low, high):
+        doomed = self._zrange(key, low, high)
+        for member in doomed:
+            del self._store[key][member]
+        return len(doomed)
+
+    def hincrby(self, key, field, amount=1):
+        self._touch(key)
+        fields = self._store.setdefault(key, {})
+        fields[field] = int(fields.get(field, 0)) + amount
+        return fields[field]
+
+    def hset(self, key, mapping):
+        self._touch(key)
+        self._store.setdefault(key, {}).update(
+            {field: str(value) for field, value in mapping.items()}
+        )
+
+    def hdel(self, key, *fields):
+        self._touch(key)
+        return len([f for f in fields if self._store.get(key, {}).pop(f, None)])
+
+    def hgetall(self, key):
+        return {field: str(value) for field, value in self._store.get(key, {}).items()}
+
+    def delete(self, *keys):
+        for key in keys:
+            self._touch(key)
+        return len([k for k in keys if self._store.pop(k, None) is not None])
+
+    def scan_iter(self, pattern: str):
+        return iter(self.keys(pattern))
+
+    def _zrange(self, key, low, high):
+        low, high = float(low), float(high)
+        members = self._store.get(key, {})
+        return [m for m, score in members.items() if low <= score <= high]
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
 
 @pytest.fixture
 def client(db_session: Session) -> Generator[TestClient, None, None]:
@@ -88,11 +220,16 @@ def client(db_session: Session) -> Generator[TestClient, None, None]:
 
     app.dependency_overrides[get_db] = get_test_db
     app.dependency_overrides[get_redis] = lambda: FakeRedis()
+    # Test users are recreated per test under the same e-mail addresses
+    principal_cache.clear()
+    platform_overview_cache.invalidate()
+    available_services_cache.invalidate()
 
     with TestClient(app) as test_client:
         yield test_client
 
     app.dependency_overrides.clear()
+    principal_cache.clear()
 
 
 # User Fixtures
@@ -0,0 +1,81 @@
+# Platform overview analytics tests (single statement + snapshot cache)
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.analytics_service import EcoleHubAnalytics
+from app.models_stage1 import User
+from app.models_stage2 import Event
+from tests.conftest import FakeRedis
+
+
+def _count_statements(db_session: Session, func):
+    statements = []
+    engine = db_session.get_bind().engine
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        func()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return len(statements)
+
+
+def _seed_events(db_session: Session, creator: User):
+    start = datetime.now(timezone.utc) + timedelta(days=3)
+    db_session.add_all(
+        [
+            Event(title="Fancy-fair", start_date=start, created_by=creator.id),
+            Event(
+                title="Annulé",
+                start_date=start,
+                created_by=creator.id,
+                is_active=False,
+            ),
+        ]
+    )
+    db_session.commit()
+
+
+@pytest.mark.integration
+def test_platform_overview_is_one_statement(db_session: Session, test_user_admin: User):
+    _seed_events(db_session, test_user_admin)
+    analytics = EcoleHubAnalytics(db_session, FakeRedis())
+    result = {}
+
+    statements = _count_statements(
+        db_session, lambda: result.update(analytics.get_platform_overview())
+    )
+
+    assert statements == 1
+    assert result["users"]["total"] >= 1
+    assert result["communication"]["total_events"] == 2
+    # Only active future events are upcoming
+    assert result["communication"]["upcoming_events"] == 1
+
+
+@pytest.mark.integration
+def test_platform_overview_endpoint_serves_snapshot(
+    client: TestClient,
+    db_session: Session,
+    test_user_admin: User,
+    auth_headers_admin: dict,
+):
+    first = client.get("/api/analytics/platform", headers=auth_headers_admin)
+    assert first.status_code == 200
+
+    statements = _count_statements(
+        db_session,
+        lambda: client.get("/api/analytics/platform", headers=auth_headers_admin),
+    )
+    second = client.get("/api/analytics/platform", headers=auth_headers_admin)
+
+    # Authentication is cached too, so the refresh issues no SQL at all
+    assert statements == 0
+    assert second.json()["timestamp"] == first.json()["timestamp"]
@@ -0,0 +1,181 @@
+# Analytics daily rollup tests
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.analytics_rollups import AnalyticsRollups, _day
+from app.analytics_service import EcoleHubAnalytics
+from app.models_stage1 import SELService, SELTransaction, User
+from app.models_stage3 import ShopInterest, ShopOrder, ShopProduct
+from app.models_stage4 import (
+    SELDailyStats,
+    ShopInterestDailyStats,
+    ShopRevenueDailyStats,
+)
+from app.shop_service import ShopCollaborativeService
+from tests.conftest import FakeRedis
+
+
+def _seed_sel(db_session: Session, parent: User, admin: User, when: datetime):
+    service = SELService(
+        user_id=admin.id, title="Covoiturage", category="transport", units_per_hour=60
+    )
+    db_session.add(service)
+    db_session.flush()
+    db_session.add_all(
+        [
+            SELTransaction(
+                from_user_id=parent.id,
+                to_user_id=admin.id,
+                service_id=service.id,
+                units=60,
+                status="completed",
+                created_at=when,
+                updated_at=when,
+            ),
+            SELTransaction(
+                from_user_id=parent.id,
+                to_user_id=admin.id,
+                units=30,
+                status="pending",
+                created_at=when,
+                updated_at=when,
+            ),
+        ]
+    )
+    db_session.commit()
+
+
+@pytest.mark.integration
+def test_rollups_feed_sel_and_shop_analytics(
+    db_session: Session, test_user_parent: User, test_user_admin: User
+):
+    last_week = datetime.now(timezone.utc) - timedelta(days=7)
+    _seed_sel(db_session, test_user_parent, test_user_admin, last_week)
+    product = ShopProduct(
+        name="T-shirt", base_price=Decimal("12.00"), category="uniform"
+    )
+    db_session.add(product)
+    db_session.flush()
+    db_session.add_all(
+        [
+            ShopInterest(product_id=product.id, user_id=test_user_parent.id),
+            ShopInterest(product_id=product.id, user_id=test_user_admin.id),
+            ShopOrder(
+                product_id=product.id,
+                total_quantity=10,
+                unit_price=Decimal("12.00"),
+                total_price=Decimal("120.00"),
+                status="paid",
+            ),
+        ]
+    )
+    db_session.commit()
+    analytics = EcoleHubAnalytics(db_session, FakeRedis())
+
+    # First read bootstraps the rollups inline
+    sel = analytics.get_sel_analytics()
+    shop = analytics.get_shop_analytics()
+
+    statuses = {s["status"]: s for s in sel["transaction_status"]}
+    assert statuses["completed"] == {
+        "status": "completed",
+        "count": 1,
+        "average_units": 60.0,
+    }
+    assert statuses["pending"]["count"] == 1
+    assert sum(m["transactions"] for m in sel["monthly_trends"]) == 2
+    categories = {
+        row.category for row in db_session.query(SELDailyStats.category).all()
+    }
+    assert categories == {"transport", "none"}
+
+    assert shop["popular_products"] == [{"name": "T-shirt", "interest_count": 2}]
+    assert shop["category_performance"][0]["average_price"] == 12.0
+    assert shop["revenue"]["total"] == 120.0
+
+
+@pytest.mark.integration
+def test_incremental_refresh_only_rebuilds_touched_days(
+    db_session: Session, test_user_parent: User, test_user_admin: User
+):
+    last_month = datetime.now(timezone.utc) - timedelta(days=30)
+    _seed_sel(db_session, test_user_parent, test_user_admin, last_month)
+    rollups = AnalyticsRollups(db_session)
+    rollups.refresh(full=True)
+
+    db_session.add(
+        SELTransaction(
+            from_user_id=test_user_admin.id,
+            to_user_id=test_user_parent.id,
+            units=15,
+            status="approved",
+        )
+    )
+    db_session.commit()
+    written = rollups.refresh()
+
+    # Only today's bucket is rewritten; last month's rows are left alone
+    assert written["sel_daily"] == 1
+    assert written["shop_revenue_daily"] == 0
+    assert db_session.query(SELDailyStats).count() == 3
+    assert db_session.query(ShopRevenueDailyStats).count() == 0
+
+
+@pytest.mark.integration
+def test_incremental_refresh_picks_up_quantity_changes(
+    db_session: Session, test_user_parent: User
+):
+    product = ShopProduct(name="Sweat", base_price=Decimal("20.00"), category="uniform")
+    db_session.add(product)
+    db_session.flush()
+    db_session.add(
+        ShopInterest(
+            product_id=product.id,
+            user_id=test_user_parent.id,
+            quantity=1,
+            created_at=datetime.now(timezone.utc) - timedelta(days=30),
+        )
+    )
+    db_session.commit()
+    rollups = AnalyticsRollups(db_session)
+    rollups.refresh(full=True)
+
+    ShopCollaborativeService(db_session).express_interest(
+        test_user_parent.id, product.id, quantity=3
+    )
+    written = rollups.refresh()
+
+    assert written["shop_interest_daily"] == 1
+    assert db_session.query(ShopInterestDailyStats.quantity_total).scalar() == 3
+
+
+@pytest.mark.integration
+def test_full_refresh_drops_deleted_rows(
+    db_session: Session, test_user_parent: User, test_user_admin: User
+):
+    _seed_sel(db_session, test_user_parent, test_user_admin, datetime.now(timezone.utc))
+    rollups = AnalyticsRollups(db_session)
+    rollups.refresh()
+
+    db_session.query(SELTransaction).filter(SELTransaction.status == "pending").delete()
+    db_session.commit()
+    rollups.refresh(full=True)
+
+    assert [row.status for row in db_session.query(SELDailyStats).all()] == [
+        "completed"
+    ]
+
+
+@pytest.mark.integration
+def test_day_buckets_are_utc_on_postgresql():
+    sql = str(
+        select(_day(SELTransaction.created_at)).compile(dialect=postgresql.dialect())
+    )
+
+    # Same day as the UTC bounds, not the session time zone's
+    assert "date(timezone('UTC', sel_transactions.created_at))" in sql
@@ -0,0 +1,126 @@
+# Async request stack tests (ECOLEHUB_ASYNC_MODE)
+from decimal import Decimal
+
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.async_db import create_async_session_factory, to_async_url
+from app.auth_cache import principal_cache
+from app.main_stage4 import (
+    Base,
+    async_api_router,
+    create_access_token,
+    get_async_db,
+    get_password_hash,
+)
+from app.models_stage1 import User
+from app.models_stage3 import ShopProduct
+from app.sel_service import AsyncSELBusinessLogic
+from app.shop_service import AsyncShopCollaborativeService
+
+
+@pytest_asyncio.fixture
+async def async_session_factory():
+    async_engine = create_async_engine(
+        "sqlite+aiosqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield create_async_session_factory(async_engine)
+    await async_engine.dispose()
+    principal_cache.clear()
+
+
+async def _seed_parent(db) -> User:
+    user = User(
+        email="parent@test.be",
+        first_name="Marie",
+        last_name="Dupont",
+        hashed_password=get_password_hash("jules20220902"),
+        is_active=True,
+    )
+    db.add(user)
+    await db.commit()
+    return user
+
+
+@pytest.mark.unit
+def test_to_async_url_maps_drivers():
+    assert (
+        to_async_url("postgresql://u:p@db:5432/ecolehub")
+        == "postgresql+asyncpg://u:p@db:5432/ecolehub"
+    )
+    assert to_async_url("sqlite:///test.db") == "sqlite+aiosqlite:///test.db"
+    assert to_async_url("sqlite+aiosqlite://") == "sqlite+aiosqlite://"
+
+
+@pytest.mark.sel
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_async_sel_service_shares_business_rules(async_session_factory):
+    async with async_session_factory() as db:
+        user = await _seed_parent(db)
+        sel_service = AsyncSELBusinessLogic(db)
+
+        balance = await sel_service.get_or_create_balance(user.id)
+
+        assert balance.balance == 120
+        assert await sel_service.get_available_services(user.id) == []
+
+
+@pytest.mark.shop
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_async_routes_serve_catalogue(async_session_factory):
+    async with async_session_factory() as db:
+        user = await _seed_parent(db)
+        product = ShopProduct(
+            name="Sweat école",
+            base_price=Decimal("20.00"),
+            category="uniform",
+            min_quantity=2,
+        )
+        db.add(product)
+        await db.commit()
+        await AsyncShopCollaborativeService(db).express_interest(
+            user.id, product.id, quantity=2
+        )
+        product_id = str(product.id)
+
+    async def get_test_async_db():
+        async with async_session_factory() as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(async_api_router)
+    app.dependency_overrides[get_async_db] = get_test_async_db
+    headers = {
+        "Authorization": f"Bearer {create_access_token({'sub': 'parent@test.be'})}"
+    }
+
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.get("/api/me", headers=headers)
+        assert response.status_code == 200
+        assert response.json()["email"] == "parent@test.be"
+
+        response = await client.get("/api/shop/products", headers=headers)
+        assert response.status_code == 200
+        (item,) = response.json()
+        assert item["id"] == product_id
+        assert item["total_interest"] == 2
+        assert item["can_order"] is True
+        assert item["user_interest"]["quantity"] == 2
+
+        response = await client.delete(
+            f"/api/shop/products/{product_id}/interest", headers=headers
+        )
+        assert response.status_code == 200
+
+        response = await client.get("/api/sel/balance", headers=headers)
+        assert response.json()["balance"] == 120
@@ -0,0 +1,103 @@
+# Events listing tests (one aggregated query)
+import logging
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.events_service import list_events
+from app.models_stage1 import User
+from app.models_stage2 import Event, EventParticipant
+
+
+def _count_statements(db_session: Session, func):
+    statements = []
+    engine = db_session.get_bind().engine
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        func()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return len(statements)
+
+
+def _seed(db_session: Session, creator: User, *attendees: User):
+    now = datetime.now(timezone.utc)
+    past = Event(title="Rentrée", start_date=now - timedelta(days=30))
+    fair = Event(
+        title="Fancy-fair",
+        start_date=now + timedelta(days=3),
+        event_type="celebration",
+        created_by=creator.id,
+    )
+    meeting = Event(
+        title="Réunion P3",
+        start_date=now + timedelta(days=7),
+        event_type="parent_meeting",
+        class_name="P3",
+    )
+    db_session.add_all([past, fair, meeting])
+    db_session.flush()
+    db_session.add_all(
+        EventParticipant(event_id=fair.id, user_id=user.id) for user in attendees
+    )
+    db_session.add(
+        EventParticipant(event_id=meeting.id, user_id=creator.id, status="cancelled")
+    )
+    db_session.commit()
+
+
+@pytest.mark.integration
+class TestEventsListing:
+    """Counts and the caller's registration without per-event queries."""
+
+    def test_events_are_one_statement(
+        self, db_session, test_user_parent, test_user_admin, test_user_direction
+    ):
+        _seed(db_session, test_user_admin, test_user_parent, test_user_direction)
+
+        events = []
+        statements = _count_statements(
+            db_session,
+            lambda: events.extend(list_events(db_session, test_user_parent.id)),
+        )
+
+        assert statements == 1
+        assert [e["title"] for e in events] == ["Rentrée", "Fancy-fair", "Réunion P3"]
+        assert [e["participants_count"] for e in events] == [0, 2, 0]
+        assert [e["is_registered"] for e in events] == [False, True, False]
+
+    def test_filters_and_limit(self, db_session, test_user_admin):
+        _seed(db_session, test_user_admin)
+
+        upcoming = list_events(db_session, test_user_admin.id, upcoming_only=True)
+        meetings = list_events(
+            db_session, test_user_admin.id, event_type="parent_meeting"
+        )
+        first = list_events(db_session, test_user_admin.id, limit=1)
+
+        assert [e["title"] for e in upcoming] == ["Fancy-fair", "Réunion P3"]
+        assert [e["title"] for e in meetings] == ["Réunion P3"]
+        # A cancelled registration is still the caller's registration
+        assert meetings[0]["is_registered"] is True
+        assert [e["title"] for e in first] == ["Rentrée"]
+
+    def test_filter_counts_only_with_debug_logging(
+        self, caplog, db_session, test_user_admin
+    ):
+        _seed(db_session, test_user_admin)
+
+        quiet = _count_statements(
+            db_session,
+            lambda: list_events(db_session, test_user_admin.id, upcoming_only=True),
+        )
+        with caplog.at_level(logging.DEBUG, logger="app.events_service"):
+            list_events(db_session, test_user_admin.id, upcoming_only=True)
+
+        assert quiet == 1
+        assert "After upcoming: 2 events" in caplog.text
@@ -0,0 +1,189 @@
+# Conversation history (keyset pagination) and inbox tests
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.message_sink import insert_messages
+from app.messaging_service import (
+    backfill_last_messages,
+    encode_cursor,
+    get_inbox,
+    get_message_page,
+    serialize_message,
+)
+from app.models_stage1 import User
+from app.models_stage2 import Conversation, ConversationParticipant, Message
+
+
+def _seed_history(db_session: Session, author: User, count: int) -> Conversation:
+    conversation = Conversation(name="P3A", type="class", created_by=author.id)
+    db_session.add(conversation)
+    db_session.flush()
+    start = datetime(2026, 9, 1, 8, 0, tzinfo=timezone.utc)
+    for n in range(count):
+        # Pairs share a timestamp, so ordering must fall back on the id
+        db_session.add(
+            Message(
+                conversation_id=conversation.id,
+                user_id=author.id,
+                content=f"message {n}",
+                created_at=start + timedelta(minutes=n // 2),
+            )
+        )
+    db_session.commit()
+    return conversation
+
+
+def _walk(db_session, conversation, **cursor):
+    pages = []
+    while True:
+        page = get_message_page(db_session, conversation.id, limit=3, **cursor)
+        if not page:
+            return pages
+        pages.append(page)
+        if "before" in cursor:
+            cursor = {"before": encode_cursor(page[0])}
+        else:
+            cursor = {"after": encode_cursor(page[-1])}
+
+
+@pytest.mark.integration
+class TestMessageHistory:
+    """Cursor pages over a conversation's messages."""
+
+    def test_latest_page_is_oldest_first(self, db_session, test_user_parent):
+        conversation = _seed_history(db_session, test_user_parent, 7)
+
+        page = get_message_page(db_session, conversation.id, limit=3)
+
+        assert [m.created_at for m in page] == sorted(m.created_at for m in page)
+        assert len(page) == 3
+
+    def test_scrolling_back_visits_every_message_once(
+        self, db_session, test_user_parent
+    ):
+        conversation = _seed_history(db_session, test_user_parent, 7)
+        latest = get_message_page(db_session, conversation.id, limit=3)
+
+        pages = [latest] + _walk(
+            db_session, conversation, before=encode_cursor(latest[0])
+        )
+        seen = [m.id for page in reversed(pages) for m in page]
+
+        assert len(seen) == len(set(seen)) == 7
+        assert [len(page) for page in pages] == [3, 3, 1]
+
+    def test_catching_up_after_a_cursor(self, db_session, test_user_parent):
+        conversation = _seed_history(db_session, test_user_parent, 7)
+        everything = get_message_page(db_session, conversation.id, limit=100)
+
+        pages = _walk(db_session, conversation, after=encode_cursor(everything[1]))
+
+        assert [m.id for page in pages for m in page] == [m.id for m in everything[2:]]
+
+    def test_serialized_messages_carry_their_cursor(self, db_session, test_user_parent):
+        conversation = _seed_history(db_session, test_user_parent, 1)
+        (message,) = get_message_page(db_session, conversation.id)
+
+        payload = serialize_message(message)
+
+        assert payload["cursor"] == encode_cursor(message)
+        assert payload["user_name"] == "Marie Dupont"
+
+    def test_invalid_cursor_is_rejected(self, db_session, test_user_parent):
+        conversation = _seed_history(db_session, test_user_parent, 1)
+
+        with pytest.raises(HTTPException) as excinfo:
+            get_message_page(db_session, conversation.id, before="not-a-cursor")
+
+        assert excinfo.value.status_code == 400
+
+
+def _conversation(db_session: Session, name: str, *members: User) -> Conversation:
+    conversation = Conversation(name=name, type="group")
+    db_session.add(conversation)
+    db_session.flush()
+    db_session.add_all(
+        ConversationParticipant(
+            conversation_id=conversation.id,
+            user_id=member.id,
+            last_read_at=datetime(2026, 9, 1, 12, 0, tzinfo=timezone.utc),
+        )
+        for member in members
+    )
+    db_session.commit()
+    return conversation
+
+
+def _row(conversation: Conversation, author: User, minute: int, content: str = "x"):
+    return {
+        "id": uuid.uuid4(),
+        "conversation_id": conversation.id,
+        "user_id": author.id,
+        "content": content,
+        "message_type": "text",
+        "created_at": datetime(2026, 9, 1, 12, minute, tzinfo=timezone.utc),
+    }
+
+
+@pytest.mark.integration
+class TestInbox:
+    """Denormalized last message and one-statement inbox."""
+
+    def test_inbox_is_one_statement(
+        self, db_session, test_user_parent, test_user_admin
+    ):
+        parent, admin = test_user_parent, test_user_admin
+        quiet = _conversation(db_session, "Calme", parent, admin)
+        busy = _conversation(db_session, "P3A", parent, admin)
+        insert_messages(
+            db_session,
+            [
+                _row(quiet, admin, 1, "Bonjour"),
+                _row(busy, admin, 5, "Sortie vendredi"),
+                _row(busy, admin, 10, "N'oubliez pas le pique-nique"),
+                _row(busy, parent, 15, "Merci !"),
+            ],
+        )
+        db_session.commit()
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db_session.bind, "before_cursor_execute", record)
+        try:
+            inbox = get_inbox(db_session, parent.id)
+        finally:
+            event.remove(db_session.bind, "before_cursor_execute", record)
+
+        assert len(statements) == 1
+        assert [c["name"] for c in inbox] == ["P3A", "Calme"]
+        assert inbox[0]["last_message"]["content"] == "Merci !"
+        assert inbox[0]["last_message"]["user_name"] == "Marie Dupont"
+        assert [c["unread_count"] for c in inbox] == [2, 1]
+
+    def test_late_replay_keeps_the_newer_last_message(
+        self, db_session, test_user_parent
+    ):
+        conversation = _conversation(db_session, "P3A", test_user_parent)
+        newer = _row(conversation, test_user_parent, 30)
+        insert_messages(db_session, [newer])
+        insert_messages(db_session, [_row(conversation, test_user_parent, 20)])
+        db_session.commit()
+
+        db_session.refresh(conversation)
+        assert conversation.last_message_id == newer["id"]
+
+    def test_backfill_points_at_the_newest_message(self, db_session, test_user_parent):
+        conversation = _seed_history(db_session, test_user_parent, 5)
+        (newest,) = get_message_page(db_session, conversation.id, limit=1)
+
+        backfill_last_messages(db_session)
+
+        db_session.refresh(conversation)
+        assert conversation.last_message_id == newest.id
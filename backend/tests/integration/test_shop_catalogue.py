@@ -0,0 +1,193 @@
+# Shop catalogue read path tests (aggregated interest counts)
+from decimal import Decimal
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.models_stage1 import User
+from app.models_stage3 import ShopInterest, ShopProduct
+from app.schema_upgrades import backfill_shop_interest_counters
+from app.shop_service import ShopCollaborativeService
+from tests.conftest import UnclosedSession
+
+
+def _seed_products(db_session: Session, owner: User, count: int):
+    for i in range(count):
+        product = ShopProduct(
+            name=f"Cahier {i}",
+            base_price=Decimal("3.50"),
+            category="fournitures",
+            min_quantity=4,
+        )
+        db_session.add(product)
+        db_session.flush()
+        db_session.add(
+            ShopInterest(product_id=product.id, user_id=owner.id, quantity=2)
+        )
+    db_session.commit()
+
+
+def _count_statements(db_session: Session, func):
+    statements = []
+    engine = db_session.get_bind().engine
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        func()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return len(statements)
+
+
+@pytest.mark.shop
+@pytest.mark.integration
+def test_catalogue_query_count_is_flat(db_session: Session, test_user_parent: User):
+    """Catalogue reads must not issue one query per product."""
+    shop_service = ShopCollaborativeService(db_session)
+
+    _seed_products(db_session, test_user_parent, 3)
+    small = _count_statements(
+        db_session, lambda: shop_service.get_catalogue(test_user_parent.id)
+    )
+
+    _seed_products(db_session, test_user_parent, 30)
+    large = _count_statements(
+        db_session, lambda: shop_service.get_catalogue(test_user_parent.id)
+    )
+
+    assert small == large
+
+
+@pytest.mark.shop
+@pytest.mark.integration
+def test_catalogue_aggregates_and_user_interest(
+    client: TestClient,
+    db_session: Session,
+    test_user_parent: User,
+    test_user_admin: User,
+    auth_headers_parent: dict,
+):
+    product = ShopProduct(
+        name="Sweat école",
+        base_price=Decimal("20.00"),
+        category="uniform",
+        min_quantity=5,
+    )
+    db_session.add(product)
+    db_session.commit()
+
+    shop_service = ShopCollaborativeService(db_session)
+    shop_service.express_interest(test_user_parent.id, product.id, quantity=2)
+    shop_service.express_interest(test_user_admin.id, product.id, quantity=3)
+
+    response = client.get("/api/shop/products", headers=auth_headers_parent)
+    assert response.status_code == 200
+    item = next(p for p in response.json() if p["name"] == "Sweat école")
+    assert item["total_interest"] == 5
+    assert item["interested_users_count"] == 2
+    assert item["progress_percentage"] == 100
+    assert item["can_order"] is True
+    assert item["user_interest"] == {"has_interest": True, "quantity": 2, "notes": None}
+
+
+@pytest.mark.shop
+@pytest.mark.integration
+def test_interest_counters_follow_writes(
+    db_session: Session, test_user_parent: User, test_user_admin: User
+):
+    product = ShopProduct(
+        name="Gourde", base_price=Decimal("8.00"), category="divers", min_quantity=3
+    )
+    db_session.add(product)
+    db_session.commit()
+    shop_service = ShopCollaborativeService(db_session)
+
+    shop_service.express_interest(test_user_parent.id, product.id, quantity=1)
+    result = shop_service.express_interest(test_user_admin.id, product.id, quantity=1)
+    assert result["total_interest"] == 2
+    assert result["threshold_reached"] is False
+
+    # Updating an existing interest only applies the quantity difference
+    result = shop_service.express_interest(test_user_parent.id, product.id, quantity=2)
+    assert result["total_interest"] == 3
+    assert result["threshold_reached"] is True
+    assert shop_service.get_interest_totals(product.id) == (3, 2)
+
+    shop_service.cancel_interest(test_user_admin.id, product.id)
+    assert shop_service.get_interest_totals(product.id) == (2, 1)
+
+    shop_service.express_interest(test_user_admin.id, product.id, quantity=1)
+    shop_service.create_group_order(product.id, test_user_admin.id)
+    assert shop_service.get_interest_totals(product.id) == (0, 0)
+
+
+@pytest.mark.shop
+@pytest.mark.integration
+def test_failed_group_order_leaves_no_orphan_order(
+    monkeypatch, db_session: Session, test_user_parent: User, test_user_admin: User
+):
+    product = ShopProduct(
+        name="Trousse", base_price=Decimal("5.00"), category="divers", min_quantity=1
+    )
+    db_session.add(product)
+    db_session.commit()
+    shop_service = ShopCollaborativeService(db_session)
+    shop_service.express_interest(test_user_parent.id, product.id, quantity=2)
+
+    commits = []
+    monkeypatch.setattr(db_session, "commit", lambda: commits.append(1))
+
+    def fail(*args):
+        raise RuntimeError("counter update failed")
+
+    monkeypatch.setattr(shop_service, "_apply_interest_delta", fail)
+    with pytest.raises(RuntimeError):
+        shop_service.create_group_order(product.id, test_user_admin.id)
+
+    # Nothing was committed, so the caller's rollback drops the order too
+    assert commits == []
+
+
+@pytest.mark.shop
+@pytest.mark.integration
+def test_rebuild_interest_counters_repairs_drift(
+    db_session: Session, test_user_parent: User
+):
+    product = ShopProduct(
+        name="Agenda", base_price=Decimal("6.00"), category="fournitures"
+    )
+    db_session.add(product)
+    db_session.flush()
+    # Interest inserted behind the service's back: counters are now stale
+    db_session.add(
+        ShopInterest(product_id=product.id, user_id=test_user_parent.id, quantity=4)
+    )
+    db_session.commit()
+    shop_service = ShopCollaborativeService(db_session)
+    assert shop_service.get_interest_totals(product.id) == (0, 0)
+
+    result = shop_service.rebuild_interest_counters()
+
+    assert result["drifted"] >= 1
+    assert shop_service.get_interest_totals(product.id) == (4, 1)
+
+
+@pytest.mark.shop
+@pytest.mark.integration
+def test_startup_backfill_builds_missing_counters(
+    db_session: Session, test_user_parent: User
+):
+    _seed_products(db_session, test_user_parent, 2)
+    shop_service = ShopCollaborativeService(db_session)
+    product_ids = [product.id for product in db_session.query(ShopProduct)]
+    assert shop_service.get_interest_totals(product_ids[0]) == (0, 0)
+
+    backfill_shop_interest_counters(lambda: UnclosedSession(db_session))
+
+    for product_id in product_ids:
+        assert shop_service.get_interest_totals(product_id) == (2, 1)
@@ -0,0 +1,58 @@
+# Active user tracker tests
+import pytest
+from prometheus_client import REGISTRY
+
+from app.active_users import ACTIVE_USERS_KEY, ActiveUserTracker
+from app.analytics_service import EcoleHubAnalytics
+from tests.conftest import FakeRedis
+
+
+class NoScanRedis(FakeRedis):
+    def keys(self, pattern: str):
+        raise AssertionError("KEYS must not be used on the scrape path")
+
+
+@pytest.mark.unit
+class TestActiveUserTracker:
+    """Last-seen sorted set and windowed counts."""
+
+    def test_counts_users_per_window(self):
+        redis = FakeRedis()
+        tracker = ActiveUserTracker(redis)
+        now = 1_000_000.0
+        tracker.touch("recent", now=now - 60)
+        tracker.touch("this-hour", now=now - 1800)
+        tracker.touch("today", now=now - 7200)
+
+        assert tracker.counts(now=now) == {"5m": 1, "1h": 2, "24h": 3}
+
+    def test_entries_older_than_a_day_are_trimmed(self):
+        redis = FakeRedis()
+        tracker = ActiveUserTracker(redis)
+        now = 1_000_000.0
+        tracker.touch("gone", now=now - 90000)
+        tracker.touch("today", now=now - 60)
+
+        assert tracker.counts(now=now)["24h"] == 1
+        assert list(redis._store[ACTIVE_USERS_KEY]) == ["today"]
+        assert redis.round_trips == 1
+
+    def test_repeat_touches_are_throttled(self):
+        redis = FakeRedis()
+        tracker = ActiveUserTracker(redis, touch_interval=60)
+        tracker.touch("u1", now=100.0)
+        tracker.touch("u1", now=130.0)
+
+        assert redis._store[ACTIVE_USERS_KEY] == {"u1": 100.0}
+
+    def test_business_metrics_do_not_scan_keys(self, db_session):
+        redis = NoScanRedis()
+        ActiveUserTracker(redis).touch("u1")
+
+        EcoleHubAnalytics(db_session, redis).refresh_business_metrics()
+
+        assert REGISTRY.get_sample_value("ecolehub_active_users") == 1
+        assert (
+            REGISTRY.get_sample_value("ecolehub_active_users_window", {"window": "5m"})
+            == 1
+        )
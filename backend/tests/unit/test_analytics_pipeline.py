@@ -0,0 +1,76 @@
+# Analytics event pipeline tests
+import json
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app import analytics_service
+from app.analytics_pipeline import AnalyticsPipeline
+from app.analytics_service import EcoleHubAnalytics
+from tests.conftest import FakeRedis
+
+
+def _dropped(reason: str) -> float:
+    return (
+        REGISTRY.get_sample_value(
+            "ecolehub_analytics_events_dropped_total", {"reason": reason}
+        )
+        or 0.0
+    )
+
+
+class BrokenRedis(FakeRedis):
+    def pipeline(self, transaction=True):
+        raise ConnectionError("redis down")
+
+
+@pytest.mark.unit
+class TestAnalyticsPipeline:
+    """Bounded queue and batched Redis flushes."""
+
+    def test_full_queue_drops_and_counts(self):
+        pipeline = AnalyticsPipeline(FakeRedis(), max_queue=2)
+        before = _dropped("queue_full")
+
+        results = [pipeline.enqueue("lpush", "k", i) for i in range(3)]
+
+        assert results == [True, True, False]
+        assert _dropped("queue_full") == before + 1
+        assert pipeline.pending() == 2
+
+    def test_flush_uses_one_round_trip_per_batch(self):
+        redis = FakeRedis()
+        pipeline = AnalyticsPipeline(redis, batch_size=10)
+        for i in range(4):
+            pipeline.enqueue("lpush", "analytics:a", f"e{i}", ttl=60)
+
+        assert pipeline.flush_once() == 4
+
+        assert redis.round_trips == 1
+        assert redis._store["analytics:a"] == ["e3", "e2", "e1", "e0"]
+        assert pipeline.pending() == 0
+
+    def test_redis_failure_drops_batch(self):
+        pipeline = AnalyticsPipeline(BrokenRedis())
+        pipeline.enqueue("lpush", "k", "v")
+        before = _dropped("redis_error")
+
+        assert pipeline.flush_once() == 1
+        assert _dropped("redis_error") == before + 1
+
+    @pytest.mark.asyncio
+    async def test_running_pipeline_takes_tracked_actions(self, monkeypatch):
+        redis = FakeRedis()
+        pipeline = AnalyticsPipeline(redis, flush_interval=60)
+        monkeypatch.setattr(analytics_service, "analytics_pipeline", pipeline)
+
+        pipeline.start()
+        EcoleHubAnalytics(None, redis).track_user_action(
+            "u1", "login", {"user_type": "parent"}
+        )
+        # Queued on the request path, written by the flusher
+        assert redis._store == {}
+        await pipeline.stop()
+
+        (events,) = redis._store.values()
+        assert json.loads(events[0])["action"] == "login"
@@ -0,0 +1,209 @@
+# Authentication principal cache tests
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.auth_cache import PrincipalCache, _token_key, principal_cache
+from app.models_stage1 import User
+from tests.conftest import FakeRedis
+
+
+def _count_user_lookups(db_session: Session, func):
+    statements = []
+    engine = db_session.get_bind().engine
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        if "FROM users" in statement:
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        func()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return len(statements)
+
+
+@pytest.mark.auth
+@pytest.mark.unit
+class TestPrincipalCacheEndpoints:
+    """Cached authentication through the API."""
+
+    def test_repeated_requests_skip_user_lookup(
+        self,
+        client: TestClient,
+        db_session: Session,
+        test_user_parent: User,
+        auth_headers_parent: dict,
+    ):
+        first = _count_user_lookups(
+            db_session, lambda: client.get("/api/me", headers=auth_headers_parent)
+        )
+        second = _count_user_lookups(
+            db_session, lambda: client.get("/api/me", headers=auth_headers_parent)
+        )
+
+        assert first >= 1
+        assert second == 0
+        response = client.get("/api/me", headers=auth_headers_parent)
+        assert response.status_code == 200
+        assert response.json()["email"] == "parent@test.be"
+
+    def test_profile_update_is_visible_immediately(
+        self, client: TestClient, test_user_parent: User, auth_headers_parent: dict
+    ):
+        client.get("/api/me", headers=auth_headers_parent)
+
+        response = client.patch(
+            "/api/me", json={"first_name": "Sophie"}, headers=auth_headers_parent
+        )
+        assert response.status_code == 200
+
+        response = client.get("/api/me", headers=auth_headers_parent)
+        assert response.json()["first_name"] == "Sophie"
+
+    def test_withdraw_consent_invalidates_principal(
+        self, client: TestClient, test_user_parent: User, auth_headers_parent: dict
+    ):
+        client.get("/api/me", headers=auth_headers_parent)
+        assert len(principal_cache._local) == 1
+
+        response = client.post("/api/consent/withdraw", headers=auth_headers_parent)
+        assert response.status_code == 200
+        assert len(principal_cache._local) == 0
+
+    def test_delete_me_invalidates_principal(
+        self, client: TestClient, test_user_parent: User, auth_headers_parent: dict
+    ):
+        client.get("/api/me", headers=auth_headers_parent)
+
+        response = client.delete("/api/me", headers=auth_headers_parent)
+        assert response.status_code == 200
+
+        response = client.get("/api/me", headers=auth_headers_parent)
+        assert response.json()["first_name"] == "Deleted"
+
+
+@pytest.mark.auth
+@pytest.mark.unit
+class TestPrincipalCache:
+    """Cache bounds and expiry."""
+
+    def test_entries_never_outlive_token(self, db_session: Session, test_user_parent):
+        cache = PrincipalCache(ttl_seconds=30, max_entries=10)
+
+        cache.put("expired-token", test_user_parent, time.time() - 1)
+
+        assert cache.get_user("expired-token", db_session) is None
+        assert cache.stats()["misses"] == 1
+
+    def test_size_is_bounded(self, db_session: Session, test_user_parent: User):
+        cache = PrincipalCache(ttl_seconds=30, max_entries=2)
+        exp = time.time() + 60
+
+        for token in ("a", "b", "c"):
+            cache.put(token, test_user_parent, exp)
+
+        assert cache.get_user("a", db_session) is None
+        assert cache.get_user("c", db_session).id == test_user_parent.id
+        assert cache.stats()["entries"] == 2
+
+    def test_disabled_when_ttl_is_zero(self, db_session: Session, test_user_parent):
+        cache = PrincipalCache(ttl_seconds=0)
+
+        cache.put("token", test_user_parent, time.time() + 60)
+
+        assert cache.get_user("token", db_session) is None
+        assert cache.stats()["entries"] == 0
+
+    def test_password_hash_is_not_cached(
+        self, db_session: Session, test_user_parent: User
+    ):
+        cache = PrincipalCache(ttl_seconds=30)
+        cache.put("token", test_user_parent, time.time() + 60)
+
+        snapshot = cache._local.get(_token_key("token"))
+        assert "hashed_password" not in snapshot["columns"]
+        assert "consented_at" not in snapshot["columns"]
+        user = cache.get_user("token", db_session)
+        assert user.hashed_password == test_user_parent.hashed_password
+
+    def test_invalidated_subject_is_not_recached(
+        self, db_session: Session, test_user_parent: User
+    ):
+        cache = PrincipalCache(ttl_seconds=30)
+        stale = {"id": test_user_parent.id, "email": test_user_parent.email}
+
+        cache.invalidate_subject(test_user_parent.email)
+        cache.put("token", User(**stale), time.time() + 60)
+
+        assert cache.get_user("token", db_session) is None
+
+
+class SharedRedis(FakeRedis):
+    """Key-value and pub/sub shared by the replicas of a test."""
+
+    def __init__(self):
+        super().__init__()
+        self.subscribers = []
+
+    def get(self, key):
+        return self._store.get(key)
+
+    def setex(self, key, seconds, value):
+        self._store[key] = value
+
+    def sadd(self, key, *members):
+        self._store.setdefault(key, set()).update(members)
+
+    def smembers(self, key):
+        return set(self._store.get(key, ()))
+
+    def exists(self, key):
+        return int(key in self._store)
+
+    def publish(self, channel, message):
+        for handlers in self.subscribers:
+            if channel in handlers:
+                handlers[channel]({"channel": channel, "data": message})
+
+    def pubsub(self, **kwargs):
+        redis = self
+
+        class PubSub:
+            def subscribe(self, **handlers):
+                redis.subscribers.append(handlers)
+
+            def run_in_thread(self, **kwargs):
+                return type("Worker", (), {"stop": lambda self: None})()
+
+        return PubSub()
+
+
+@pytest.mark.auth
+@pytest.mark.unit
+class TestPrincipalCacheReplicas:
+    """Invalidations reach the local tier of every replica."""
+
+    def test_invalidation_drops_other_replicas_local_entries(
+        self, db_session: Session, test_user_parent: User
+    ):
+        redis = SharedRedis()
+        first, second = (
+            PrincipalCache(ttl_seconds=30, redis_client=redis) for _ in "ab"
+        )
+        for replica in (first, second):
+            replica.start_listener()
+            replica.put("token", test_user_parent, time.time() + 60)
+
+        first.invalidate_subject(test_user_parent.email)
+
+        assert len(second._local) == 0
+        assert second.get_user("token", db_session) is None
+        second.put("token", test_user_parent, time.time() + 60)
+        assert len(second._local) == 0
+        second.stop_listener()
+        first.stop_listener()
@@ -0,0 +1,100 @@
+# In-process cache tests
+import threading
+import time
+
+import pytest
+
+from app.caching import LRUTTLCache, SnapshotCache
+
+
+class Loader:
+    def __init__(self, source="load"):
+        self.source = source
+        self.calls = 0
+        self.done = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.done.set()
+        return {"source": self.source, "version": self.calls}
+
+
+@pytest.mark.unit
+class TestLRUTTLCache:
+    """Size bound and expiry."""
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUTTLCache(max_entries=2, ttl_seconds=30)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+
+    def test_entries_expire(self):
+        cache = LRUTTLCache(ttl_seconds=30)
+        cache.set("a", 1, ttl_seconds=0.01)
+        time.sleep(0.02)
+
+        assert cache.get("a") is None
+
+
+@pytest.mark.unit
+class TestSnapshotCache:
+    """TTL plus stale-while-revalidate."""
+
+    def test_fresh_snapshot_is_reused(self):
+        cache = SnapshotCache(ttl_seconds=30, stale_seconds=30)
+        load = Loader()
+
+        assert cache.get("k", load) == {"source": "load", "version": 1}
+        assert cache.get("k", load) == {"source": "load", "version": 1}
+        assert load.calls == 1
+
+    def test_stale_snapshot_is_served_while_refreshing(self):
+        cache = SnapshotCache(ttl_seconds=0.01, stale_seconds=30)
+        load, refresh = Loader(), Loader("refresh")
+        cache.get("k", load)
+        time.sleep(0.02)
+
+        assert cache.get("k", load, refresh)["source"] == "load"
+        assert refresh.done.wait(1)
+        time.sleep(0.01)
+        assert cache.lookup("k", refresh)["source"] == "refresh"
+        assert load.calls == 1
+
+    def test_expired_snapshot_is_loaded_inline(self):
+        cache = SnapshotCache(ttl_seconds=0.01, stale_seconds=0.01)
+        load = Loader()
+        cache.get("k", load)
+        time.sleep(0.03)
+
+        assert cache.get("k", load)["version"] == 2
+
+    def test_uncacheable_values_are_not_kept(self):
+        cache = SnapshotCache(cacheable=lambda value: "error" not in value)
+        cache.put("k", {"error": "boom"})
+
+        assert cache.lookup("k", Loader()) is None
+
+    def test_refresh_started_before_invalidation_is_dropped(self):
+        cache = SnapshotCache(ttl_seconds=0.01, stale_seconds=30)
+        cache.get("k", Loader())
+        time.sleep(0.02)
+        release = threading.Event()
+        refresh = Loader("refresh")
+
+        def slow_refresh():
+            release.wait(1)
+            return refresh()
+
+        cache.lookup("k", slow_refresh)
+        cache.invalidate()
+        release.set()
+        assert refresh.done.wait(1)
+        time.sleep(0.01)
+
+        assert cache.lookup("k", Loader()) is None
+        assert cache.get("k", Loader("after"))["source"] == "after"
@@ -0,0 +1,65 @@
+# Database engine factory and pool telemetry tests
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import exc as sa_exc
+from sqlalchemy import text
+
+from app import database
+from app.database import InstrumentedQueuePool, create_db_engine, pool_options
+
+
+def _sample(name: str, pool: str) -> float:
+    return REGISTRY.get_sample_value(name, {"pool": pool}) or 0.0
+
+
+@pytest.mark.unit
+class TestPoolOptions:
+    """Configured pool settings per database URL."""
+
+    def test_postgres_uses_configured_pool(self):
+        options = pool_options("postgresql://ecolehub@localhost/ecolehub")
+
+        assert options["poolclass"] is InstrumentedQueuePool
+        assert options["pool_size"] == database.DB_POOL_SIZE
+        assert options["max_overflow"] == database.DB_MAX_OVERFLOW
+        assert options["pool_pre_ping"] is database.DB_POOL_PRE_PING
+        assert "connect_args" not in options
+
+    @pytest.mark.parametrize("url", ["sqlite://", "sqlite:///:memory:"])
+    def test_memory_sqlite_keeps_default_pool(self, url):
+        assert pool_options(url) == {"connect_args": {"check_same_thread": False}}
+
+
+@pytest.mark.unit
+class TestPoolTelemetry:
+    """Gauges and checkout histogram published by instrumented pools."""
+
+    def test_checkout_is_measured(self, tmp_path):
+        engine = create_db_engine(f"sqlite:///{tmp_path}/pool.db", pool_name="t-wait")
+        before = _sample("ecolehub_db_pool_checkout_wait_seconds_count", "t-wait")
+
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            assert _sample("ecolehub_db_pool_checked_out", "t-wait") == 1
+
+        assert _sample("ecolehub_db_pool_checked_out", "t-wait") == 0
+        assert _sample("ecolehub_db_pool_idle", "t-wait") == 1
+        assert (
+            _sample("ecolehub_db_pool_checkout_wait_seconds_count", "t-wait")
+            == before + 1
+        )
+        engine.dispose()
+
+    def test_checkout_timeouts_are_counted(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(database, "DB_POOL_SIZE", 1)
+        monkeypatch.setattr(database, "DB_MAX_OVERFLOW", 0)
+        monkeypatch.setattr(database, "DB_POOL_TIMEOUT", 0.05)
+        engine = create_db_engine(f"sqlite:///{tmp_path}/pool.db", pool_name="t-full")
+        assert _sample("ecolehub_db_pool_capacity", "t-full") == 1
+
+        with engine.connect():
+            with pytest.raises(sa_exc.TimeoutError):
+                engine.connect()
+
+        assert _sample("ecolehub_db_pool_checkout_timeouts_total", "t-full") == 1
+        engine.dispose()
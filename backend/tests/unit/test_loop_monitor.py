@@ -0,0 +1,34 @@
+# Event loop lag monitor tests
+import asyncio
+import time
+
+import pytest
+
+from app.loop_monitor import LoopLagMonitor
+
+
+@pytest.mark.unit
+class TestLoopLagMonitor:
+    """Max / p95 lag over the sample window."""
+
+    def test_stats_over_window(self):
+        monitor = LoopLagMonitor(window=20)
+        for lag in [0.001] * 19 + [0.5]:
+            monitor.record(lag)
+
+        # One outlier in twenty is above the 95th percentile
+        assert monitor.stats() == {"max": 0.5, "p95": 0.001}
+        monitor.record(0.2)
+        assert monitor.stats() == {"max": 0.5, "p95": 0.2}
+
+    @pytest.mark.asyncio
+    async def test_blocking_call_is_measured(self):
+        monitor = LoopLagMonitor(interval=0.01)
+        monitor.start()
+        await asyncio.sleep(0.02)
+
+        time.sleep(0.1)  # blocks the loop
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+        assert monitor.stats()["max"] >= 0.05
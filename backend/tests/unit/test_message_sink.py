@@ -0,0 +1,109 @@
+# Write-behind message sink tests
+import uuid
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.message_sink import MESSAGE_STREAM, MessageSink
+from app.models_stage1 import User
+from app.models_stage2 import Conversation, Message
+from tests.conftest import FakeRedis, UnclosedSession
+
+
+class FakeStreamRedis(FakeRedis):
+    """One consumer group over one stream."""
+
+    def __init__(self):
+        super().__init__()
+        self.entries = []
+        self.delivered = []
+        self.acked = []
+        self._seq = 0
+
+    def xadd(self, stream, fields):
+        self._seq += 1
+        self.entries.append((f"{self._seq}-0", dict(fields)))
+
+    def xreadgroup(self, group, consumer, streams, count=None, block=None):
+        fresh = [e for e in self.entries if e[0] not in self.delivered][:count]
+        self.delivered += [entry_id for entry_id, _ in fresh]
+        return [[MESSAGE_STREAM, fresh]] if fresh else []
+
+    def xautoclaim(self, stream, group, consumer, min_idle_time, start_id, count):
+        pending = [
+            e for e in self.entries if e[0] in self.delivered and e[0] not in self.acked
+        ]
+        return ["0-0", pending, []]
+
+    def xack(self, stream, group, *ids):
+        self.acked += ids
+
+    def xdel(self, stream, *ids):
+        self.entries = [e for e in self.entries if e[0] not in ids]
+
+
+@pytest.fixture
+def conversation(db_session: Session, test_user_parent: User) -> Conversation:
+    conversation = Conversation(
+        name="P3", type="class", class_name="P3", created_by=test_user_parent.id
+    )
+    db_session.add(conversation)
+    db_session.commit()
+    return conversation
+
+
+def _queued_sink(db_session, redis):
+    sink = MessageSink(redis, lambda: UnclosedSession(db_session), enabled=True)
+    # Pretend the consumer task is up so submit() only enqueues
+    sink._task = type("Task", (), {"done": lambda self: False})()
+    return sink
+
+
+@pytest.mark.unit
+class TestMessageSink:
+    """Durable enqueue, batched insert, idempotent replay."""
+
+    def test_submit_writes_inline_without_consumer(
+        self, db_session, conversation, test_user_parent
+    ):
+        sink = MessageSink(FakeStreamRedis(), enabled=True)
+
+        payload = sink.submit(
+            db_session, conversation.id, test_user_parent.id, "Bonjour"
+        )
+
+        stored = db_session.get(Message, uuid.UUID(payload["id"]))
+        assert stored.content == "Bonjour"
+
+    def test_queued_messages_are_inserted_in_one_batch(
+        self, db_session, conversation, test_user_parent
+    ):
+        redis = FakeStreamRedis()
+        sink = _queued_sink(db_session, redis)
+        payloads = [
+            sink.submit(db_session, conversation.id, test_user_parent.id, f"m{i}")
+            for i in range(3)
+        ]
+        assert db_session.query(Message).count() == 0
+
+        assert sink.flush_once() == 3
+
+        assert {str(m.id) for m in db_session.query(Message)} == {
+            p["id"] for p in payloads
+        }
+        assert redis.entries == []
+
+    def test_replay_after_crash_does_not_duplicate(
+        self, db_session, conversation, test_user_parent
+    ):
+        redis = FakeStreamRedis()
+        sink = _queued_sink(db_session, redis)
+        sink.submit(db_session, conversation.id, test_user_parent.id, "Réunion")
+        entries = redis.xreadgroup("g", "c", {}, count=10)[0][1]
+        # Inserted, then the consumer died before acknowledging
+        sink._persist(entries)
+        redis.acked.clear()
+        redis.entries = entries
+
+        assert sink.replay_stale() == 1
+        assert db_session.query(Message).count() == 1
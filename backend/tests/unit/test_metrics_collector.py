@@ -0,0 +1,80 @@
+# Business metrics collector tests
+import pytest
+from prometheus_client import REGISTRY
+
+from app.metrics_collector import (
+    BusinessMetricsCollector,
+    ecolehub_business_metrics_refreshed,
+)
+from app.models_stage1 import SELBalance, User
+from tests.conftest import FakeRedis, UnclosedSession
+
+
+@pytest.mark.unit
+class TestBusinessMetricsCollector:
+    """Gauges are refreshed off the scrape path."""
+
+    def test_collect_refreshes_business_gauges(
+        self, db_session, test_user_parent: User, test_user_admin: User
+    ):
+        db_session.add_all(
+            [
+                SELBalance(user_id=test_user_parent.id, balance=100),
+                SELBalance(user_id=test_user_admin.id, balance=200),
+            ]
+        )
+        db_session.commit()
+        collector = BusinessMetricsCollector(
+            lambda: UnclosedSession(db_session), FakeRedis()
+        )
+
+        collector.collect_once()
+
+        assert REGISTRY.get_sample_value("users_total") == 2
+        assert REGISTRY.get_sample_value("ecolehub_total_families") == 2
+        assert REGISTRY.get_sample_value("ecolehub_sel_balance_average") == 150
+        assert REGISTRY.get_sample_value(
+            "ecolehub_business_metrics_last_refresh_timestamp_seconds"
+        )
+
+    def test_failed_refresh_keeps_the_last_timestamp(self, db_session):
+        class DownRedis(FakeRedis):
+            def pipeline(self, *args, **kwargs):
+                raise ConnectionError("redis down")
+
+        ecolehub_business_metrics_refreshed.set(0)
+        collector = BusinessMetricsCollector(
+            lambda: UnclosedSession(db_session), DownRedis()
+        )
+
+        collector.collect_once()
+
+        assert (
+            REGISTRY.get_sample_value(
+                "ecolehub_business_metrics_last_refresh_timestamp_seconds"
+            )
+            == 0
+        )
+
+    def test_session_errors_do_not_escape(self):
+        def unavailable():
+            raise ConnectionError("database down")
+
+        ecolehub_business_metrics_refreshed.set(0)
+
+        BusinessMetricsCollector(unavailable, FakeRedis()).collect_once()
+
+        assert (
+            REGISTRY.get_sample_value(
+                "ecolehub_business_metrics_last_refresh_timestamp_seconds"
+            )
+            == 0
+        )
+
+    def test_delay_stays_within_jitter(self):
+        collector = BusinessMetricsCollector(interval=30, jitter=0.2)
+
+        delays = [collector.next_delay() for _ in range(50)]
+
+        assert all(24 <= delay <= 36 for delay in delays)
+        assert len(set(delays)) > 1
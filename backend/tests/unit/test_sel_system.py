@@ -1,10 +1,31 @@
 # SEL (Système d'Échange Local) Unit Tests
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
 import pytest
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
-from sqlalchemy.orm import Session
-
-from app.models_stage1 import SELService, User
-from app.sel_service import SELBusinessLogic
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.models_stage1 import (
+    Base,
+    SELBalance,
+    SELLedgerEntry,
+    SELService,
+    SELTransaction,
+    User,
+)
+from app.schema_upgrades import backfill_sel_ledger
+from app.schemas_stage1 import SELServiceCreate, SELServiceUpdate
+from app.sel_ledger import (
+    SNAPSHOT_SETTLE_SECONDS,
+    backfill_ledger,
+    take_snapshots,
+    verify_ledger,
+)
+from app.sel_service import SELBusinessLogic, available_services_cache
 
 
 @pytest.mark.sel
@@ -52,6 +73,29 @@ class TestSELBalance:
         assert new_balance_valid <= 600  # Valid: can stay at 600
         assert new_balance_invalid > 600  # Invalid: cannot go above 600
 
+    def test_balance_lookup_joins_the_callers_transaction(self, sel_sessions):
+        with sel_sessions() as db:
+            (user,) = _users(db, 1)
+            sel_service = SELBusinessLogic(db)
+            statements = []
+
+            def record(conn, cursor, statement, *args):
+                statements.append(statement)
+
+            event.listen(db.get_bind(), "before_cursor_execute", record)
+            try:
+                first = sel_service.get_or_create_balance(user.id)
+                again = SELBusinessLogic(db).get_or_create_balance(user.id)
+            finally:
+                event.remove(db.get_bind(), "before_cursor_execute", record)
+
+            assert again is first
+            # One lookup and one upsert; the second call hits the session cache
+            assert len(statements) == 2
+            db.rollback()
+            assert db.query(SELBalance).count() == 0
+            assert sel_service.get_or_create_balance(user.id).balance == 120
+
     def test_units_per_hour_standard_60(self, sel_categories):
         """Test standard rate is 60 units = 1 hour."""
         standard_rate = 60
@@ -232,3 +276,391 @@ class TestSELTransactions:
         assert "total_received" in data
         assert "total_given" in data
         assert isinstance(data["balance"], int)
+
+
+@pytest.fixture
+def sel_sessions(tmp_path):
+    """
+    Sessions on a file database of their own: approvals commit and roll back
+    for real, and concurrent approvals each need their own connection.
+    """
+    engine = create_engine(
+        f"sqlite:///{tmp_path}/sel.db",
+        connect_args={"check_same_thread": False, "timeout": 30},
+    )
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(bind=engine, expire_on_commit=False)
+    engine.dispose()
+
+
+def _users(db: Session, count: int):
+    users = [
+        User(
+            email=f"sel{i}@test.be",
+            first_name="SEL",
+            last_name=str(i),
+            hashed_password="hashed",
+        )
+        for i in range(count)
+    ]
+    db.add_all(users)
+    db.commit()
+    return users
+
+
+def _pending(db: Session, payer: User, payee: User, units: int, created_at=None):
+    transaction = SELTransaction(
+        from_user_id=payer.id,
+        to_user_id=payee.id,
+        units=units,
+        status="pending",
+        created_at=created_at,
+    )
+    db.add(transaction)
+    db.commit()
+    return transaction
+
+
+@pytest.mark.sel
+class TestSELApproval:
+    """Conditional balance updates on approval."""
+
+    def test_approval_moves_units_once(self, sel_sessions):
+        with sel_sessions() as db:
+            payer, payee = _users(db, 2)
+            sel_service = SELBusinessLogic(db)
+            transaction = _pending(db, payer, payee, 60)
+
+            approved = sel_service.approve_transaction(transaction.id, payee.id)
+            with pytest.raises(HTTPException) as excinfo:
+                sel_service.approve_transaction(transaction.id, payee.id)
+
+            assert approved.status == "approved"
+            assert excinfo.value.status_code == 400
+            payer_balance = sel_service.get_or_create_balance(payer.id)
+            payee_balance = sel_service.get_or_create_balance(payee.id)
+            assert (payer_balance.balance, payer_balance.total_given) == (60, 60)
+            assert (payee_balance.balance, payee_balance.total_received) == (180, 60)
+
+    def test_approval_beyond_the_limit_changes_nothing(self, sel_sessions):
+        with sel_sessions() as db:
+            payer, payee = _users(db, 2)
+            sel_service = SELBusinessLogic(db)
+            sel_service.get_or_create_balance(payee.id).balance = 590
+            db.commit()
+            transaction = _pending(db, payer, payee, 60)
+
+            with pytest.raises(HTTPException) as excinfo:
+                sel_service.approve_transaction(transaction.id, payee.id)
+
+            assert excinfo.value.status_code == 400
+            assert "+600" in excinfo.value.detail
+            db.refresh(transaction)
+            assert transaction.status == "pending"
+            assert sel_service.get_or_create_balance(payer.id).balance == 120
+
+    def test_concurrent_approvals_cannot_overdraw(self, sel_sessions):
+        with sel_sessions() as db:
+            payer, *payees = _users(db, 31)
+            transactions = [_pending(db, payer, payee, 20) for payee in payees]
+
+        def approve(transaction):
+            with sel_sessions() as db:
+                try:
+                    SELBusinessLogic(db).approve_transaction(
+                        transaction.id, transaction.to_user_id
+                    )
+                    return 200
+                except HTTPException as e:
+                    return e.status_code
+
+        with ThreadPoolExecutor(max_workers=10) as pool:
+            results = list(pool.map(approve, transactions))
+
+        with sel_sessions() as db:
+            balance = SELBusinessLogic(db).get_or_create_balance(payer.id)
+        # 120 initial units down to the -300 floor, 20 units at a time
+        assert results.count(200) == 21
+        assert results.count(400) == 9
+        assert (balance.balance, balance.total_given) == (-300, 420)
+
+
+@pytest.mark.sel
+class TestSELSettlement:
+    """Batch settlement with set-based balance updates."""
+
+    def test_each_item_gets_its_own_result(self, sel_sessions):
+        with sel_sessions() as db:
+            payer, payee, other = _users(db, 3)
+            sel_service = SELBusinessLogic(db)
+            settled = _pending(db, payer, payee, 10)
+            foreign = _pending(db, payer, other, 10)
+            done = _pending(db, payer, payee, 10)
+            sel_service.approve_transaction(done.id, payee.id)
+            missing = uuid.uuid4()
+
+            results = sel_service.settle_transactions(
+                [settled.id, foreign.id, done.id, missing], payee.id
+            )
+
+            assert [r["status_code"] for r in results] == [200, 403, 400, 404]
+            db.refresh(foreign)
+            assert foreign.status == "pending"
+            balance = sel_service.get_or_create_balance(payee.id)
+            assert (balance.balance, balance.total_received) == (140, 20)
+
+    def test_limits_apply_in_creation_order(self, sel_sessions):
+        with sel_sessions() as db:
+            payer, *payees = _users(db, 4)
+            start = datetime(2026, 9, 1, tzinfo=timezone.utc)
+            transactions = [
+                _pending(db, payer, payee, 200, start + timedelta(minutes=n))
+                for n, payee in enumerate(payees)
+            ]
+            sel_service = SELBusinessLogic(db)
+
+            results = sel_service.settle_transactions(
+                [t.id for t in reversed(transactions)], payer.id, is_coordinator=True
+            )
+
+            assert [r["status_code"] for r in results] == [400, 200, 200]
+            assert "-300" in results[0]["detail"]
+            balance = sel_service.get_or_create_balance(payer.id)
+            assert (balance.balance, balance.total_given) == (-280, 400)
+            db.refresh(transactions[-1])
+            assert transactions[-1].status == "pending"
+
+    def test_statements_do_not_grow_with_the_batch(self, sel_sessions):
+        def statements_for(count):
+            with sel_sessions() as db:
+                payer, *payees = _users(db, count + 1)
+                ids = [_pending(db, payer, payee, 1).id for payee in payees]
+                statements = []
+
+                def record(conn, cursor, statement, *args):
+                    statements.append(statement)
+
+                event.listen(db.get_bind(), "before_cursor_execute", record)
+                try:
+                    SELBusinessLogic(db).settle_transactions(
+                        ids, payer.id, is_coordinator=True
+                    )
+                finally:
+                    event.remove(db.get_bind(), "before_cursor_execute", record)
+                db.query(SELTransaction).delete()
+                db.query(User).delete()
+                db.commit()
+                return len(statements)
+
+        assert statements_for(2) == statements_for(40)
+
+
+@pytest.mark.sel
+class TestSELLedger:
+    """Double-entry ledger, snapshot reads and the verifier."""
+
+    def test_approval_writes_a_debit_and_a_credit(self, sel_sessions):
+        with sel_sessions() as db:
+            payer, payee = _users(db, 2)
+            sel_service = SELBusinessLogic(db)
+            transaction = _pending(db, payer, payee, 45)
+
+            sel_service.approve_transaction(transaction.id, payee.id)
+
+            entries = db.query(SELLedgerEntry).order_by(SELLedgerEntry.amount).all()
+            assert [(e.user_id, e.amount) for e in entries] == [
+                (payer.id, -45),
+                (payee.id, 45),
+            ]
+            assert sel_service.get_balance(payer.id)["balance"] == 75
+            assert verify_ledger(db)["drifted"] == []
+
+    def test_reads_combine_snapshot_and_later_entries(self, sel_sessions):
+        with sel_sessions() as db:
+            payer, payee = _users(db, 2)
+            sel_service = SELBusinessLogic(db)
+            first = _pending(db, payer, payee, 30)
+            second = _pending(db, payer, payee, 20)
+            before = datetime.now(timezone.utc)
+            sel_service.approve_transaction(first.id, payee.id)
+
+            assert take_snapshots(db, now=before + timedelta(hours=1)) == 2
+            assert take_snapshots(db, now=before + timedelta(hours=2)) == 0
+            between = datetime.now(timezone.utc)
+            sel_service.approve_transaction(second.id, payee.id)
+
+            balance = sel_service.get_balance(payee.id)
+            assert (balance["balance"], balance["total_received"]) == (170, 50)
+            assert sel_service.get_balance(payee.id, as_of=before)["balance"] == 120
+            assert sel_service.get_balance(payee.id, as_of=between)["balance"] == 150
+            assert verify_ledger(db)["drifted"] == []
+
+    def test_batch_settlement_is_recorded(self, sel_sessions):
+        with sel_sessions() as db:
+            payer, *payees = _users(db, 3)
+            ids = [_pending(db, payer, payee, 10).id for payee in payees]
+
+            SELBusinessLogic(db).settle_transactions(ids, payer.id, is_coordinator=True)
+
+            assert db.query(SELLedgerEntry).count() == 4
+            report = verify_ledger(db)
+            assert report["drifted"] == report["unbalanced_transactions"] == []
+
+    def test_verifier_reports_drift_and_unrecorded_history(self, sel_sessions):
+        with sel_sessions() as db:
+            payer, payee = _users(db, 2)
+            sel_service = SELBusinessLogic(db)
+            sel_service.approve_transaction(_pending(db, payer, payee, 10).id, payee.id)
+            # Approved before the ledger existed
+            legacy = _pending(db, payer, payee, 5)
+            legacy.status = "approved"
+            db.query(SELBalance).filter(SELBalance.user_id == payer.id).update(
+                {"balance": 200}
+            )
+            db.commit()
+
+            report = verify_ledger(db)
+            assert report["drifted"] == [str(payer.id)]
+            assert report["unrecorded_transactions"] == 1
+
+            assert backfill_ledger(db) == 1
+            assert verify_ledger(db)["unrecorded_transactions"] == 0
+
+    def test_backfill_stays_out_of_earlier_snapshots(self, sel_sessions):
+        with sel_sessions() as db:
+            payer, payee = _users(db, 2)
+            sel_service = SELBusinessLogic(db)
+            sel_service.approve_transaction(_pending(db, payer, payee, 10).id, payee.id)
+            between = datetime.now(timezone.utc)
+            # Settled a month ago, recorded only now
+            legacy = _pending(db, payer, payee, 5)
+            legacy.status = "approved"
+            legacy.completed_at = between - timedelta(days=30)
+            db.commit()
+            backfill_ledger(db)
+
+            settled = between + timedelta(seconds=SNAPSHOT_SETTLE_SECONDS)
+            assert take_snapshots(db, now=settled) == 2
+
+            entry = db.query(SELLedgerEntry).filter_by(transaction_id=legacy.id).first()
+            assert entry.created_at.replace(tzinfo=timezone.utc) > between
+            assert entry.settled_at.replace(tzinfo=timezone.utc) == legacy.completed_at
+            assert sel_service.get_balance(payee.id, as_of=between)["balance"] == 130
+            assert sel_service.get_balance(payee.id)["balance"] == 135
+
+    def test_startup_backfill_restores_pre_ledger_balances(self, sel_sessions):
+        engine = sel_sessions.kw["bind"]
+        with engine.begin() as conn:
+            # Ledger created before settled_at existed
+            conn.exec_driver_sql(
+                "ALTER TABLE sel_ledger_entries DROP COLUMN settled_at"
+            )
+        with sel_sessions() as db:
+            payer, payee = _users(db, 2)
+            legacy = _pending(db, payer, payee, 30)
+            legacy.status = "approved"
+            db.commit()
+            assert SELBusinessLogic(db).get_balance(payee.id)["balance"] == 120
+
+        backfill_sel_ledger(engine, sel_sessions)
+
+        with sel_sessions() as db:
+            dashboard = SELBusinessLogic(db).get_user_dashboard(payee.id)
+            assert dashboard["balance"]["balance"] == 150
+
+
+@pytest.fixture
+def dashboard_db(sel_sessions):
+    available_services_cache.invalidate()
+    with sel_sessions() as db:
+        yield db
+    available_services_cache.invalidate()
+
+
+def _offer(db: Session, provider: User, title: str):
+    return SELBusinessLogic(db).create_service(
+        provider.id,
+        SELServiceCreate(title=title, category="garde", units_per_hour=60),
+    )
+
+
+@pytest.mark.sel
+class TestSELDashboard:
+    """Dashboard read model and the shared available-services snapshot."""
+
+    def test_sections_take_a_fixed_number_of_statements(self, dashboard_db):
+        db = dashboard_db
+        parent, *others = _users(db, 6)
+        for other in others:
+            _offer(db, other, f"Service {other.last_name}")
+            _pending(db, parent, other, 10)
+        parent_id = parent.id
+        SELBusinessLogic(db).get_user_dashboard(parent_id)
+        db.expire_all()
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.get_bind(), "before_cursor_execute", record)
+        try:
+            dashboard = SELBusinessLogic(db).get_user_dashboard(parent_id)
+        finally:
+            event.remove(db.get_bind(), "before_cursor_execute", record)
+
+        # Ledger balance (2), both counts (1), recent transactions with
+        # their users and services (1); services come from the snapshot
+        assert len(statements) == 4
+        assert dashboard["pending_transactions"] == 5
+        assert {t.to_user.last_name for t in dashboard["recent_transactions"]} == {
+            "1",
+            "2",
+            "3",
+            "4",
+            "5",
+        }
+        assert set(dashboard["timings"]) == {
+            "balance",
+            "counts",
+            "recent_transactions",
+            "available_services",
+        }
+
+    def test_services_exclude_own_and_follow_changes(self, dashboard_db):
+        db = dashboard_db
+        parent, neighbour = _users(db, 2)
+        sel_service = SELBusinessLogic(db)
+        mine = _offer(db, parent, "Aide aux devoirs")
+        assert sel_service.get_user_dashboard(parent.id)["available_services"] == []
+
+        offered = _offer(db, neighbour, "Garde le mercredi")
+        services = sel_service.get_user_dashboard(parent.id)["available_services"]
+        assert [s["title"] for s in services] == ["Garde le mercredi"]
+        assert services[0]["user"]["first_name"] == "SEL"
+        theirs = sel_service.get_user_dashboard(neighbour.id)["available_services"]
+        assert [s["id"] for s in theirs] == [mine.id]
+
+        sel_service.update_service(
+            offered.id, neighbour.id, SELServiceUpdate(is_active=False)
+        )
+        assert sel_service.get_user_dashboard(parent.id)["available_services"] == []
+
+    def test_only_the_owner_updates_a_service(self, dashboard_db):
+        parent, neighbour = _users(dashboard_db, 2)
+        offered = _offer(dashboard_db, neighbour, "Covoiturage")
+
+        with pytest.raises(HTTPException) as excinfo:
+            SELBusinessLogic(dashboard_db).update_service(
+                offered.id, parent.id, SELServiceUpdate(title="Pris")
+            )
+
+        assert excinfo.value.status_code == 403
+
+    def test_endpoint_reports_section_timings(
+        self, client: TestClient, auth_headers_parent: dict, test_user_parent: User
+    ):
+        response = client.get("/api/sel/dashboard", headers=auth_headers_parent)
+
+        assert response.status_code == 200
+        assert response.json()["balance"]["balance"] == 120
+        assert "recent_transactions;dur=" in response.headers["Server-Timing"]
@@ -0,0 +1,142 @@
+# Unread counter tests
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import event
+
+from app.message_sink import MessageSink
+from app.models_stage2 import Conversation, ConversationParticipant, Message
+from app.unread_counters import UnreadCounters, unread_counters
+from tests.conftest import FakeRedis
+from tests.unit.test_message_sink import FakeStreamRedis, _queued_sink
+
+
+@pytest.fixture
+def conversation(db_session, test_user_parent, test_user_admin, test_user_direction):
+    conversation = Conversation(name="Annonces", type="announcement")
+    db_session.add(conversation)
+    db_session.flush()
+    read_at = datetime(2026, 9, 1, 12, 0, tzinfo=timezone.utc)
+    db_session.add_all(
+        ConversationParticipant(
+            conversation_id=conversation.id, user_id=user.id, last_read_at=read_at
+        )
+        for user in (test_user_parent, test_user_admin, test_user_direction)
+    )
+    db_session.commit()
+    return conversation
+
+
+def _count_statements(db_session, func):
+    statements = []
+    engine = db_session.get_bind().engine
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        func()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return len(statements)
+
+
+@pytest.mark.unit
+class TestUnreadCounters:
+    """Per-user Redis hashes kept on write and reconciled from the database."""
+
+    def test_messages_count_for_everyone_but_the_sender(
+        self, monkeypatch, db_session, conversation, test_user_parent, test_user_admin
+    ):
+        redis = FakeRedis()
+        monkeypatch.setattr(unread_counters, "redis", redis)
+        sink = MessageSink(enabled=False)
+
+        sink.submit(db_session, conversation.id, test_user_admin.id, "Réunion")
+        sink.submit(db_session, conversation.id, test_user_admin.id, "Rappel")
+
+        assert unread_counters.get(test_user_parent.id) == {str(conversation.id): 2}
+        assert unread_counters.get(test_user_admin.id) == {}
+
+        unread_counters.reset(test_user_parent.id, conversation.id)
+        assert unread_counters.get(test_user_parent.id) == {}
+
+    def test_queued_messages_are_counted_by_the_consumer(
+        self, monkeypatch, db_session, conversation, test_user_parent, test_user_admin
+    ):
+        redis = FakeStreamRedis()
+        monkeypatch.setattr(unread_counters, "redis", redis)
+        sink = _queued_sink(db_session, redis)
+
+        def submit():
+            for content in ("Réunion", "Rappel"):
+                sink.submit(db_session, conversation.id, test_user_admin.id, content)
+
+        assert _count_statements(db_session, submit) == 0
+        assert unread_counters.get(test_user_parent.id) == {}
+
+        entries = redis.xreadgroup("g", "c", {}, count=10)[0][1]
+        sink._persist(entries)
+        # Replayed after a crash before XACK: nothing new is counted
+        sink._persist(entries)
+
+        assert unread_counters.get(test_user_parent.id) == {str(conversation.id): 2}
+
+    def test_reconcile_rewrites_drifted_hashes(
+        self, db_session, conversation, test_user_parent, test_user_admin
+    ):
+        db_session.add(
+            Message(
+                conversation_id=conversation.id,
+                user_id=test_user_admin.id,
+                content="Sortie",
+                created_at=datetime(2026, 9, 1, 13, 0, tzinfo=timezone.utc),
+            )
+        )
+        db_session.commit()
+        redis = FakeRedis()
+        counters = UnreadCounters(redis)
+        counters.reset(test_user_parent.id, conversation.id)
+        redis.hset(f"unread:{test_user_admin.id}", mapping={str(conversation.id): 4})
+
+        result = counters.reconcile(db_session)
+
+        assert result == {"users": 3, "drifted": 3}
+        assert counters.get(test_user_parent.id) == {str(conversation.id): 1}
+        assert counters.get(test_user_admin.id) == {}
+        assert counters.reconcile(db_session)["drifted"] == 0
+
+    def test_reconcile_keeps_increments_made_during_the_run(
+        self, monkeypatch, db_session, conversation, test_user_parent, test_user_admin
+    ):
+        db_session.add(
+            Message(
+                conversation_id=conversation.id,
+                user_id=test_user_admin.id,
+                content="Sortie",
+                created_at=datetime(2026, 9, 1, 13, 0, tzinfo=timezone.utc),
+            )
+        )
+        db_session.commit()
+        redis = FakeRedis()
+        counters = UnreadCounters(redis)
+        recount = counters._unread_counts
+        sent = []
+
+        def recount_then_send(db, user_id=None):
+            counts = recount(db, user_id)
+            if user_id is not None and not sent:
+                # A message is stored and counted between recount and write
+                sent.append(
+                    MessageSink(enabled=False).submit(
+                        db, conversation.id, test_user_admin.id, "Rappel"
+                    )
+                )
+                counters.record_message(db, conversation.id, test_user_admin.id)
+            return counts
+
+        monkeypatch.setattr(counters, "_unread_counts", recount_then_send)
+        counters.reconcile(db_session)
+
+        assert counters.get(test_user_parent.id) == {str(conversation.id): 2}
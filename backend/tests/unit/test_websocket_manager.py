@@ -0,0 +1,384 @@
+# WebSocket fan-out tests
+import asyncio
+import json
+import threading
+
+import pytest
+import pytest_asyncio
+from prometheus_client import REGISTRY
+
+from app import websocket_manager
+from app.models_stage2 import UserStatus
+from app.websocket_manager import WS_CLOSE_SLOW_CONSUMER, WebSocketManager
+from tests.conftest import FakeRedis, UnclosedSession
+
+
+class FakeWebSocket:
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+        self.sent = []
+        self.close_code = None
+
+    async def send_text(self, text: str):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.sent.append(text)
+
+    async def close(self, code: int = 1000):
+        self.close_code = code
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest_asyncio.fixture
+async def manager():
+    manager = WebSocketManager()
+    yield manager
+    await manager.close_all()
+    await settle()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestConversationFanOut:
+    """Reverse index and per-socket outbound queues."""
+
+    async def test_broadcast_reaches_only_conversation_members(self, manager):
+        sockets = {uid: FakeWebSocket() for uid in ("a", "b", "c")}
+        for uid, socket in sockets.items():
+            manager.attach(uid, socket)
+        manager.subscribe("a", "conv-1")
+        manager.subscribe("b", "conv-1")
+        manager.subscribe("c", "conv-2")
+
+        await manager.broadcast_to_conversation("conv-1", {"type": "x"}, "a")
+        await settle()
+
+        assert sockets["a"].sent == []
+        assert sockets["b"].sent == ['{"type": "x"}']
+        assert sockets["c"].sent == []
+
+    async def test_detach_cleans_the_reverse_index(self, manager):
+        manager.attach("a", FakeWebSocket())
+        manager.subscribe("a", "conv-1")
+
+        manager._detach("a")
+
+        assert manager.conversation_members == {}
+        assert manager.user_subscriptions == {}
+
+    async def test_slow_consumer_does_not_delay_others(self, manager):
+        slow, fast = FakeWebSocket(delay=10), FakeWebSocket()
+        manager.attach("slow", slow)
+        manager.attach("fast", fast)
+        for uid in ("slow", "fast"):
+            manager.subscribe(uid, "conv-1")
+
+        await manager.broadcast_to_conversation("conv-1", {"n": 1})
+        await settle()
+
+        assert len(fast.sent) == 1
+
+    async def test_full_queue_evicts_the_client(self, manager):
+        slow = FakeWebSocket(delay=10)
+        connection = manager.attach("slow", slow)
+        connection._queue = asyncio.Queue(maxsize=2)
+        manager.subscribe("slow", "conv-1")
+
+        for n in range(5):
+            await manager.broadcast_to_conversation("conv-1", {"n": n})
+        await settle()
+
+        assert "slow" not in manager.active_connections
+        assert manager.conversation_members == {}
+        assert slow.close_code == WS_CLOSE_SLOW_CONSUMER
+
+
+class FakeBroker:
+    """Redis pub/sub and sorted sets shared by several fake instances."""
+
+    def __init__(self):
+        self.store = FakeRedis()
+        self.subscribers = {}
+
+
+class FakePubSub:
+    def __init__(self, broker):
+        self.broker = broker
+        self.channels = {}
+        self.queue = asyncio.Queue()
+
+    async def subscribe(self, *channels):
+        for channel in channels:
+            self.channels[channel] = None
+            self.broker.subscribers.setdefault(channel, set()).add(self)
+
+    async def unsubscribe(self, *channels):
+        for channel in channels:
+            self.channels.pop(channel, None)
+            self.broker.subscribers.get(channel, set()).discard(self)
+
+    async def get_message(self, ignore_subscribe_messages=False, timeout=0.0):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def aclose(self):
+        await self.unsubscribe(*list(self.channels))
+
+
+class FakeAsyncPipeline:
+    def __init__(self, store):
+        self.store = store
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    def __getattr__(self, name):
+        return lambda *args: self.commands.append((name, args))
+
+    async def execute(self):
+        return [getattr(self.store, name)(*args) for name, args in self.commands]
+
+
+class FakeAsyncRedis:
+    def __init__(self, broker):
+        self.broker = broker
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        return FakePubSub(self.broker)
+
+    def pipeline(self, transaction=True):
+        return FakeAsyncPipeline(self.broker.store)
+
+    async def publish(self, channel, data):
+        subscribers = self.broker.subscribers.get(channel, set())
+        for pubsub in subscribers:
+            pubsub.queue.put_nowait(
+                {"type": "message", "channel": channel, "data": data}
+            )
+        return len(subscribers)
+
+    def __getattr__(self, name):
+        method = getattr(self.broker.store, name)
+
+        async def call(*args):
+            return method(*args)
+
+        return call
+
+
+async def eventually(check, timeout=1.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not check():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.01)
+
+
+@pytest_asyncio.fixture
+async def cluster():
+    broker = FakeBroker()
+    managers = [WebSocketManager(redis_client=FakeAsyncRedis(broker)) for _ in "ab"]
+    for manager in managers:
+        await manager.start()
+    yield managers
+    for manager in managers:
+        await manager.stop()
+    await settle()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestBackplane:
+    """Delivery and presence across instances."""
+
+    async def test_broadcast_reaches_members_on_other_instances(self, cluster):
+        first, second = cluster
+        alice, bob, carol = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        first.attach("alice", alice)
+        first.attach("carol", carol)
+        second.attach("bob", bob)
+        for manager, uid in ((first, "alice"), (first, "carol"), (second, "bob")):
+            manager.subscribe(uid, "conv-1")
+        await settle()
+
+        await first.broadcast_to_conversation("conv-1", {"n": 1}, "alice")
+        await eventually(lambda: bob.sent)
+        await settle()
+
+        assert bob.sent == ['{"n": 1}']
+        assert carol.sent == ['{"n": 1}']
+        assert alice.sent == []
+
+    async def test_personal_message_is_routed_to_the_owning_instance(self, cluster):
+        first, second = cluster
+        bob = FakeWebSocket()
+        second.attach("bob", bob)
+        await settle()
+
+        assert await first.send_personal_message('{"hi": 1}', "bob")
+        await eventually(lambda: bob.sent)
+        assert not await first.send_personal_message('{"hi": 1}', "nobody")
+
+    async def test_presence_is_cluster_wide(self, cluster):
+        first, second = cluster
+        first.attach("alice", FakeWebSocket())
+        second.attach("bob", FakeWebSocket())
+        for manager in cluster:
+            await manager.refresh_presence()
+
+        assert sorted(await first.get_online_users()) == ["alice", "bob"]
+        assert await first.is_user_online("bob")
+        await second._mark_offline("bob")
+        assert not await first.is_user_online("bob")
+
+
+class RecordingSession:
+    def __init__(self):
+        self.closed = 0
+
+    def close(self):
+        self.closed += 1
+
+    def rollback(self):
+        pass
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_database_work_runs_off_the_event_loop(manager):
+    db = RecordingSession()
+
+    def operation(session, value):
+        return threading.current_thread().name, value
+
+    thread_name, value = await manager._run_db(operation, db, 42)
+
+    assert thread_name.startswith("ws-db")
+    assert value == 42
+    assert db.closed == 1
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_flapping_connection_costs_one_status_write(
+    manager, db_session, test_user_parent
+):
+    manager.session_factory = lambda: UnclosedSession(db_session)
+    for is_online in (True, False, True, False, True):
+        manager._record_status(test_user_parent.id, is_online)
+
+    assert await manager.flush_statuses_once() == 1
+    assert await manager.flush_statuses_once() == 0
+
+    status = db_session.get(UserStatus, test_user_parent.id)
+    assert status.is_online is True
+    assert status.last_seen is not None
+
+
+def _typing(conversation_id, is_typing=True):
+    return {"conversation_id": conversation_id, "is_typing": is_typing}
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestTypingIndicators:
+    """Throttled, aggregated typing frames."""
+
+    CONVERSATION = "00000000-0000-0000-0000-000000000001"
+
+    async def test_typists_are_throttled_and_aggregated(self, manager):
+        reader = FakeWebSocket()
+        manager.attach("reader", reader)
+        manager.subscribe("reader", self.CONVERSATION)
+        suppressed = (
+            REGISTRY.get_sample_value(
+                "ecolehub_ws_typing_events_total", {"result": "suppressed"}
+            )
+            or 0
+        )
+
+        for _ in range(5):
+            await manager._handle_typing("alice", _typing(self.CONVERSATION))
+        await manager._handle_typing("bob", _typing(self.CONVERSATION))
+        await manager.flush_typing()
+        await settle()
+
+        assert [json.loads(frame)["user_ids"] for frame in reader.sent] == [
+            ["alice", "bob"]
+        ]
+        assert (
+            REGISTRY.get_sample_value(
+                "ecolehub_ws_typing_events_total", {"result": "suppressed"}
+            )
+            == suppressed + 4
+        )
+
+    async def test_unchanged_typists_send_no_frame(self, manager):
+        reader = FakeWebSocket()
+        manager.attach("reader", reader)
+        manager.subscribe("reader", self.CONVERSATION)
+
+        await manager._handle_typing("alice", _typing(self.CONVERSATION))
+        await manager.flush_typing()
+        await manager.flush_typing()
+        await manager._handle_typing("alice", _typing(self.CONVERSATION, False))
+        await manager.flush_typing()
+        await settle()
+
+        assert [json.loads(frame)["user_ids"] for frame in reader.sent] == [
+            ["alice"],
+            [],
+        ]
+        assert manager._typing == {}
+
+    async def test_typists_on_other_instances_are_merged(self, cluster):
+        first, second = cluster
+        reader = FakeWebSocket()
+        second.attach("reader", reader)
+        for manager in cluster:
+            manager.attach("typist", FakeWebSocket())
+        second.subscribe("reader", self.CONVERSATION)
+        first.subscribe("typist", self.CONVERSATION)
+        await settle()
+
+        await first._handle_typing("alice", _typing(self.CONVERSATION))
+        await first.flush_typing()
+        await second._handle_typing("bob", _typing(self.CONVERSATION))
+        await eventually(lambda: self.CONVERSATION in second._remote_typing)
+        await second.flush_typing()
+        await settle()
+
+        assert json.loads(reader.sent[-1])["user_ids"] == ["alice", "bob"]
+
+    async def test_remote_typist_outlasting_the_ttl_stays_shown(
+        self, cluster, monkeypatch
+    ):
+        monkeypatch.setattr(websocket_manager, "WS_TYPING_INTERVAL", 0.05)
+        monkeypatch.setattr(websocket_manager, "WS_TYPING_TTL", 0.3)
+        monkeypatch.setattr(websocket_manager, "WS_TYPING_HEARTBEAT", 0.1)
+        first, second = cluster
+        reader = FakeWebSocket()
+        second.attach("reader", reader)
+        first.attach("typist", FakeWebSocket())
+        second.subscribe("reader", self.CONVERSATION)
+        first.subscribe("typist", self.CONVERSATION)
+        await settle()
+
+        # Keeps typing for three TTLs
+        for _ in range(9):
+            await first._handle_typing("alice", _typing(self.CONVERSATION))
+            await first.flush_typing()
+            await asyncio.sleep(0.1)
+            await second.flush_typing()
+        await settle()
+
+        assert [json.loads(frame)["user_ids"] for frame in reader.sent] == [["alice"]]
@@ -66,6 +66,28 @@ CREATE TABLE sel_balances (
     CONSTRAINT balance_limits CHECK (balance >= -300 AND balance <= 600)
 );
 
+-- SEL: append-only double-entry ledger (debit + credit per approved transaction)
+CREATE TABLE sel_ledger_entries (
+    id BIGSERIAL PRIMARY KEY,
+    transaction_id UUID NOT NULL REFERENCES sel_transactions(id),
+    user_id UUID NOT NULL REFERENCES users(id),
+    amount INTEGER NOT NULL CONSTRAINT nonzero_amount CHECK (amount <> 0),
+    created_at TIMESTAMPTZ NOT NULL,
+    settled_at TIMESTAMPTZ,
+    CONSTRAINT uq_ledger_entry UNIQUE (transaction_id, user_id)
+);
+
+-- SEL: balance snapshots, read as snapshot + ledger entries after last_entry_id
+CREATE TABLE sel_balance_snapshots (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    user_id UUID NOT NULL REFERENCES users(id),
+    last_entry_id BIGINT NOT NULL,
+    balance INTEGER NOT NULL,
+    total_given INTEGER NOT NULL,
+    total_received INTEGER NOT NULL,
+    taken_at TIMESTAMPTZ NOT NULL
+);
+
 -- SEL: Service categories for organization
 CREATE TABLE sel_categories (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
@@ -85,6 +107,8 @@ CREATE INDEX idx_sel_transactions_from_user ON sel_transactions(from_user_id);
 CREATE INDEX idx_sel_transactions_to_user ON sel_transactions(to_user_id);
 CREATE INDEX idx_sel_transactions_status ON sel_transactions(status);
 CREATE INDEX idx_sel_transactions_created ON sel_transactions(created_at DESC);
+CREATE INDEX idx_sel_ledger_user ON sel_ledger_entries(user_id, id);
+CREATE INDEX idx_sel_snapshots_user ON sel_balance_snapshots(user_id, last_entry_id);
 
 -- Trigger function for updated_at
 CREATE OR REPLACE FUNCTION update_updated_at_column()
@@ -15,6 +15,7 @@ CREATE TABLE IF NOT EXISTS conversations (
     class_name VARCHAR(10), -- For class-specific groups (M1, M2, P1, etc.)
     created_by UUID REFERENCES users(id),
     is_active BOOLEAN DEFAULT true,
+    last_message_id UUID, -- Newest message, maintained by the API for the inbox
     created_at TIMESTAMPTZ DEFAULT NOW(),
     updated_at TIMESTAMPTZ DEFAULT NOW()
 );
@@ -83,7 +84,7 @@ CREATE INDEX IF NOT EXISTS idx_conversations_type ON conversations(type);
 CREATE INDEX IF NOT EXISTS idx_conversations_class ON conversations(class_name);
 CREATE INDEX IF NOT EXISTS idx_conversations_created_by ON conversations(created_by);
 
-CREATE INDEX IF NOT EXISTS idx_messages_conversation ON messages(conversation_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_messages_conversation_keyset ON messages(conversation_id, created_at, id);
 CREATE INDEX IF NOT EXISTS idx_messages_user ON messages(user_id);
 CREATE INDEX IF NOT EXISTS idx_messages_created ON messages(created_at DESC);
 
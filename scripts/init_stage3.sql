@@ -29,9 +29,18 @@ CREATE TABLE IF NOT EXISTS shop_interests (
     notes TEXT,  -- Special requirements, size, etc.
     status VARCHAR(20) DEFAULT 'interested' CHECK (status IN ('interested', 'confirmed', 'cancelled')),
     created_at TIMESTAMPTZ DEFAULT NOW(),
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
     UNIQUE(product_id, user_id)
 );
 
+-- Stage 3: Materialized interest totals per product (maintained by the shop service)
+CREATE TABLE IF NOT EXISTS shop_interest_counters (
+    product_id UUID PRIMARY KEY REFERENCES shop_products(id) ON DELETE CASCADE,
+    total_quantity INTEGER NOT NULL DEFAULT 0,
+    participants_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
 -- Stage 3: Shop Orders (when group threshold is met)
 CREATE TABLE IF NOT EXISTS shop_orders (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
@@ -109,6 +118,9 @@ CREATE TRIGGER update_shop_products_updated_at BEFORE UPDATE ON shop_products
 CREATE TRIGGER update_shop_orders_updated_at BEFORE UPDATE ON shop_orders
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+CREATE TRIGGER update_shop_interests_updated_at BEFORE UPDATE ON shop_interests
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
 CREATE TRIGGER update_education_resources_updated_at BEFORE UPDATE ON education_resources
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
@@ -142,4 +154,12 @@ SELECT
 FROM shop_products p 
 CROSS JOIN users u 
 WHERE p.name LIKE '%T-shirt%' 
-LIMIT 5;
\ No newline at end of file
+LIMIT 5;
+
+-- Initialize interest counters from the sample interests
+INSERT INTO shop_interest_counters (product_id, total_quantity, participants_count)
+SELECT product_id, SUM(quantity), COUNT(*)
+FROM shop_interests
+WHERE status = 'interested'
+GROUP BY product_id
+ON CONFLICT (product_id) DO NOTHING;
@@ -89,6 +89,28 @@ CREATE TABLE sel_balances (
     CONSTRAINT balance_limits CHECK (balance >= -300 AND balance <= 600)
 );
 
+-- SEL: append-only double-entry ledger (debit + credit per approved transaction)
+CREATE TABLE sel_ledger_entries (
+    id BIGSERIAL PRIMARY KEY,
+    transaction_id UUID NOT NULL REFERENCES sel_transactions(id),
+    user_id UUID NOT NULL REFERENCES users(id),
+    amount INTEGER NOT NULL CONSTRAINT nonzero_amount CHECK (amount <> 0),
+    created_at TIMESTAMPTZ NOT NULL,
+    settled_at TIMESTAMPTZ,
+    CONSTRAINT uq_ledger_entry UNIQUE (transaction_id, user_id)
+);
+
+-- SEL: balance snapshots, read as snapshot + ledger entries after last_entry_id
+CREATE TABLE sel_balance_snapshots (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    user_id UUID NOT NULL REFERENCES users(id),
+    last_entry_id BIGINT NOT NULL,
+    balance INTEGER NOT NULL,
+    total_given INTEGER NOT NULL,
+    total_received INTEGER NOT NULL,
+    taken_at TIMESTAMPTZ NOT NULL
+);
+
 -- Messages & Conversations (Stage 2+)
 CREATE TABLE conversations (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
@@ -165,6 +187,7 @@ CREATE TABLE shop_interests (
     color VARCHAR(50),
     notes TEXT,
     created_at TIMESTAMPTZ DEFAULT NOW(),
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
     UNIQUE(product_id, user_id)
 );
 
@@ -200,7 +223,10 @@ CREATE INDEX idx_users_email ON users(email);
 CREATE INDEX idx_sel_services_user ON sel_services(user_id);
 CREATE INDEX idx_sel_services_category ON sel_services(category);
 CREATE INDEX idx_sel_transactions_users ON sel_transactions(from_user_id, to_user_id);
+CREATE INDEX idx_sel_ledger_user ON sel_ledger_entries(user_id, id);
+CREATE INDEX idx_sel_snapshots_user ON sel_balance_snapshots(user_id, last_entry_id);
 CREATE INDEX idx_messages_conversation ON messages(conversation_id, created_at DESC);
+CREATE INDEX idx_messages_conversation_keyset ON messages(conversation_id, created_at, id);
 CREATE INDEX idx_events_date ON events(start_date);
 CREATE INDEX idx_shop_products_active ON shop_products(is_active);
 CREATE INDEX idx_shop_interests_product ON shop_interests(product_id);
@@ -234,6 +260,9 @@ FOR EACH ROW EXECUTE FUNCTION update_updated_at();
 CREATE TRIGGER update_shop_products_updated_at BEFORE UPDATE ON shop_products
 FOR EACH ROW EXECUTE FUNCTION update_updated_at();
 
+CREATE TRIGGER update_shop_interests_updated_at BEFORE UPDATE ON shop_interests
+FOR EACH ROW EXECUTE FUNCTION update_updated_at();
+
 CREATE TRIGGER update_educational_resources_updated_at BEFORE UPDATE ON educational_resources
 FOR EACH ROW EXECUTE FUNCTION update_updated_at();
 